@@ -0,0 +1,63 @@
+"""
+Cross triggers over many periods: dense column comparison vs the sparse
+cross-event index
+
+Usage:
+    python -m benchmarks.bench_cross_index [--bars 1000000] [--periods 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_indicators import make_ohlc
+from indicators.calculate_indicators import calculate_indicators
+from strategies.signals import SignalFrame, trigger_mask
+
+TRIGGERS = [
+    {"element1": "Tenkan", "element2": "Kijun", "event": "Cross Above"},
+    {"element1": "Price", "element2": "BB Upper Band", "event": "Cross"},
+    {"element1": "RSI", "compare_type": "Fixed Value", "value": 50.0, "event": "Cross Below"},
+]
+
+
+def run(df, frames, periods, sparse):
+    masks = []
+    start = time.perf_counter()
+
+    for a, b in periods:
+        signal_frame = SignalFrame(df.iloc[a:b], "15m", frames)
+        if not sparse:
+            signal_frame._base_start = None
+        masks.extend(trigger_mask(signal_frame, trigger) for trigger in TRIGGERS)
+
+    return masks, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    parser.add_argument("--periods", type=int, default=200)
+    args = parser.parse_args()
+
+    params = dict(rsi_window=14, bb_period=20, bb_stdev=2.0, kc_ema_period=20, kc_atr_period=10, kc_atr_mult=2.0)
+    df = calculate_indicators(make_ohlc(args.bars), **params)
+    frames = {"15m": df}
+
+    rng = np.random.default_rng(0)
+    starts = rng.integers(0, args.bars // 2, args.periods)
+    periods = [(a, a + int(rng.integers(1_000, args.bars // 2))) for a in starts]
+
+    print(f"{args.bars} bars, {args.periods} periods x {len(TRIGGERS)} cross triggers")
+
+    ref, t_ref = run(df, frames, periods, sparse=False)
+    new, t_build = run(df, frames, periods[:1], sparse=True)
+    new, t_new = run(df, frames, periods, sparse=True)
+
+    same = all(np.array_equal(a, b) for a, b in zip(ref, new))
+    print(f"dense {t_ref * 1e3:8.1f} ms   sparse {t_new * 1e3:8.1f} ms"
+          f" (+{t_build * 1e3:.1f} ms first build)   same masks {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Indicator kernels: validation against the pandas implementations + timings
+
+Usage:
+    python -m benchmarks.bench_indicators [--bars 1000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from indicators.rsi import rsi
+from indicators.cmb import cmb_composite, cmb_from_rsi
+from indicators.keltner import keltner_channel
+from indicators.batch import rsi_multi, bollinger_multi, keltner_multi
+from indicators.rolling import rolling_moments
+from indicators.calculate_indicators import calculate_indicators
+from indicators.chunked import calculate_indicators_file
+from indicators.kernels import HAS_NUMBA, fused_smoothings
+
+
+def make_ohlc(bars, seed=0):
+    """Synthetic random-walk OHLC frame"""
+    rng = np.random.default_rng(seed)
+    close = 4000 + np.cumsum(rng.normal(0, 5, bars))
+    spread = rng.uniform(0, 5, (2, bars))
+
+    return pd.DataFrame(
+        {"high": close + spread[0], "low": close - spread[1], "latest": close},
+        index=pd.date_range("2000-01-01", periods=bars, freq="15min"),
+    )
+
+
+def timed(fn, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def max_abs_diff(a, b):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    if not np.array_equal(np.isnan(a), np.isnan(b)):
+        return np.inf
+    return float(np.nanmax(np.abs(a - b), initial=0.0))
+
+
+def bench_fused(df, rsi_window=14, ema_span=20, atr_period=10, atr_mult=2.0):
+    def reference():
+        return (
+            rsi(df["latest"], rsi_window),
+            cmb_composite(df["latest"]),
+            keltner_channel(df["high"], df["low"], df["latest"], ema_span, atr_period, atr_mult),
+        )
+
+    def fused():
+        smooth = fused_smoothings(
+            df["latest"], df["high"], df["low"], (rsi_window, 14, 3), ema_span, atr_period
+        )
+        cmb = cmb_from_rsi(
+            pd.Series(smooth["rsi"][14], index=df.index),
+            pd.Series(smooth["rsi"][3], index=df.index),
+        )
+        kc = (
+            smooth["ema"],
+            smooth["ema"] + atr_mult * smooth["atr"],
+            smooth["ema"] - atr_mult * smooth["atr"],
+        )
+        return smooth["rsi"][rsi_window], cmb, kc
+
+    fused()  # JIT warm-up
+
+    (ref_rsi, ref_cmb, ref_kc), t_ref = timed(reference)
+    (new_rsi, new_cmb, new_kc), t_new = timed(fused)
+
+    diff = max(
+        [max_abs_diff(ref_rsi, new_rsi)]
+        + [max_abs_diff(a, b) for a, b in zip(ref_cmb, new_cmb)]
+        + [max_abs_diff(a, b) for a, b in zip(ref_kc, new_kc)]
+    )
+
+    print(f"fused RSI/CMB/KC   pandas {t_ref * 1e3:8.1f} ms   fused {t_new * 1e3:8.1f} ms"
+          f"   x{t_ref / t_new:5.1f}   max |diff| {diff:.3g}")
+
+
+def bench_multi(df):
+    close, high, low = df["latest"], df["high"], df["low"]
+
+    # Every window of the sidebar RSI slider
+    windows = list(range(5, 51))
+    rsi_multi(close.iloc[:100], windows)  # JIT warm-up
+
+    ref, t_ref = timed(lambda: [rsi(close, w).to_numpy() for w in windows])
+    new, t_new = timed(lambda: rsi_multi(close, windows))
+    diff = max(max_abs_diff(r, new[:, j]) for j, r in enumerate(ref))
+    print(f"rsi x{len(windows):<3}           loop {t_ref * 1e3:8.1f} ms   multi {t_new * 1e3:8.1f} ms"
+          f"   x{t_ref / t_new:5.1f}   max |diff| {diff:.3g}")
+
+    periods, stdevs = list(range(10, 60, 5)), [1.5, 2.0, 2.5]
+    ref, t_ref = timed(lambda: [
+        (close.rolling(p).mean() + s * close.rolling(p).std()).to_numpy()
+        for p in periods for s in stdevs
+    ])
+    new, t_new = timed(lambda: bollinger_multi(close, periods, stdevs)[1])
+    diff = max(max_abs_diff(r, new[:, j]) for j, r in enumerate(ref))
+    print(f"bollinger x{len(ref):<3}     loop {t_ref * 1e3:8.1f} ms   multi {t_new * 1e3:8.1f} ms"
+          f"   x{t_ref / t_new:5.1f}   max |diff| {diff:.3g}")
+
+    ema_periods, atr_periods, mults = [10, 20, 30], [10, 14], [1.5, 2.0]
+    ref, t_ref = timed(lambda: [
+        keltner_channel(high, low, close, e, a, m)[1].to_numpy()
+        for e in ema_periods for a in atr_periods for m in mults
+    ])
+    new, t_new = timed(lambda: keltner_multi(high, low, close, ema_periods, atr_periods, mults)[1])
+    diff = max(max_abs_diff(r, new[:, j]) for j, r in enumerate(ref))
+    print(f"keltner x{len(ref):<3}       loop {t_ref * 1e3:8.1f} ms   multi {t_new * 1e3:8.1f} ms"
+          f"   x{t_ref / t_new:5.1f}   max |diff| {diff:.3g}")
+
+
+def bench_rolling(df, windows=(3, 13, 20, 33)):
+    """Rolling mean/std vs pandas, both checked against a direct two-pass std"""
+    close = df["latest"]
+
+    rolling_moments(close.iloc[:1000], list(windows))  # JIT warm-up
+
+    ref, t_ref = timed(lambda: [
+        (close.rolling(w).mean().to_numpy(), close.rolling(w).std().to_numpy()) for w in windows
+    ])
+    (mean, std), t_new = timed(lambda: rolling_moments(close, list(windows)))
+
+    values = close.to_numpy()
+    err_ref = err_new = diff_mean = 0.0
+    for j, w in enumerate(windows):
+        exact = np.full(len(values), np.nan)
+        exact[w - 1:] = np.lib.stride_tricks.sliding_window_view(values, w).std(axis=1, ddof=1)
+
+        err_ref = max(err_ref, max_abs_diff(ref[j][1], exact))
+        err_new = max(err_new, max_abs_diff(std[:, j], exact))
+        diff_mean = max(diff_mean, max_abs_diff(ref[j][0], mean[:, j]))
+
+    print(f"rolling x{len(windows):<3}       pandas {t_ref * 1e3:8.1f} ms   prefix {t_new * 1e3:8.1f} ms"
+          f"   mean |diff| {diff_mean:.3g}   std err pandas {err_ref:.3g} / prefix {err_new:.3g}")
+
+
+def peak_memory(fn):
+    """Result of fn() and the peak of Python-tracked allocations during it"""
+    tracemalloc.start()
+    try:
+        result = fn()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_chunked(df, chunk_bars=100_000):
+    """Out-of-core path from a CSV vs calculate_indicators in memory"""
+    params = dict(rsi_window=14, bb_period=20, bb_stdev=2.0, kc_ema_period=20, kc_atr_period=10, kc_atr_mult=2.0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "ohlc.csv")
+        df.rename_axis("time").to_csv(csv_path)
+
+        def in_memory():
+            ohlc = pd.read_csv(csv_path, index_col="time", parse_dates=["time"])
+            return calculate_indicators(ohlc, **params)
+
+        (ref, mem_ref), t_ref = timed(lambda: peak_memory(in_memory), repeat=1)
+        (new, mem_new), t_new = timed(lambda: peak_memory(
+            lambda: calculate_indicators_file(csv_path, os.path.join(tmp, "features"), chunk_bars, **params)
+        ), repeat=1)
+
+        diff = max(max_abs_diff(ref[col], new[col]) for col in ref.columns)
+        del new
+
+    print(f"chunked {chunk_bars} rows   memory {t_ref * 1e3:8.1f} ms / {mem_ref / 2**20:6.0f} MiB"
+          f"   chunked {t_new * 1e3:8.1f} ms / {mem_new / 2**20:6.0f} MiB   max |diff| {diff:.3g}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_ohlc(args.bars)
+    print(f"{args.bars} bars")
+
+    if HAS_NUMBA:
+        bench_fused(df)
+    else:
+        print("fused RSI/CMB/KC   skipped (numba not installed)")
+
+    bench_multi(df)
+    bench_rolling(df)
+    bench_chunked(df)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Sending an indicator frame to process-pool workers: pickled copy vs SharedFrame
+
+Also runs the charting tab's per-period pipeline (compute_timeframe_view)
+on process workers fed with the precompute job's SharedFrames, and checks
+it against the thread path.
+
+Usage:
+    python -m benchmarks.bench_shared_frames [--bars 1000000] [--workers 16] [--periods 20]
+"""
+import argparse
+import pickle
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_indicators import make_ohlc
+from data.column_store import as_frame
+from data.registry import DatasetRegistry, registry
+from data.resample import derive_timeframe
+from indicators.calculate_indicators import calculate_indicators
+from ui.charting_tab import compute_timeframe_view
+from utils.executor import get_executor, run_parallel
+from utils.precompute import PrecomputeJob
+
+
+def column_sums(source):
+    """Worker task: touch every column of the frame"""
+    df = as_frame(source)
+    return float(np.nansum([np.nansum(df[col].to_numpy()) for col in df.columns]))
+
+
+def send(executor, source, workers):
+    start = time.perf_counter()
+    results = [f.result() for f in [executor.submit(column_sums, source) for _ in range(workers)]]
+    return results, time.perf_counter() - start
+
+
+def tab_pipeline(timeframes, periods, sidebar_config, kind):
+    """Tenkan Kijun stats of every period x timeframe, as the charting tab computes them"""
+    start = time.perf_counter()
+    views = run_parallel([
+        (compute_timeframe_view, (timeframes, timeframe, start_dt, end_dt, sidebar_config, False, None), {})
+        for start_dt, end_dt in periods
+        for timeframe in ("1H", "15m")
+    ], kind=kind)
+    return [view['stats']["value"].tolist() for view in views], time.perf_counter() - start
+
+
+def charting_tab_round_trip(df, params, n_periods):
+    """The charting tab's EXECUTOR_KIND = "process" path against its thread path"""
+    df_15m = registry.acquire(("bench", "15m", len(df)), lambda: df)
+    df_1h = derive_timeframe(df_15m, "1H")
+
+    job = PrecomputeJob(("bench", len(df)), df_1h, df_15m, params, params).start()
+
+    index = df.index
+    step = len(index) // (n_periods + 1)
+    # DRM-sized periods (a few days of 15m bars)
+    periods = [(index[i * step], index[i * step + 300]) for i in range(1, n_periods + 1)]
+
+    sidebar_config = {
+        'pattern': None, 'primary_choice': None, 'secondary_choice': None,
+        'show_ichimoku': True, 'show_bb': True, 'show_kc': True,
+        'show_tenkan_kijun': True, 'show_bootstrap': False,
+        'costs': {"1H": None, "15m": None},
+    }
+
+    threaded, t_thread = tab_pipeline(dict(zip(("1H", "15m"), job.features())), periods, sidebar_config, "thread")
+    shared, t_process = tab_pipeline(dict(zip(("1H", "15m"), job.shared_features())), periods, sidebar_config, "process")
+
+    print(f"charting tab      {len(periods)} periods x 2 timeframes   thread {t_thread * 1e3:8.1f} ms"
+          f"   process (SharedFrame) {t_process * 1e3:8.1f} ms   same results {threaded == shared}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--periods", type=int, default=20)
+    args = parser.parse_args()
+
+    params = dict(rsi_window=14, bb_period=20, bb_stdev=2.0, kc_ema_period=20, kc_atr_period=10, kc_atr_mult=2.0)
+    df = make_ohlc(args.bars)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = DatasetRegistry(max_bytes=2 * 1024 ** 3, mmap_dir=tmp)
+        handle = registry.acquire(("features", args.bars), lambda: calculate_indicators(df, **params))
+
+        frame, shared = handle.frame(), handle.shared()
+        print(f"{args.bars} bars x {frame.shape[1]} columns, {args.workers} tasks")
+        print(f"pickled size      frame {len(pickle.dumps(frame)) / 2**20:8.1f} MiB"
+              f"   SharedFrame {len(pickle.dumps(shared))} bytes")
+
+        executor = get_executor("process", args.workers)
+        [f.result() for f in [executor.submit(abs, 0) for _ in range(args.workers)]]  # pool start-up
+
+        ref, t_ref = send(executor, frame, args.workers)
+        new, t_new = send(executor, shared, args.workers)
+
+        print(f"round trip        frame {t_ref * 1e3:8.1f} ms   SharedFrame {t_new * 1e3:8.1f} ms"
+              f"   same results {ref == new}")
+
+        charting_tab_round_trip(df, params, args.periods)
+
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,16 @@
 Configuration constants for the trading platform
 """
 
+# Saved strategies (SQLite); the legacy JSON file is imported on first use
+STRATEGIES_DB_FILE = "saved_strategies.db"
 STRATEGIES_FILE = "saved_strategies.json"
 
+# Backtest results of custom strategies (SQLite)
+RESULTS_DB_FILE = "backtest_results.db"
+
+# Result tags remembered per process (not re-written on reruns), LRU
+RESULTS_TAG_CACHE_MAX_ENTRIES = 4096
+
 # Indicator groups for strategy builder
 PRICE_AND_INDICATORS = [
     "Price",
@@ -49,23 +57,114 @@ CONDITION_COMPARE_TYPES = [
     "Fixed Value"
 ]
 
-# Indicator mapping for strategy execution
+# Condition tree building blocks
+CONDITION_NODE_TYPES = [
+    "Condition",
+    "Group"
+]
+
+CONDITION_LOGIC = [
+    "AND",
+    "OR"
+]
+
+# Lookback window of a condition (label -> stored mode)
+CONDITION_LOOKBACKS = {
+    "Now": None,
+    "Within last N bars": "within",
+    "For N consecutive bars": "consecutive",
+    "N bars since": "bars_since",
+}
+
+BARS_SINCE_COMPARES = [
+    "At least",
+    "Exactly",
+    "At most"
+]
+
+# Timeframe of a strategy element ("Chart" = the timeframe the strategy runs on)
+STRATEGY_TIMEFRAMES = [
+    "Chart",
+    "1H",
+    "15m"
+]
+
+# Strategy / event study element -> indicator column (calculate_indicators)
 INDICATOR_MAP = {
     "Price": "latest",
     "BB Upper Band": "bb_upper",
-    "BB Middle Band": "bb_middle",
+    "BB Middle Band": "bb_mid",
     "BB Lower Band": "bb_lower",
     "KC Upper Band": "kc_upper",
-    "KC Middle Band": "kc_middle",
+    "KC Middle Band": "kc_mid",
     "KC Lower Band": "kc_lower",
     "Tenkan": "tenkan",
     "Kijun": "kijun",
     "Senkou A": "senkou_a",
     "Senkou B": "senkou_b",
     "RSI": "rsi",
-    "RSI 13 SMA": "rsi_13_sma",
-    "RSI 33 SMA": "rsi_33_sma",
-    "CMB": "cmb",
-    "CMB 13 SMA": "cmb_13_sma",
-    "CMB 33 SMA": "cmb_33_sma",
-}
\ No newline at end of file
+    # The RSI signal line elements read the CMB signal lines, as they always have
+    "RSI 13 SMA": "ci_13",
+    "RSI 33 SMA": "ci_33",
+    "CMB": "ci",
+    "CMB 13 SMA": "ci_13",
+    "CMB 33 SMA": "ci_33",
+}
+
+# Seconds between progress polls of the background indicator job (the
+# charting tab also waits this long before showing the progress bar)
+PRECOMPUTE_POLL_SECONDS = 0.5
+
+# Parallel execution of the per-timeframe / per-period pipelines
+# "thread" (default) or "process"
+EXECUTOR_KIND = "thread"
+
+# Worker count (None = one per CPU core)
+EXECUTOR_MAX_WORKERS = None
+
+# Execution cost model (strategies/costs.py)
+FILL_MODELS = {
+    "close": "Signal bar close",
+    "next_open": "Next bar open",
+}
+
+SLIPPAGE_MODELS = {
+    "none": "None",
+    "fixed": "Fixed (price units)",
+    "atr": "ATR multiple (Keltner ATR)",
+}
+
+# Bootstrap of the trade returns shown next to the strategy statistics
+BOOTSTRAP_RESAMPLES = 10_000
+BOOTSTRAP_CONFIDENCE = 0.95
+
+# Bar replay (strategies/replay.py): bars on the replay chart, bars fed to
+# the indicators before the replay start, and seconds between redraws
+REPLAY_HISTORY_BARS = 300
+REPLAY_WARMUP_BARS = 1000
+REPLAY_REFRESH_SECONDS = 0.5
+
+# Parsed uploads kept in the process-wide cache
+UPLOAD_CACHE_MAX_ENTRIES = 16
+
+# Shared dataset registry (one per Streamlit server process)
+# Unreferenced datasets are evicted LRU-first beyond this size
+DATASET_REGISTRY_MAX_BYTES = 2 * 1024 ** 3
+
+# Directory for memory-mapped dataset buffers (None = keep them in RAM)
+DATASET_MMAP_DIR = None
+
+# Rows per chunk of the out-of-core indicator path (indicators/chunked.py)
+INDICATOR_CHUNK_BARS = 1_000_000
+
+# Higher timeframes derived from a base-resolution upload (pandas offset
+# aliases; fixed-length, so the session offset applies to daily bars too)
+TIMEFRAME_RULES = {
+    "1H": "1h",
+    "4H": "4h",
+    "1D": "24h",
+}
+
+# Start of the trading session relative to midnight; resampled bars
+# (4H, 1D) are aligned to it
+SESSION_OFFSET = "0h"
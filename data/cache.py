@@ -0,0 +1,50 @@
+"""
+Process-wide cache of parsed uploads, keyed by content hash
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from config.constants import UPLOAD_CACHE_MAX_ENTRIES
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def file_digest(file):
+    """SHA-256 of an uploaded file's content"""
+    if hasattr(file, "getvalue"):
+        data = file.getvalue()
+    else:
+        position = file.tell()
+        file.seek(0)
+        data = file.read()
+        file.seek(position)
+
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_or_load(namespace, digest, loader):
+    """
+    Return the cached value for (namespace, digest), calling loader() once
+    on a miss. Shared by every session of the Streamlit server process;
+    least recently used entries are evicted beyond UPLOAD_CACHE_MAX_ENTRIES.
+    """
+    key = (namespace, digest)
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    # Parse outside the lock so other uploads are not blocked
+    value = loader()
+
+    with _cache_lock:
+        value = _cache.setdefault(key, value)
+        _cache.move_to_end(key)
+
+        while len(_cache) > UPLOAD_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+    return value
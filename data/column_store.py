@@ -0,0 +1,180 @@
+"""
+On-disk columnar store: one raw binary file per column plus a JSON header
+
+Written chunk by chunk (append-only), read back as a DataFrame over
+read-only memory maps, so neither side needs the whole table in RAM.
+Each column is one contiguous, page-aligned array (its own file), so any
+number of processes can map the same store and share the page cache.
+"""
+import json
+import os
+import shutil
+import uuid
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+INDEX_FILE = "__index__.bin"
+
+
+class ColumnStoreWriter:
+    """
+    Appends DataFrame chunks to a column store directory.
+
+    The first chunk fixes the columns and dtypes; later chunks must have the
+    same columns and are cast to those dtypes. The store is only readable
+    after close() writes the header.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.length = 0
+
+        self._index_name = None
+        self._index_dtype = None
+        self._columns = None
+        self._files = None
+
+        os.makedirs(path, exist_ok=True)
+
+    def append(self, df):
+        if self._columns is None:
+            self._open(df)
+        elif list(df.columns) != [col["name"] for col in self._columns]:
+            raise ValueError("Chunk columns differ from the first chunk")
+
+        index = df.index.to_numpy().astype(self._index_dtype, copy=False)
+        index.tofile(self._files[INDEX_FILE])
+
+        for col in self._columns:
+            values = df[col["name"]].to_numpy().astype(col["dtype"], copy=False)
+            values.tofile(self._files[col["file"]])
+
+        self.length += len(df)
+
+    def close(self):
+        if self._files is None:
+            raise ValueError("Nothing was written to the column store")
+
+        for f in self._files.values():
+            f.close()
+
+        meta = {
+            "length": self.length,
+            "index": {"name": self._index_name, "dtype": self._index_dtype, "file": INDEX_FILE},
+            "columns": self._columns,
+        }
+
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    def _open(self, df):
+        index_dtype = df.index.to_numpy().dtype
+
+        for name, dtype in [("index", index_dtype)] + list(df.dtypes.items()):
+            if np.dtype(dtype).hasobject:
+                raise ValueError(f"Column '{name}' has an object dtype and cannot be stored")
+
+        self._index_name = df.index.name
+        self._index_dtype = np.dtype(index_dtype).str
+        self._columns = [
+            {"name": name, "dtype": np.dtype(dtype).str, "file": f"col_{i}.bin"}
+            for i, (name, dtype) in enumerate(df.dtypes.items())
+        ]
+
+        self._files = {
+            name: open(os.path.join(self.path, name), "wb")
+            for name in [INDEX_FILE] + [col["file"] for col in self._columns]
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._files is not None:
+            for f in self._files.values():
+                f.close()
+
+
+def _map(path, dtype, length):
+    if length == 0:
+        return np.empty(0, dtype=dtype)
+
+    return np.memmap(path, dtype=dtype, mode="r", shape=(length,))
+
+
+def open_column_store(path):
+    """DataFrame over read-only memory maps of a closed column store"""
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+
+    length = meta["length"]
+
+    index = pd.Index(
+        _map(os.path.join(path, meta["index"]["file"]), meta["index"]["dtype"], length),
+        name=meta["index"]["name"],
+        copy=False,
+    )
+
+    columns = {
+        col["name"]: _map(os.path.join(path, col["file"]), col["dtype"], length)
+        for col in meta["columns"]
+    }
+
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def write_column_store(df, path):
+    """
+    Persist a whole frame as a column store at path.
+
+    Written to a temporary directory and renamed into place, so readers
+    (or another process writing the same store) never see a partial one.
+    """
+    if os.path.exists(os.path.join(path, META_FILE)):
+        return path
+
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+
+    with ColumnStoreWriter(tmp_path) as writer:
+        writer.append(df)
+
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another writer got there first; its store has the same content
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    return path
+
+
+@lru_cache(maxsize=32)
+def _attach(path):
+    return open_column_store(path)
+
+
+class SharedFrame:
+    """
+    Picklable reference to a column store.
+
+    Only the path crosses the process boundary; frame() maps the store in
+    the receiving process (once per process) without copying the data.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def frame(self):
+        return _attach(self.path)
+
+
+def as_frame(source):
+    """DataFrame of a DataFrame or SharedFrame argument"""
+    if isinstance(source, SharedFrame):
+        return source.frame()
+
+    return source
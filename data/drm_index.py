@@ -0,0 +1,108 @@
+# data/drm_index.py
+import numpy as np
+import pandas as pd
+
+DRM_DATE_FORMAT = "%d.%m.%Y_%H:%M"
+
+
+def parse_drm_table(drm_df, sheet_name):
+    """
+    Vectorized parse of a whole DRM sheet into a tidy table.
+
+    Every cell like '28.09.2025_17:00, 30.09.2025_19:00' becomes one row
+    (pattern, primary, secondary, start, end). Cells that are not strings
+    or do not hold two valid dates are dropped, as before.
+    """
+    cells = drm_df.iloc[:, 2:].to_numpy(dtype=object)
+    n_cols = cells.shape[1]
+
+    # Row-major order, like iterating the filtered rows cell by cell
+    stacked = pd.Series(cells.ravel(), dtype=object)
+    primary = np.repeat(drm_df[sheet_name].to_numpy(dtype=object), n_cols)
+    secondary = np.repeat(drm_df.iloc[:, 1].to_numpy(dtype=object), n_cols)
+
+    # Exactly two comma-separated parts, surrounding whitespace ignored
+    parts = stacked.str.extract(r"^\s*([^,]*?)\s*,\s*([^,]*?)\s*$")
+
+    start = pd.to_datetime(parts[0], format=DRM_DATE_FORMAT, errors="coerce")
+    end = pd.to_datetime(parts[1], format=DRM_DATE_FORMAT, errors="coerce")
+
+    table = pd.DataFrame({
+        "pattern": sheet_name,
+        "primary": primary,
+        "secondary": secondary,
+        "start": start.to_numpy(dtype="datetime64[ns]"),
+        "end": end.to_numpy(dtype="datetime64[ns]"),
+    })
+
+    return table.dropna(subset=["start", "end"]).reset_index(drop=True)
+
+
+class DrmIndex:
+    """
+    All DRM periods of a workbook, indexed for fast lookups.
+
+    - periods(pattern, primary, secondary): O(1) group lookup
+    - containing(ts): periods whose [start, end] contains ts, O(log n + k)
+    """
+
+    def __init__(self, table):
+        # Group rows per combination, keeping the sheet order inside a group
+        table = table.sort_values(
+            ["pattern", "primary", "secondary"], kind="stable"
+        ).reset_index(drop=True)
+
+        # Compact columnar layout: categorical labels, datetime64 bounds
+        self.table = table.astype({
+            "pattern": "category",
+            "primary": "category",
+            "secondary": "category",
+        })
+
+        groups = self.table.groupby(
+            ["pattern", "primary", "secondary"], sort=False, observed=True
+        ).indices
+        self._groups = {
+            key: (positions[0], positions[-1] + 1) for key, positions in groups.items()
+        }
+
+        self.intervals = pd.IntervalIndex.from_arrays(
+            pd.DatetimeIndex(self.table["start"]).as_unit("ns"),
+            pd.DatetimeIndex(self.table["end"]).as_unit("ns"),
+            closed="both",
+        )
+
+    @classmethod
+    def from_sheets(cls, sheets):
+        """Index every pattern sheet of a workbook ({sheet_name: DataFrame})"""
+        tables = [
+            parse_drm_table(drm_df, sheet_name)
+            for sheet_name, drm_df in sheets.items()
+            if sheet_name in drm_df.columns and drm_df.shape[1] > 2
+        ]
+
+        if not tables:
+            return cls(pd.DataFrame({
+                "pattern": pd.Series(dtype=object),
+                "primary": pd.Series(dtype=object),
+                "secondary": pd.Series(dtype=object),
+                "start": pd.Series(dtype="datetime64[ns]"),
+                "end": pd.Series(dtype="datetime64[ns]"),
+            }))
+
+        return cls(pd.concat(tables, ignore_index=True))
+
+    def periods(self, pattern, primary_choice, secondary_choice):
+        """List of (start_ts, end_ts) tuples for one combination"""
+        lo, hi = self._groups.get((pattern, primary_choice, secondary_choice), (0, 0))
+
+        rows = self.table.iloc[lo:hi]
+
+        return list(zip(rows["start"], rows["end"]))
+
+    def containing(self, ts):
+        """Rows of the table whose period contains timestamp ts"""
+        target = pd.DatetimeIndex([pd.Timestamp(ts)]).as_unit("ns")
+        positions, _ = self.intervals.get_indexer_non_unique(target)
+
+        return self.table.iloc[np.sort(positions[positions >= 0])]
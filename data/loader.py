@@ -1,7 +1,13 @@
 # data/loader.py
+import importlib.util
+
 import pandas as pd
 from datetime import datetime
 
+from data.cache import file_digest, get_or_load
+from data.drm_index import DrmIndex
+from data.registry import registry
+
 def load_ohlc(file):
     if not file.name.lower().endswith(".csv"):
         raise ValueError("Invalid file format. Please upload a CSV file.")
@@ -14,45 +20,79 @@ def load_ohlc(file):
 
     return df.set_index("time").sort_index()
 
-def load_drm(file, sheet_name):
-    if not file.name.lower().endswith(".xlsx"):
-        raise ValueError("Invalid file format. Please upload a XLSX file.")
+def iter_ohlc_chunks(path, chunk_bars):
+    """
+    Read an OHLC CSV in chunks of chunk_bars rows, normalized as load_ohlc.
+
+    The file must already be in time order (chunks cannot be sorted
+    against each other). Price columns are read as float64 so every chunk
+    has the same dtypes.
+    """
+    if not str(path).lower().endswith(".csv"):
+        raise ValueError("Invalid file format. Please upload a CSV file.")
 
-    df = pd.read_excel(file, sheet_name=sheet_name)
-    df[sheet_name] = df[sheet_name].ffill().copy()
+    last_time = None
 
-    return df
+    for df in pd.read_csv(path, chunksize=chunk_bars):
+        df.columns = [c.lower().strip() for c in df.columns]
+        df["time"] = pd.to_datetime(df["time"])
+        df = df.dropna(subset=['high'])
 
+        df = df.set_index("time").astype("float64")
 
-def parse_drm_periods(drm_df_input, sheet_name, primary_choice, secondary_choice):
+        if df.empty:
+            continue
+
+        if not df.index.is_monotonic_increasing or (last_time is not None and df.index[0] < last_time):
+            raise ValueError("OHLC file is not sorted by time; use load_ohlc instead.")
+
+        last_time = df.index[-1]
+
+        yield df
+
+def load_ohlc_cached(file, digest=None):
     """
-    Converts DRM rows like:
-    '28.09.2025_17:00, 30.09.2025_19:00'
-    into a list of (start_ts, end_ts) tuples.
+    load_ohlc through the shared dataset registry.
+
+    Parsed once per file content. Returns a DatasetHandle: every session
+    uploading the same file holds a handle to one read-only copy.
     """
-    periods = []
+    digest = digest or file_digest(file)
 
-    drm_df = drm_df_input[(drm_df_input[sheet_name] == primary_choice) & (drm_df_input.iloc[:,1] == secondary_choice)].iloc[:,2:].values
+    return registry.acquire(("ohlc", digest), lambda: load_ohlc(file))
 
-    for row in drm_df.flatten():
-        if not isinstance(row, str):
-            continue
 
-        try:
-            start_str, end_str = [x.strip() for x in row.split(",")]
-
-            start_dt = pd.to_datetime(
-                start_str,
-                format="%d.%m.%Y_%H:%M"
-            )
-            end_dt = pd.to_datetime(
-                end_str,
-                format="%d.%m.%Y_%H:%M"
-            )
-
-            periods.append((start_dt, end_dt))
-        except Exception:
-            # Skip malformed rows silently
-            continue
+def load_drm(file):
+    """
+    Read every sheet of the DRM workbook in one pass.
+
+    Returns a {sheet_name: DataFrame} dict, one sheet per pattern.
+    Uses the calamine engine when python-calamine is installed.
+    """
+    if not file.name.lower().endswith(".xlsx"):
+        raise ValueError("Invalid file format. Please upload a XLSX file.")
+
+    engine = "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+
+    sheets = pd.read_excel(file, sheet_name=None, engine=engine)
+
+    for sheet_name, df in sheets.items():
+        if sheet_name in df.columns:
+            df[sheet_name] = df[sheet_name].ffill().copy()
+
+    return sheets
+
+
+def load_drm_index(file, digest=None):
+    """
+    DrmIndex over all sheets of the DRM workbook.
+
+    Parsed once per file content and shared through the upload cache,
+    so reruns and pattern switches never re-read the workbook.
+    """
+    return get_or_load(
+        "drm",
+        digest or file_digest(file),
+        lambda: DrmIndex.from_sheets(load_drm(file)),
+    )
 
-    return periods
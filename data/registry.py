@@ -0,0 +1,251 @@
+"""
+Process-wide registry of read-only datasets shared between sessions
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+from config.constants import DATASET_REGISTRY_MAX_BYTES, DATASET_MMAP_DIR
+from data.column_store import META_FILE, SharedFrame, open_column_store, write_column_store
+
+
+class _Entry:
+    """One dataset: a read-only buffer per column plus the index"""
+
+    def __init__(self, index, index_name, columns, path=None):
+        self.index = index
+        self.index_name = index_name
+        self.columns = columns
+        self.path = path
+        self.refcount = 0
+        self.nbytes = index.nbytes + sum(values.nbytes for values in columns.values())
+
+
+def _read_only(values):
+    values = np.ascontiguousarray(values)
+    values.flags.writeable = False
+    return values
+
+
+def _store_path(mmap_dir, key):
+    return os.path.join(mmap_dir, hashlib.sha256(repr(key).encode()).hexdigest())
+
+
+def _mapped_entry(path):
+    """Entry over the memory-mapped column store at path"""
+    df = open_column_store(path)
+
+    index = df.index.to_numpy()
+    columns = {col: df[col].to_numpy() for col in df.columns}
+
+    return _Entry(index, df.index.name, columns, path)
+
+
+def _load_entry(loader, mmap_dir, key):
+    if mmap_dir is not None:
+        path = _store_path(mmap_dir, key)
+
+        # Already written by another server process sharing mmap_dir
+        if os.path.exists(os.path.join(path, META_FILE)):
+            return _mapped_entry(path)
+
+    df = loader()
+
+    # Object columns cannot be mapped; such datasets stay in RAM
+    has_object = df.index.dtype == object or any(dtype == object for dtype in df.dtypes)
+
+    if mmap_dir is None or has_object:
+        index = _read_only(df.index.to_numpy())
+        columns = {col: _read_only(df[col].to_numpy()) for col in df.columns}
+
+        return _Entry(index, df.index.name, columns)
+
+    os.makedirs(mmap_dir, exist_ok=True)
+
+    return _mapped_entry(write_column_store(df, path))
+
+
+class DatasetHandle:
+    """
+    A session's reference to a registered dataset.
+
+    Keep the handle (e.g. in st.session_state) for as long as the data is
+    needed; dropping it releases the reference.
+    """
+
+    def __init__(self, registry, key, entry):
+        self.key = key
+        self._entry = entry
+        self._registry = registry
+        self._finalizer = weakref.finalize(self, registry._release, key)
+
+    def frame(self):
+        """Zero-copy DataFrame over the shared read-only buffers"""
+        entry = self._entry
+
+        index = pd.Index(entry.index, name=entry.index_name, copy=False)
+
+        return pd.DataFrame(entry.columns, index=index, copy=False)
+
+    def shared(self):
+        """SharedFrame of the dataset, for process-pool workers"""
+        return self._registry.share(self.key)
+
+    def release(self):
+        self._finalizer()
+
+
+class DatasetRegistry:
+    """
+    Reference-counted datasets keyed by content hash (or any hashable key).
+
+    Each dataset is stored once per server process however many sessions
+    use it. Datasets no session references are evicted least recently used
+    first when the total size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes, mmap_dir=None):
+        self.max_bytes = max_bytes
+        self.mmap_dir = mmap_dir
+
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._released = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, key, loader):
+        """
+        Return a handle to the dataset under key, calling loader() to build
+        the DataFrame on a miss. Concurrent misses on one key load once.
+        """
+        handle = self._retain(key)
+
+        if handle is not None:
+            return handle
+
+        with self._lock:
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            handle = self._retain(key)
+
+            if handle is None:
+                try:
+                    entry = _load_entry(loader, self.mmap_dir, key)
+
+                    with self._lock:
+                        self._entries[key] = entry
+                finally:
+                    with self._lock:
+                        self._loading.pop(key, None)
+
+                handle = self._retain(key)
+
+        with self._lock:
+            self._evict()
+
+        return handle
+
+    def share(self, key):
+        """
+        SharedFrame of a registered dataset. A dataset held in RAM is
+        written to a column store once (under mmap_dir, or the system
+        temporary directory) and removed with the dataset on eviction.
+        """
+        with self._lock:
+            entry = self._entries[key]
+
+        # The store may also have been removed by another server process
+        if entry.path is None or not os.path.exists(os.path.join(entry.path, META_FILE)):
+            spill_dir = self.mmap_dir or os.path.join(tempfile.gettempdir(), "datasets")
+            os.makedirs(spill_dir, exist_ok=True)
+
+            df = pd.DataFrame(
+                entry.columns,
+                index=pd.Index(entry.index, name=entry.index_name, copy=False),
+                copy=False,
+            )
+
+            # Concurrent writers of one store are safe (atomic rename)
+            path = write_column_store(df, _store_path(spill_dir, key))
+
+            with self._lock:
+                entry.path = path
+
+        return SharedFrame(entry.path)
+
+    def stats(self):
+        with self._lock:
+            self._apply_releases()
+
+            return {
+                "datasets": len(self._entries),
+                "referenced": sum(entry.refcount > 0 for entry in self._entries.values()),
+                "bytes": sum(entry.nbytes for entry in self._entries.values()),
+            }
+
+    def _retain(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            entry.refcount += 1
+            self._entries.move_to_end(key)
+
+        return DatasetHandle(self, key, entry)
+
+    def _release(self, key):
+        """
+        Handle finalizer. Garbage collection may run it on a thread that
+        already holds the lock, so it only queues the key; the queue is
+        applied now if the lock is free, else by its current holder.
+        """
+        self._released.append(key)
+
+        if self._lock.acquire(blocking=False):
+            try:
+                self._evict()
+            finally:
+                self._lock.release()
+
+    def _apply_releases(self):
+        """Drop the references of queued releases (caller holds the lock)"""
+        while self._released:
+            entry = self._entries.get(self._released.popleft())
+
+            if entry is not None:
+                entry.refcount -= 1
+
+    def _evict(self):
+        """Drop unreferenced datasets, oldest first (caller holds the lock)"""
+        self._apply_releases()
+
+        total = sum(entry.nbytes for entry in self._entries.values())
+
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+
+            entry = self._entries[key]
+
+            if entry.refcount > 0:
+                continue
+
+            del self._entries[key]
+            total -= entry.nbytes
+
+            # Live mappings stay valid after the files are unlinked
+            if entry.path is not None:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+registry = DatasetRegistry(DATASET_REGISTRY_MAX_BYTES, DATASET_MMAP_DIR)
@@ -0,0 +1,42 @@
+"""
+Higher-timeframe OHLC bars derived from a base-resolution upload
+"""
+from config.constants import TIMEFRAME_RULES, SESSION_OFFSET
+from data.registry import registry
+
+# Aggregation per column; any other column keeps its last value
+OHLC_AGG = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "latest": "last",
+    "volume": "sum",
+}
+
+
+def resample_ohlc(df, rule, offset=SESSION_OFFSET):
+    """
+    Resample OHLC bars to a coarser rule (e.g. "1h", "4h", "1D").
+
+    Bars are labelled by their open time and aligned to the session start
+    (offset from midnight). Periods without any base bar are dropped.
+    """
+    agg = {col: OHLC_AGG.get(col, "last") for col in df.columns}
+
+    out = df.resample(rule, label="left", closed="left", offset=offset).agg(agg)
+
+    return out.dropna(subset=["high"])
+
+
+def derive_timeframe(source, timeframe):
+    """
+    Bars of the given timeframe ("1H", "4H", "1D") built from a registered
+    base dataset (a DatasetHandle, e.g. the 15m upload).
+
+    Cached in the dataset registry per base-file hash and timeframe, so
+    every session using the same file shares one resampled copy.
+    """
+    rule = TIMEFRAME_RULES[timeframe]
+    key = ("resample", source.key, rule, SESSION_OFFSET)
+
+    return registry.acquire(key, lambda: resample_ohlc(source.frame(), rule))
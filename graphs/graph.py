@@ -338,46 +338,99 @@ def build_main_chart(
     return fig
 
 
-def render_charts(
-    df_slice_1h,
-    df_slice_15m,
-    start_1h,
-    end_1h,
-    start_15m,
-    end_15m,
-    show_ichimoku,
-    show_bb,
-    show_kc,
-    show_strategy,
-):
+def render_charts(fig_1h, fig_15m):
     """
     Renders the 1H and 15m charts side by side.
+
+    Figures are built beforehand with build_main_chart, so both
+    timeframes can be prepared concurrently off the script thread.
     """
 
     col_left, col_right = st.columns([1, 1], gap="small")
 
     with col_left:
         st.subheader("1H Chart")
-        fig_1h = build_main_chart(
-            df_slice=df_slice_1h,
-            period_start=start_1h,
-            period_end=end_1h,
-            show_ichimoku=show_ichimoku,
-            show_bb=show_bb,
-            show_kc=show_kc,
-            show_strategy = show_strategy,
-        )
         st.plotly_chart(fig_1h, use_container_width=True)
 
     with col_right:
         st.subheader("15m Chart")
-        fig_15m = build_main_chart(
-            df_slice=df_slice_15m,
-            period_start=start_15m,
-            period_end=end_15m,
-            show_ichimoku=show_ichimoku,
-            show_bb=show_bb,
-            show_kc=show_kc,
-            show_strategy = show_strategy,
-        )
         st.plotly_chart(fig_15m, use_container_width=True)
+
+
+def build_wave_heatmap(matrix, title, colorbar_title):
+    """
+    Heatmap of a primary x secondary matrix (see strategies.wave_matrix).
+
+    Combinations that do not exist (NaN) are left blank.
+    """
+    text = matrix.map(lambda v: "" if v != v else f"{v:.1f}")
+
+    fig = go.Figure(
+        go.Heatmap(
+            z=matrix.to_numpy(),
+            x=list(matrix.columns),
+            y=list(matrix.index),
+            text=text.to_numpy(),
+            texttemplate="%{text}",
+            colorscale="RdYlGn",
+            colorbar=dict(title=colorbar_title),
+            hoverongaps=False,
+        )
+    )
+
+    fig.update_layout(
+        title=title,
+        height=500,
+        yaxis=dict(autorange="reversed"),
+        margin=dict(l=10, r=10, t=50, b=10),
+    )
+
+    return fig
+
+
+def build_event_study_chart(offsets, bands, title, y_title):
+    """
+    Mean and quantile bands of one series around period anchors (see
+    indicators.event_study.event_bands, sliced to one column).
+
+    bands: {"mean": (offsets,), "quantiles": {q: (offsets,)}}
+    """
+    fig = go.Figure()
+    quantiles = sorted(bands["quantiles"])
+
+    # Outer to inner quantile pairs as filled bands
+    for k in range(len(quantiles) // 2):
+        lo, hi = quantiles[k], quantiles[-1 - k]
+
+        fig.add_trace(go.Scatter(
+            x=offsets, y=bands["quantiles"][hi],
+            mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip",
+        ))
+        fig.add_trace(go.Scatter(
+            x=offsets, y=bands["quantiles"][lo],
+            mode="lines", line=dict(width=0), fill="tonexty",
+            fillcolor=f"rgba(31, 119, 180, {0.15 + 0.15 * k:.2f})",
+            name=f"{lo:.0%}-{hi:.0%}",
+        ))
+
+    if 0.5 in bands["quantiles"]:
+        fig.add_trace(go.Scatter(
+            x=offsets, y=bands["quantiles"][0.5],
+            mode="lines", line=dict(color="rgb(31, 119, 180)", dash="dot"), name="Median",
+        ))
+
+    fig.add_trace(go.Scatter(
+        x=offsets, y=bands["mean"], mode="lines", line=dict(color="black", width=2), name="Mean",
+    ))
+
+    fig.add_vline(x=0, line_dash="dash", line_color="black", line_width=1)
+
+    fig.update_layout(
+        title=title,
+        height=400,
+        xaxis_title="Bars from anchor",
+        yaxis_title=y_title,
+        margin=dict(l=10, r=10, t=50, b=10),
+    )
+
+    return fig
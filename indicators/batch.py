@@ -0,0 +1,82 @@
+"""
+Multi-parameter indicator variants for parameter sweeps
+
+Each function computes one indicator for many parameter sets at once and
+returns 2D arrays (bars x parameter sets), sharing the intermediates
+(one diff, one true range, one set of prefix sums) between all of them.
+Column order follows itertools.product of the parameter lists.
+"""
+from itertools import product
+
+import numpy as np
+
+from indicators.kernels import HAS_NUMBA, ewm_multi, rsi_multi_fused, wilder_com, span_com
+from indicators.rolling import rolling_moments
+
+
+def rsi_multi(close, windows):
+    """
+    Wilder's RSI for every window in windows.
+
+    Column j equals rsi(close, windows[j]).
+    """
+    if HAS_NUMBA:
+        # Gains, losses and ratios never materialise as full arrays
+        return rsi_multi_fused(close, windows)
+
+    close = np.asarray(close, dtype=np.float64)
+
+    # One diff for every window
+    delta = np.concatenate(([np.nan], np.diff(close)))
+
+    gain = np.clip(delta, 0, None)
+    loss = -np.clip(delta, None, 0)
+
+    coms = [wilder_com(w) for w in windows]
+    avg_gain = ewm_multi(gain, coms)
+    avg_loss = ewm_multi(loss, coms)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def bollinger_multi(price, periods, stdevs):
+    """
+    Bollinger Bands for every (period, stdev) in product(periods, stdevs).
+
+    Returns:
+    - bb_mid, bb_upper, bb_lower : (bars x sets) arrays
+    """
+    mean, std = rolling_moments(price, periods)
+
+    sets = list(product(range(len(periods)), stdevs))
+    mid = mean[:, [p for p, _ in sets]]
+    dev = std[:, [p for p, _ in sets]] * np.array([s for _, s in sets])
+
+    return mid, mid + dev, mid - dev
+
+
+def keltner_multi(high, low, close, ema_periods, atr_periods, atr_mults):
+    """
+    Keltner Channel for every (ema_period, atr_period, atr_mult) in
+    product(ema_periods, atr_periods, atr_mults).
+
+    Returns:
+    - kc_mid, kc_upper, kc_lower : (bars x sets) arrays
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+
+    # One true range for every ATR period (NaN-skipping max, like pandas)
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+    ema = ewm_multi(close, [span_com(p) for p in ema_periods])
+    atr = ewm_multi(tr, [wilder_com(p) for p in atr_periods])
+
+    sets = list(product(range(len(ema_periods)), range(len(atr_periods)), atr_mults))
+    mid = ema[:, [e for e, _, _ in sets]]
+    band = atr[:, [a for _, a, _ in sets]] * np.array([m for _, _, m in sets])
+
+    return mid, mid + band, mid - band
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from indicators.rolling import rolling_moments
+
 
 def bollinger_bands(
     price: pd.Series,
@@ -15,8 +17,10 @@ def bollinger_bands(
     - bb_lower : mid - stdev * std
     """
 
-    bb_mid = price.rolling(period).mean()
-    bb_std = price.rolling(period).std()
+    # Compensated prefix sums, as accurate as price.rolling(period)
+    mean, std = rolling_moments(price, [period])
+    bb_mid = pd.Series(mean[:, 0], index=price.index)
+    bb_std = pd.Series(std[:, 0], index=price.index)
 
     bb_upper = bb_mid + stdev * bb_std
     bb_lower = bb_mid - stdev * bb_std
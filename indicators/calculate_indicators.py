@@ -1,10 +1,15 @@
 import pandas as pd
 
 from indicators.rsi import rsi
-from indicators.cmb import cmb_composite
+from indicators.cmb import cmb_composite, cmb_from_rsi
 from indicators.ichimoku import ichimoku
 from indicators.bollinger import bollinger_bands
 from indicators.keltner import keltner_channel
+from indicators.kernels import HAS_NUMBA, fused_smoothings
+
+# RSI windows of the CMB Composite (cmb_composite defaults)
+CMB_RSI_LONG = 14
+CMB_RSI_SHORT = 3
 
 
 def calculate_indicators(
@@ -15,25 +20,51 @@ def calculate_indicators(
     kc_ema_period: int,
     kc_atr_period: int,
     kc_atr_mult: float,
+    smoothings: dict = None,
 ) -> pd.DataFrame:
     """
     Calculate all indicators on full data, then slice and clean.
 
+    smoothings: fused_smoothings output already computed for df's rows
+    (the chunked path carries it across chunks); computed here if None.
+
     Returns:
         all features created
     """
 
     df = df.copy()
 
+    smooth = smoothings
+
+    if smooth is None and HAS_NUMBA:
+        # One pass for every RSI / EMA / ATR smoothing
+        smooth = fused_smoothings(
+            df["latest"],
+            df["high"],
+            df["low"],
+            rsi_windows=(rsi_window, CMB_RSI_LONG, CMB_RSI_SHORT),
+            ema_span=kc_ema_period,
+            atr_period=kc_atr_period,
+        )
+
     # -------------------------------------------------
     # RSI
     # -------------------------------------------------
-    df["rsi"] = rsi(df["latest"], rsi_window)
+    if smooth is not None:
+        df["rsi"] = smooth["rsi"][rsi_window]
+    else:
+        df["rsi"] = rsi(df["latest"], rsi_window)
 
     # -------------------------------------------------
     # CMB Composite
     # -------------------------------------------------
-    ci, ci_13, ci_33 = cmb_composite(df["latest"])
+    if smooth is not None:
+        ci, ci_13, ci_33 = cmb_from_rsi(
+            pd.Series(smooth["rsi"][CMB_RSI_LONG], index=df.index),
+            pd.Series(smooth["rsi"][CMB_RSI_SHORT], index=df.index),
+        )
+    else:
+        ci, ci_13, ci_33 = cmb_composite(df["latest"])
     df["ci"] = ci
     df["ci_13"] = ci_13
     df["ci_33"] = ci_33
@@ -64,18 +95,23 @@ def calculate_indicators(
     # -------------------------------------------------
     # Keltner Channel
     # -------------------------------------------------
-    (
-        df["kc_mid"],
-        df["kc_upper"],
-        df["kc_lower"],
-    ) = keltner_channel(
-        df["high"],
-        df["low"],
-        df["latest"],
-        ema_period=kc_ema_period,
-        atr_period=kc_atr_period,
-        atr_mult=kc_atr_mult,
-    )
+    if smooth is not None:
+        df["kc_mid"] = smooth["ema"]
+        df["kc_upper"] = smooth["ema"] + kc_atr_mult * smooth["atr"]
+        df["kc_lower"] = smooth["ema"] - kc_atr_mult * smooth["atr"]
+    else:
+        (
+            df["kc_mid"],
+            df["kc_upper"],
+            df["kc_lower"],
+        ) = keltner_channel(
+            df["high"],
+            df["low"],
+            df["latest"],
+            ema_period=kc_ema_period,
+            atr_period=kc_atr_period,
+            atr_mult=kc_atr_mult,
+        )
 
     return df
 
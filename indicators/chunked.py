@@ -0,0 +1,128 @@
+"""
+Out-of-core indicator computation
+
+Feeds an OHLC history chunk by chunk through calculate_indicators and
+writes the result to an on-disk column store, so peak memory follows the
+chunk size rather than the history length.
+
+State carried across chunk boundaries:
+- the RSI / EMA / ATR smoothing state (fused_smoothings)
+- a tail of recent bars, enough for every rolling window and the Ichimoku
+  displacement; the tail starts on a rolling-sum block boundary so the
+  Bollinger / CMB prefix sums see the same blocks as on the full history
+
+The output is identical to calculate_indicators on the whole frame.
+"""
+import numpy as np
+import pandas as pd
+
+from config.constants import INDICATOR_CHUNK_BARS
+from data.column_store import ColumnStoreWriter, open_column_store
+from data.loader import iter_ohlc_chunks
+from indicators.calculate_indicators import calculate_indicators, CMB_RSI_LONG, CMB_RSI_SHORT
+from indicators.kernels import fused_smoothings
+from indicators.rolling import block_size
+
+# Bars behind a bar that its indicators read (calculate_indicators defaults)
+ICHIMOKU_LOOKBACK = 52 + 26     # senkou_b_len + displacement
+CMB_LOOKBACK = 9 + 3 + 33       # mom_len + rsi3_sma + ci_sma_slow
+CMB_MAX_WINDOW = 33
+
+
+class ChunkedIndicators:
+    """
+    calculate_indicators over consecutive chunks of one history.
+
+    Parameters are those of calculate_indicators. Chunks must be passed in
+    time order; update() returns the feature rows of each chunk.
+    """
+
+    def __init__(self, rsi_window, bb_period, bb_stdev, kc_ema_period, kc_atr_period, kc_atr_mult):
+        self.params = {
+            "rsi_window": rsi_window,
+            "bb_period": bb_period,
+            "bb_stdev": bb_stdev,
+            "kc_ema_period": kc_ema_period,
+            "kc_atr_period": kc_atr_period,
+            "kc_atr_mult": kc_atr_mult,
+        }
+        self.rsi_windows = (rsi_window, CMB_RSI_LONG, CMB_RSI_SHORT)
+
+        self.lookback = max(ICHIMOKU_LOOKBACK, CMB_LOOKBACK, bb_period)
+        self.align = block_size(max(bb_period, CMB_MAX_WINDOW))
+
+        self._state = None
+        self._position = 0
+
+        # Last bars of the previous chunks and their smoothings
+        self._tail = None
+        self._tail_smooth = None
+        self._tail_start = 0
+
+    def update(self, chunk):
+        smooth = fused_smoothings(
+            chunk["latest"],
+            chunk["high"],
+            chunk["low"],
+            rsi_windows=self.rsi_windows,
+            ema_span=self.params["kc_ema_period"],
+            atr_period=self.params["kc_atr_period"],
+            state=self._state,
+        )
+        self._state = smooth["state"]
+
+        if self._tail is not None:
+            chunk_ext = pd.concat([self._tail, chunk])
+            smooth = {
+                "rsi": {w: np.concatenate((self._tail_smooth["rsi"][w], smooth["rsi"][w])) for w in smooth["rsi"]},
+                "ema": np.concatenate((self._tail_smooth["ema"], smooth["ema"])),
+                "atr": np.concatenate((self._tail_smooth["atr"], smooth["atr"])),
+            }
+        else:
+            chunk_ext = chunk
+
+        features = calculate_indicators(chunk_ext, **self.params, smoothings=smooth)
+        features = features.iloc[len(chunk_ext) - len(chunk):]
+
+        self._position += len(chunk)
+        self._keep_tail(chunk_ext, smooth)
+
+        return features
+
+    def _keep_tail(self, chunk_ext, smooth):
+        # One spare block in front: derived series (CMB momentum, SMAs) are
+        # incomplete there, and no window of a later bar reaches into it
+        start = (self._position - self.lookback) // self.align * self.align - self.align
+        start = max(start, self._tail_start)
+
+        offset = start - self._tail_start
+
+        # Copies, so the tail does not pin the whole chunk in memory
+        self._tail = chunk_ext.iloc[offset:].copy()
+        self._tail_smooth = {
+            "rsi": {w: values[offset:].copy() for w, values in smooth["rsi"].items()},
+            "ema": smooth["ema"][offset:].copy(),
+            "atr": smooth["atr"][offset:].copy(),
+        }
+        self._tail_start = start
+
+
+def calculate_indicators_chunked(chunks, path, **params):
+    """
+    Indicators of a history given as an iterable of OHLC chunks (e.g.
+    iter_ohlc_chunks), written to a column store at path.
+
+    Returns the features as a DataFrame over read-only memory maps.
+    """
+    indicators = ChunkedIndicators(**params)
+
+    with ColumnStoreWriter(path) as writer:
+        for chunk in chunks:
+            writer.append(indicators.update(chunk))
+
+    return open_column_store(path)
+
+
+def calculate_indicators_file(csv_path, path, chunk_bars=INDICATOR_CHUNK_BARS, **params):
+    """calculate_indicators_chunked over an OHLC CSV read chunk_bars rows at a time"""
+    return calculate_indicators_chunked(iter_ohlc_chunks(csv_path, chunk_bars), path, **params)
@@ -1,5 +1,6 @@
 import pandas as pd
 from indicators.rsi import rsi
+from indicators.rolling import rolling_means
 
 def cmb_composite(
     close: pd.Series,
@@ -25,6 +26,31 @@ def cmb_composite(
     rsi14 = rsi(close, rsi_long)
     rsi3 = rsi(close, rsi_short)
 
+    return cmb_from_rsi(
+        rsi14,
+        rsi3,
+        mom_len=mom_len,
+        rsi3_sma=rsi3_sma,
+        ci_sma_fast=ci_sma_fast,
+        ci_sma_slow=ci_sma_slow,
+    )
+
+
+def cmb_from_rsi(
+    rsi14: pd.Series,
+    rsi3: pd.Series,
+    mom_len: int = 9,
+    rsi3_sma: int = 3,
+    ci_sma_fast: int = 13,
+    ci_sma_slow: int = 33,
+):
+    """
+    CMB Composite from already computed long and short RSI series
+    (e.g. from the fused smoothing kernel).
+
+    Returns ci, ci_fast, ci_slow as cmb_composite does.
+    """
+
     # -------------------------------------------------
     # Momentum(9) of RSI(14)
     # -------------------------------------------------
@@ -33,7 +59,7 @@ def cmb_composite(
     # -------------------------------------------------
     # SMA(3) of RSI(3)
     # -------------------------------------------------
-    rsi3_sma3 = rsi3.rolling(rsi3_sma).mean()
+    rsi3_sma3 = pd.Series(rolling_means(rsi3, [rsi3_sma])[:, 0], index=rsi3.index)
 
     # -------------------------------------------------
     # Composite Index
@@ -43,7 +69,9 @@ def cmb_composite(
     # -------------------------------------------------
     # Signal lines
     # -------------------------------------------------
-    ci_fast = ci.rolling(ci_sma_fast).mean()
-    ci_slow = ci.rolling(ci_sma_slow).mean()
+    # Both SMAs from one set of prefix sums
+    signal = rolling_means(ci, [ci_sma_fast, ci_sma_slow])
+    ci_fast = pd.Series(signal[:, 0], index=ci.index)
+    ci_slow = pd.Series(signal[:, 1], index=ci.index)
 
     return ci, ci_fast, ci_slow
@@ -0,0 +1,162 @@
+"""
+Event study of indicators around DRM period boundaries
+
+All periods of a wave type are aligned on their start (or end) bar and
+stacked into one (period x bar offset x indicator) array with a single
+fancy-indexing gather; bars outside the data are NaN. Mean and quantile
+bands over periods are then plain reductions along the first axis.
+"""
+import numpy as np
+import pandas as pd
+
+from config.constants import INDICATOR_MAP
+
+# Event study series (columns of INDICATOR_MAP)
+EVENT_STUDY_COLUMNS = {
+    element: INDICATOR_MAP[element]
+    for element in (
+        "Price",
+        "RSI",
+        "CMB",
+        "CMB 13 SMA",
+        "CMB 33 SMA",
+        "BB Upper Band",
+        "BB Middle Band",
+        "BB Lower Band",
+        "KC Upper Band",
+        "KC Middle Band",
+        "KC Lower Band",
+    )
+}
+
+# Columns on the price scale: shown relative to the anchor bar's price
+PRICE_COLUMNS = {"latest", "bb_upper", "bb_mid", "bb_lower", "kc_upper", "kc_mid", "kc_lower"}
+
+
+def anchor_positions(index, periods, anchor="start"):
+    """
+    Bar position of each period's anchor (-1 where no bar of the data
+    lies within the period).
+
+    anchor="start": first bar at or after the period start
+    anchor="end": last bar at or before the period end
+    """
+    starts = pd.DatetimeIndex([period[0] for period in periods]).as_unit("ns").asi8
+    ends = pd.DatetimeIndex([period[1] for period in periods]).as_unit("ns").asi8
+    bars = pd.DatetimeIndex(index).as_unit("ns").asi8
+
+    # Bars [first, last) lie within each period
+    first = np.searchsorted(bars, starts, side="left")
+    last = np.searchsorted(bars, ends, side="right")
+
+    positions = first if anchor == "start" else last - 1
+
+    return np.where(first < last, positions, -1)
+
+
+def event_tensor(df, periods, columns, before=50, after=100, anchor="start", relative=True):
+    """
+    Indicators around each period's anchor bar.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Full indicator frame of one timeframe
+    periods : list
+        (start, end) timestamps
+    columns : list
+        Indicator columns (see EVENT_STUDY_COLUMNS)
+    before, after : int
+        Bars kept before / after the anchor
+    anchor : str
+        "start" or "end"
+    relative : bool
+        Price-scale columns as % change from the anchor bar's price
+
+    Returns
+    -------
+    tensor : np.ndarray
+        (periods, before + after + 1, columns), NaN outside the data
+    offsets : np.ndarray
+        Bar offset of each step (anchor = 0)
+    """
+    offsets = np.arange(-before, after + 1)
+    anchors = anchor_positions(df.index, periods, anchor)
+
+    values = df[list(columns)].to_numpy(dtype=np.float64)
+    n = len(values)
+
+    if n == 0:
+        return np.full((len(periods), len(offsets), len(columns)), np.nan), offsets
+
+    # (periods, offsets) bar positions -> one gather for every period
+    positions = anchors[:, None] + offsets[None, :]
+    valid = (anchors[:, None] >= 0) & (positions >= 0) & (positions < n)
+
+    tensor = values[np.clip(positions, 0, n - 1)]
+    tensor[~valid] = np.nan
+
+    if relative:
+        price = df["latest"].to_numpy(dtype=np.float64)
+        base = np.where(anchors >= 0, price[np.clip(anchors, 0, n - 1)], np.nan)
+
+        for k, column in enumerate(columns):
+            if column in PRICE_COLUMNS:
+                tensor[:, :, k] = (tensor[:, :, k] / base[:, None] - 1) * 100
+
+    return tensor, offsets
+
+
+def event_bands(tensor, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9)):
+    """
+    Mean and quantile bands over periods.
+
+    Returns
+    -------
+    dict
+        "mean": (offsets, columns), "quantiles": {q: (offsets, columns)},
+        "count": periods with data at each (offset, column)
+    """
+    count = np.sum(~np.isnan(tensor), axis=0)
+
+    with np.errstate(invalid="ignore"):
+        total = np.nansum(tensor, axis=0)
+        mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+    bands = nan_quantiles(tensor, quantiles, count)
+
+    return {
+        "mean": mean,
+        "quantiles": dict(zip(quantiles, bands)),
+        "count": count,
+    }
+
+
+def nan_quantiles(tensor, quantiles, count=None):
+    """
+    Quantiles over axis 0 ignoring NaN (linear interpolation, as
+    np.nanquantile) from one sort: NaNs sort last, so the k valid values
+    of each cell are its first k.
+    """
+    if count is None:
+        count = np.sum(~np.isnan(tensor), axis=0)
+
+    if tensor.shape[0] == 0:
+        return np.full((len(quantiles),) + tensor.shape[1:], np.nan)
+
+    ordered = np.sort(tensor, axis=0)
+    last = np.maximum(count - 1, 0)
+
+    bands = []
+    for q in quantiles:
+        rank = q * last
+        lo = np.floor(rank).astype(np.int64)
+        hi = np.minimum(lo + 1, last)
+
+        below = np.take_along_axis(ordered, lo[None], axis=0)[0]
+        above = np.take_along_axis(ordered, hi[None], axis=0)[0]
+
+        band = below + (above - below) * (rank - lo)
+        bands.append(np.where(count > 0, band, np.nan))
+
+    return np.array(bands)
@@ -0,0 +1,298 @@
+"""
+Incremental (bar by bar) versions of the indicators
+
+Each indicator keeps just the state it needs to produce its next value
+from the next bar: a smoothed value for the Wilder / EMA smoothings,
+running sums for the rolling means and deviations, monotonic deques for
+the rolling highs and lows, and short ring buffers for the shifted
+series. Every update is O(1) (amortized for the deques and for the
+periodic re-summation that keeps the running sums exact), so a live or
+replayed feed never recomputes calculate_indicators from scratch.
+
+The values match calculate_indicators on the same history.
+"""
+import math
+from collections import deque
+
+from indicators.calculate_indicators import CMB_RSI_LONG, CMB_RSI_SHORT
+
+NAN = float("nan")
+
+# Columns produced by IncrementalIndicators.update, in order
+INCREMENTAL_COLUMNS = [
+    "rsi",
+    "ci",
+    "ci_13",
+    "ci_33",
+    "tenkan",
+    "kijun",
+    "senkou_a",
+    "senkou_b",
+    "bb_mid",
+    "bb_upper",
+    "bb_lower",
+    "kc_mid",
+    "kc_upper",
+    "kc_lower",
+]
+
+
+class Ewm:
+    """Exponential smoothing as pandas ewm(alpha, adjust=False): starts at the first value"""
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.value = NAN
+
+    def update(self, x):
+        if x != x:
+            return self.value
+
+        if self.value != self.value:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+
+        return self.value
+
+
+class Lag:
+    """The value `bars` updates ago (NaN until there is one)"""
+
+    __slots__ = ("_values",)
+
+    def __init__(self, bars):
+        self._values = deque(maxlen=bars + 1)
+
+    def update(self, x):
+        self._values.append(x)
+        return self._values[0] if len(self._values) == self._values.maxlen else NAN
+
+
+class RollingMoments:
+    """
+    Rolling mean and sample standard deviation over `window` values.
+
+    As rolling(window).mean() / .std(): NaN until the window is full or
+    while it holds a NaN. The sums are taken around a reference value and
+    re-summed exactly once per window of updates, which keeps them as
+    accurate as a fresh sum at O(1) amortized cost.
+    """
+
+    __slots__ = ("window", "_values", "_nans", "_ref", "_s1", "_s2", "_since_resync")
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._nans = 0
+        self._ref = 0.0
+        self._s1 = 0.0
+        self._s2 = 0.0
+        self._since_resync = 0
+
+    def update(self, x):
+        values = self._values
+
+        if x != x:
+            self._nans += 1
+        else:
+            d = x - self._ref
+            self._s1 += d
+            self._s2 += d * d
+
+        values.append(x)
+
+        if len(values) > self.window:
+            old = values.popleft()
+
+            if old != old:
+                self._nans -= 1
+            else:
+                d = old - self._ref
+                self._s1 -= d
+                self._s2 -= d * d
+
+        self._since_resync += 1
+
+        if self._since_resync >= self.window and self._nans == 0:
+            self._resync()
+
+    def _resync(self):
+        values = self._values
+        self._ref = math.fsum(values) / len(values)
+        self._s1 = math.fsum(v - self._ref for v in values)
+        self._s2 = math.fsum((v - self._ref) ** 2 for v in values)
+        self._since_resync = 0
+
+    def full(self):
+        return len(self._values) == self.window and self._nans == 0
+
+    def mean(self):
+        if not self.full():
+            return NAN
+        return self._ref + self._s1 / self.window
+
+    def std(self):
+        if not self.full() or self.window < 2:
+            return NAN
+
+        n = self.window
+        return math.sqrt(max((self._s2 - self._s1 * self._s1 / n) / (n - 1), 0.0))
+
+
+class RollingExtreme:
+    """Rolling max (or min) over `window` values, NaN until the window is full"""
+
+    __slots__ = ("window", "_sign", "_deque", "_count")
+
+    def __init__(self, window, maximum=True):
+        self.window = window
+        self._sign = 1.0 if maximum else -1.0
+        self._deque = deque()
+        self._count = 0
+
+    def update(self, x):
+        # Monotonic deque of (position, signed value), best first
+        position = self._count
+        value = self._sign * x
+        entries = self._deque
+
+        while entries and entries[-1][1] <= value:
+            entries.pop()
+        entries.append((position, value))
+
+        if entries[0][0] <= position - self.window:
+            entries.popleft()
+
+        self._count += 1
+
+        if self._count < self.window:
+            return NAN
+
+        return self._sign * entries[0][1]
+
+
+class WilderRsi:
+    """RSI as indicators.rsi.rsi: Wilder smoothing of gains and losses"""
+
+    __slots__ = ("_prev", "_gain", "_loss")
+
+    def __init__(self, window):
+        self._prev = NAN
+        self._gain = Ewm(1 / window)
+        self._loss = Ewm(1 / window)
+
+    def update(self, close):
+        delta = close - self._prev
+        self._prev = close
+
+        if delta != delta:
+            return NAN
+
+        gain = self._gain.update(max(delta, 0.0))
+        loss = self._loss.update(max(-delta, 0.0))
+
+        if loss == 0:
+            return 100.0 if gain > 0 else NAN
+
+        return 100 - 100 / (1 + gain / loss)
+
+
+class IncrementalIndicators:
+    """
+    calculate_indicators, one bar at a time.
+
+    Parameters are those of calculate_indicators. update() takes the next
+    bar and returns its indicator values as a dict (INCREMENTAL_COLUMNS).
+    """
+
+    def __init__(self, rsi_window, bb_period, bb_stdev, kc_ema_period, kc_atr_period, kc_atr_mult,
+                 tenkan_len=9, kijun_len=26, senkou_b_len=52, displacement=26):
+        self.bb_stdev = bb_stdev
+        self.kc_atr_mult = kc_atr_mult
+
+        # RSI and CMB Composite (cmb_composite defaults)
+        self.rsi = WilderRsi(rsi_window)
+        self.rsi_long = WilderRsi(CMB_RSI_LONG)
+        self.rsi_short = WilderRsi(CMB_RSI_SHORT)
+        self.rsi_long_lag = Lag(9)
+        self.rsi_short_sma = RollingMoments(3)
+        self.ci_fast = RollingMoments(13)
+        self.ci_slow = RollingMoments(33)
+
+        # Ichimoku
+        self.tenkan_high = RollingExtreme(tenkan_len)
+        self.tenkan_low = RollingExtreme(tenkan_len, maximum=False)
+        self.kijun_high = RollingExtreme(kijun_len)
+        self.kijun_low = RollingExtreme(kijun_len, maximum=False)
+        self.senkou_high = RollingExtreme(senkou_b_len)
+        self.senkou_low = RollingExtreme(senkou_b_len, maximum=False)
+        self.senkou_a_lag = Lag(displacement)
+        self.senkou_b_lag = Lag(displacement)
+
+        # Bollinger Bands
+        self.bb = RollingMoments(bb_period)
+
+        # Keltner Channel
+        self.kc_ema = Ewm(2 / (kc_ema_period + 1))
+        self.kc_atr = Ewm(1 / kc_atr_period)
+        self._prev_close = NAN
+
+    def update(self, high, low, close):
+        # -------------------------------------------------
+        # RSI / CMB Composite
+        # -------------------------------------------------
+        rsi = self.rsi.update(close)
+        rsi_long = self.rsi_long.update(close)
+
+        self.rsi_short_sma.update(self.rsi_short.update(close))
+        ci = (rsi_long - self.rsi_long_lag.update(rsi_long)) + self.rsi_short_sma.mean()
+
+        self.ci_fast.update(ci)
+        self.ci_slow.update(ci)
+
+        # -------------------------------------------------
+        # Ichimoku
+        # -------------------------------------------------
+        tenkan = (self.tenkan_high.update(high) + self.tenkan_low.update(low)) / 2
+        kijun = (self.kijun_high.update(high) + self.kijun_low.update(low)) / 2
+        senkou_b = (self.senkou_high.update(high) + self.senkou_low.update(low)) / 2
+
+        # -------------------------------------------------
+        # Bollinger Bands
+        # -------------------------------------------------
+        self.bb.update(close)
+        bb_mid = self.bb.mean()
+        bb_std = self.bb.std()
+
+        # -------------------------------------------------
+        # Keltner Channel
+        # -------------------------------------------------
+        prev_close = self._prev_close
+        self._prev_close = close
+
+        true_range = high - low
+        if prev_close == prev_close:
+            true_range = max(true_range, abs(high - prev_close), abs(low - prev_close))
+
+        kc_mid = self.kc_ema.update(close)
+        atr = self.kc_atr.update(true_range)
+
+        return {
+            "rsi": rsi,
+            "ci": ci,
+            "ci_13": self.ci_fast.mean(),
+            "ci_33": self.ci_slow.mean(),
+            "tenkan": tenkan,
+            "kijun": kijun,
+            "senkou_a": self.senkou_a_lag.update((tenkan + kijun) / 2),
+            "senkou_b": self.senkou_b_lag.update(senkou_b),
+            "bb_mid": bb_mid,
+            "bb_upper": bb_mid + self.bb_stdev * bb_std,
+            "bb_lower": bb_mid - self.bb_stdev * bb_std,
+            "kc_mid": kc_mid,
+            "kc_upper": kc_mid + self.kc_atr_mult * atr,
+            "kc_lower": kc_mid - self.kc_atr_mult * atr,
+        }
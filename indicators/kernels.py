@@ -0,0 +1,271 @@
+"""
+Fused single-pass smoothing kernel for RSI, CMB and Keltner
+
+Every EWM the indicator set needs (Wilder RSI gains/losses for several
+windows, the Keltner EMA and the Wilder ATR) is advanced in one loop over
+the price arrays, with no intermediate Series. Each step reproduces
+pandas' ewm(adjust=False).mean() exactly, so results match bit for bit.
+
+Needs numba for speed; without it HAS_NUMBA is False and callers keep
+the pandas implementations (ewm_multi falls back to pandas itself).
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+
+    HAS_NUMBA = True
+except ImportError:  # optional dependency
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        def decorator(fn):
+            return fn
+        return decorator
+
+
+# EWM state columns (one row per smoothed series)
+_WEIGHTED, _OLD_WT, _NOBS = 0, 1, 2
+
+
+def wilder_com(window):
+    """Center of mass of ewm(alpha=1 / window), as pandas derives it"""
+    alpha = 1 / window
+    return (1 - alpha) / alpha
+
+
+def span_com(span):
+    """Center of mass of ewm(span=span), as pandas derives it"""
+    return (span - 1) / 2
+
+
+def com_alpha(com):
+    """Smoothing factor pandas' ewm kernel uses for a center of mass"""
+    return 1.0 / (1.0 + com)
+
+
+@njit(inline="always")
+def _ewm_step(state, row, cur, alpha):
+    """One ewm(adjust=False, ignore_na=False) step, in place on state[row]"""
+    weighted = state[row, _WEIGHTED]
+    old_wt = state[row, _OLD_WT]
+    is_observation = cur == cur
+
+    if is_observation:
+        state[row, _NOBS] += 1.0
+
+    if weighted == weighted:
+        old_wt *= 1.0 - alpha
+
+        if is_observation:
+            # pandas skips the update on equal values (constant series)
+            if weighted != cur:
+                weighted = old_wt * weighted + alpha * cur
+                weighted /= old_wt + alpha
+            old_wt = 1.0
+
+    elif is_observation:
+        weighted = cur
+
+    state[row, _WEIGHTED] = weighted
+    state[row, _OLD_WT] = old_wt
+
+    if state[row, _NOBS] >= 1.0:
+        return weighted
+    return np.nan
+
+
+@njit(cache=True, error_model="numpy")
+def _smoothing_kernel(close, high, low, rsi_alphas, ema_alpha, atr_alpha,
+                      state, prev_close, rsi_out, ema_out, atr_out):
+    n_rsi = rsi_alphas.shape[0]
+    ema_row = 2 * n_rsi
+    atr_row = 2 * n_rsi + 1
+
+    for i in range(close.shape[0]):
+        price = close[i]
+
+        # ---- RSI: clipped deltas, Wilder smoothing per window
+        delta = price - prev_close
+
+        if delta != delta:
+            gain = np.nan
+            loss = np.nan
+        else:
+            gain = delta if delta > 0.0 else 0.0
+            loss = -(delta if delta < 0.0 else 0.0)
+
+        for j in range(n_rsi):
+            avg_gain = _ewm_step(state, j, gain, rsi_alphas[j])
+            avg_loss = _ewm_step(state, n_rsi + j, loss, rsi_alphas[j])
+            rsi_out[j, i] = 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+
+        # ---- Keltner middle line
+        ema_out[i] = _ewm_step(state, ema_row, price, ema_alpha)
+
+        # ---- True range (NaN-skipping max) and Wilder ATR
+        tr = high[i] - low[i]
+        up = abs(high[i] - prev_close)
+        down = abs(low[i] - prev_close)
+
+        if up == up and (tr != tr or up > tr):
+            tr = up
+        if down == down and (tr != tr or down > tr):
+            tr = down
+
+        atr_out[i] = _ewm_step(state, atr_row, tr, atr_alpha)
+
+        prev_close = price
+
+    return prev_close
+
+
+@njit(cache=True)
+def _ewm_multi_kernel(values, alphas, state, out):
+    for i in range(values.shape[0]):
+        cur = values[i]
+        for j in range(alphas.shape[0]):
+            out[i, j] = _ewm_step(state, j, cur, alphas[j])
+
+
+def ewm_multi(values, coms):
+    """
+    ewm(com=c, adjust=False).mean() of one series for several centers of
+    mass at once, in a single pass.
+
+    Returns
+    -------
+    np.ndarray
+        (bars x len(coms)) array
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+
+    if not HAS_NUMBA:
+        series = pd.Series(values)
+        return np.column_stack(
+            [series.ewm(com=com, adjust=False).mean().to_numpy() for com in coms]
+        ).reshape(len(values), len(coms))
+
+    out = np.empty((len(values), len(coms)))
+    _ewm_multi_kernel(
+        values,
+        np.array([com_alpha(com) for com in coms], dtype=np.float64),
+        _ewm_state(len(coms)),
+        out,
+    )
+
+    return out
+
+
+@njit(cache=True, error_model="numpy")
+def _rsi_multi_kernel(close, alphas, state, out):
+    n_rsi = alphas.shape[0]
+    prev_close = np.nan
+
+    for i in range(close.shape[0]):
+        delta = close[i] - prev_close
+        prev_close = close[i]
+
+        if delta != delta:
+            gain = np.nan
+            loss = np.nan
+        else:
+            gain = delta if delta > 0.0 else 0.0
+            loss = -(delta if delta < 0.0 else 0.0)
+
+        for j in range(n_rsi):
+            avg_gain = _ewm_step(state, j, gain, alphas[j])
+            avg_loss = _ewm_step(state, n_rsi + j, loss, alphas[j])
+            out[i, j] = 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+
+
+def rsi_multi_fused(close, windows):
+    """
+    Wilder's RSI for several windows in one pass (numba only).
+
+    Returns
+    -------
+    np.ndarray
+        (bars x len(windows)) array
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+
+    out = np.empty((len(close), len(windows)))
+    _rsi_multi_kernel(
+        close,
+        np.array([com_alpha(wilder_com(w)) for w in windows], dtype=np.float64),
+        _ewm_state(2 * len(windows)),
+        out,
+    )
+
+    return out
+
+
+def _ewm_state(rows):
+    """Fresh EWM state: nothing observed yet"""
+    state = np.zeros((rows, 3))
+    state[:, _WEIGHTED] = np.nan
+    state[:, _OLD_WT] = 1.0
+    return state
+
+
+def initial_state(n_rsi):
+    """Fresh fused kernel state: (EWM state rows, previous close)"""
+    return _ewm_state(2 * n_rsi + 2), np.nan
+
+
+def fused_smoothings(close, high, low, rsi_windows, ema_span, atr_period, state=None):
+    """
+    All smoothings of the indicator set in one pass.
+
+    Parameters
+    ----------
+    close, high, low : array-like
+        Price arrays of equal length
+    rsi_windows : sequence of int
+        Wilder RSI windows to compute (e.g. the sidebar window, 14 and 3)
+    ema_span : int
+        Keltner EMA period
+    atr_period : int
+        Keltner ATR period
+    state : tuple, optional
+        State returned by a previous call, to continue a series chunk by chunk
+
+    Returns
+    -------
+    dict
+        "rsi": {window: array}, "ema": array, "atr": array, "state": tuple
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+
+    windows = list(dict.fromkeys(rsi_windows))
+    n = close.shape[0]
+
+    if state is None:
+        state = initial_state(len(windows))
+
+    ewm_state, prev_close = state
+    ewm_state = ewm_state.copy()
+
+    rsi_out = np.empty((len(windows), n))
+    ema_out = np.empty(n)
+    atr_out = np.empty(n)
+
+    prev_close = _smoothing_kernel(
+        close, high, low,
+        np.array([com_alpha(wilder_com(w)) for w in windows], dtype=np.float64),
+        com_alpha(span_com(ema_span)),
+        com_alpha(wilder_com(atr_period)),
+        ewm_state, prev_close,
+        rsi_out, ema_out, atr_out,
+    )
+
+    return {
+        "rsi": {w: rsi_out[j] for j, w in enumerate(windows)},
+        "ema": ema_out,
+        "atr": atr_out,
+        "state": (ewm_state, prev_close),
+    }
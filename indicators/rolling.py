@@ -0,0 +1,266 @@
+"""
+Rolling means / standard deviations for many windows from one set of
+compensated prefix sums
+
+The series is cut into blocks of at least the largest window, so a window
+spans at most two blocks. Inside each block values are centred on the
+block's first value and prefix-summed with Neumaier (compensated)
+summation. Sums therefore stay at the scale of local price moves instead
+of growing with the series, and precision is at least that of pandas'
+rolling(window).mean() / .std().
+"""
+import numpy as np
+
+from indicators.kernels import HAS_NUMBA, njit
+
+MIN_BLOCK = 256
+
+
+@njit(cache=True)
+def _compensated_prefix_kernel(values, prefix):
+    for b in range(values.shape[0]):
+        total = 0.0
+        comp = 0.0
+        for k in range(values.shape[1]):
+            y = values[b, k]
+            t = total + y
+            if abs(total) >= abs(y):
+                comp += (total - t) + y
+            else:
+                comp += (y - t) + total
+            total = t
+            prefix[b, k + 1] = total + comp
+
+
+def _compensated_prefix(values):
+    """Neumaier prefix sums along axis 1 of a (blocks x block_len) array"""
+    n_blocks, block_len = values.shape
+
+    prefix = np.zeros((n_blocks, block_len + 1))
+
+    if HAS_NUMBA:
+        _compensated_prefix_kernel(values, prefix)
+        return prefix
+
+    # Same recurrence, vectorized across blocks
+    total = np.zeros(n_blocks)
+    comp = np.zeros(n_blocks)
+
+    for k in range(block_len):
+        y = values[:, k]
+        t = total + y
+        comp += np.where(np.abs(total) >= np.abs(y), (total - t) + y, (y - t) + total)
+        total = t
+        prefix[:, k + 1] = total + comp
+
+    return prefix
+
+
+@njit(cache=True)
+def _window_moments_kernel(x, s1, s2, ref, count, repeats, block, window, ddof, mean, std):
+    # Same combination as RollingSums.window, one bar at a time
+    for j in range(window - 1, x.shape[0]):
+        b, k = j // block, j % block
+
+        if count[j + 1] - count[j + 1 - window] != window:
+            continue
+
+        if repeats[j + 1] - repeats[j + 2 - window] == window - 1:
+            mean[j] = x[j]
+            std[j] = 0.0 if window > ddof else np.nan
+            continue
+
+        if k >= window - 1:
+            t1 = s1[b, k + 1] - s1[b, k + 1 - window]
+            t2 = s2[b, k + 1] - s2[b, k + 1 - window]
+        else:
+            delta = ref[b - 1] - ref[b]
+            head_n = window - 1 - k
+            h1 = s1[b - 1, block] - s1[b - 1, k + 1 - window + block]
+            h2 = s2[b - 1, block] - s2[b - 1, k + 1 - window + block]
+            t1 = s1[b, k + 1] + h1 + head_n * delta
+            t2 = s2[b, k + 1] + h2 + 2 * delta * h1 + head_n * delta * delta
+
+        win_mean = t1 / window
+        mean[j] = ref[b] + win_mean
+
+        if window > ddof:
+            std[j] = np.sqrt(max((t2 - t1 * win_mean) / (window - ddof), 0.0))
+
+
+def block_size(max_window):
+    """Block length used for windows up to max_window (a power of two)"""
+    block = MIN_BLOCK
+    while block < max_window:
+        block *= 2
+    return block
+
+
+class RollingSums:
+    """
+    Per-window sums of a series, shared by any number of windows.
+
+    Parameters
+    ----------
+    values : array-like
+        Input series (NaN allowed)
+    max_window : int
+        Largest window that will be queried
+    squares : bool
+        Also prepare sums of squares (needed for std)
+    """
+
+    def __init__(self, values, max_window, squares=True):
+        x = np.asarray(values, dtype=np.float64)
+        self.x = x
+        self.n = x.shape[0]
+
+        block = block_size(max_window)
+        self.block = block
+
+        n_blocks = max(1, -(-self.n // block))
+        padded = np.full(n_blocks * block, np.nan)
+        padded[:self.n] = x
+        blocks = padded.reshape(n_blocks, block)
+
+        valid = ~np.isnan(blocks)
+
+        # Reference = first valid value of each block (0 if none)
+        first = np.argmax(valid, axis=1)
+        ref = blocks[np.arange(n_blocks), first]
+        self.ref = np.where(valid.any(axis=1), ref, 0.0)
+
+        dev = np.where(valid, blocks - self.ref[:, None], 0.0)
+
+        self.s1 = _compensated_prefix(dev)
+        self.s2 = _compensated_prefix(dev * dev) if squares else None
+
+        # Exact integer prefix counts: valid values, repeated values
+        flat_valid = valid.ravel()[:self.n]
+        self.count = np.concatenate(([0], np.cumsum(flat_valid)))
+
+        same = np.zeros(self.n, dtype=bool)
+        same[1:] = x[1:] == x[:-1]
+        self.repeats = np.concatenate(([0], np.cumsum(same)))
+
+    def _window_sums(self, prefix, window):
+        """
+        Sums of window values ending at every bar, as a (blocks x block)
+        array: about the end block's reference, plus the head of the window
+        that falls in the previous block (about that block's reference).
+        """
+        block = self.block
+
+        total = np.empty((prefix.shape[0], block))
+        head = np.zeros((prefix.shape[0], block))
+
+        # Window inside one block (offset >= window - 1)
+        total[:, window - 1:] = prefix[:, window:] - prefix[:, :block + 1 - window]
+
+        # Window crossing into the previous block
+        total[:, :window - 1] = prefix[:, 1:window]
+        head[1:, :window - 1] = prefix[:-1, block:] - prefix[:-1, block + 1 - window:block]
+
+        return total, head
+
+    def window(self, window):
+        """
+        Sums over every window ending at bar window-1 .. n-1.
+
+        Returns (ref, s1, s2, full, constant): sums are of (x - ref); full
+        marks windows without NaN, constant windows of one repeated value.
+        """
+        n_blocks, block = self.s1.shape[0], self.block
+
+        # Values of the window head, shifted onto the end block reference
+        head_n = np.zeros((n_blocks, block))
+        head_n[:, :window - 1] = np.arange(window - 1, 0, -1)
+        delta = np.zeros(n_blocks)
+        delta[1:] = self.ref[:-1] - self.ref[1:]
+        delta = delta[:, None]
+
+        total1, head1 = self._window_sums(self.s1, window)
+        s1 = total1 + head1 + head_n * delta
+
+        s2 = None
+        if self.s2 is not None:
+            total2, head2 = self._window_sums(self.s2, window)
+            s2 = total2 + head2 + 2 * delta * head1 + head_n * delta * delta
+            s2 = s2.ravel()[window - 1:self.n]
+
+        ref = np.broadcast_to(self.ref[:, None], (n_blocks, block)).ravel()[window - 1:self.n]
+        s1 = s1.ravel()[window - 1:self.n]
+
+        n = self.n
+        full = (self.count[window:] - self.count[:n + 1 - window]) == window
+        constant = (self.repeats[window:] - self.repeats[1:n + 2 - window]) == window - 1
+
+        return ref, s1, s2, full, constant
+
+
+def rolling_means(values, windows):
+    """
+    rolling(window).mean() for every window.
+
+    Returns
+    -------
+    np.ndarray
+        (bars x len(windows)) array
+    """
+    sums = RollingSums(values, max(windows), squares=False)
+
+    # Window-major, so each window writes one contiguous row
+    mean = np.full((len(windows), sums.n), np.nan)
+
+    for j, window in enumerate(windows):
+        if window > sums.n:
+            continue
+
+        ref, s1, _, full, constant = sums.window(window)
+        win_mean = np.where(constant, sums.x[window - 1:], ref + s1 / window)
+        mean[j, window - 1:] = np.where(full, win_mean, np.nan)
+
+    return mean.T
+
+
+def rolling_moments(values, windows, ddof=1):
+    """
+    rolling(window).mean() and .std(ddof) for every window.
+
+    A window with any NaN (or shorter than the window) yields NaN, and a
+    window of one repeated value has a std of exactly 0, as in pandas.
+
+    Returns
+    -------
+    (mean, std) : np.ndarray
+        Each (bars x len(windows))
+    """
+    sums = RollingSums(values, max(windows), squares=True)
+
+    mean = np.full((len(windows), sums.n), np.nan)
+    std = np.full((len(windows), sums.n), np.nan)
+
+    for j, window in enumerate(windows):
+        if window > sums.n:
+            continue
+
+        if HAS_NUMBA:
+            _window_moments_kernel(
+                sums.x, sums.s1, sums.s2, sums.ref, sums.count, sums.repeats,
+                sums.block, window, ddof, mean[j], std[j],
+            )
+            continue
+
+        ref, s1, s2, full, constant = sums.window(window)
+
+        win_mean = s1 / window
+        with np.errstate(invalid="ignore", divide="ignore"):
+            win_var = (s2 - s1 * win_mean) / (window - ddof)
+
+        win_var = np.where(constant, 0.0, np.maximum(win_var, 0.0))
+        win_mean = np.where(constant, sums.x[window - 1:], ref + win_mean)
+
+        mean[j, window - 1:] = np.where(full, win_mean, np.nan)
+        std[j, window - 1:] = np.where(full & (window > ddof), np.sqrt(win_var), np.nan)
+
+    return mean.T, std.T
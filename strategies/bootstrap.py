@@ -0,0 +1,152 @@
+"""
+Bootstrap confidence intervals and a random-entry test for trade returns
+
+A period usually holds a handful of trades, so its win rate and total
+return are noisy point estimates. The trade returns are resampled with
+replacement many times at once: every resample is a row of one
+(resamples x trades) index array, and each statistic is a reduction
+along its rows. The random-entry test draws the same number of trades
+with the same holding times at uniformly random bars of the period and
+asks how often luck alone matches the strategy's total return.
+"""
+import numpy as np
+import pandas as pd
+
+from config.constants import BOOTSTRAP_CONFIDENCE, BOOTSTRAP_RESAMPLES
+from strategies.costs import fill_prices
+
+# Resamples are drawn in batches of about this many (resample, trade) cells
+BATCH_CELLS = 2_000_000
+
+BOOTSTRAP_ROWS = [
+    "Total return (%)",
+    "Win rate (%)",
+    "Max drawdown (%)",
+]
+
+
+def signal_trades(df):
+    """
+    (entries, exits) bar positions from entry_signal / exit_signal columns.
+
+    Signals alternate entry / exit; a final entry without an exit is an
+    open trade (exit -1), valued at the last bar as in trade_ledger.
+    """
+    entries = np.flatnonzero(df["entry_signal"].to_numpy())
+    exits = np.flatnonzero(df["exit_signal"].to_numpy())
+
+    return entries, np.concatenate((exits, np.full(len(entries) - len(exits), -1)))[:len(entries)]
+
+
+def _batches(n_resamples, n_trades):
+    size = max(1, BATCH_CELLS // max(n_trades, 1))
+    for start in range(0, n_resamples, size):
+        yield min(size, n_resamples - start)
+
+
+def _sequence_stats(log_returns):
+    """Total return, win rate and max drawdown (%) of each row of trade log returns"""
+    equity = np.cumsum(log_returns, axis=1)
+
+    # The starting equity is the first peak
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0), axis=1)
+
+    return (
+        np.expm1(equity[:, -1]) * 100,
+        (log_returns > 0).mean(axis=1) * 100,
+        np.expm1((equity - peak).min(axis=1)) * 100,
+    )
+
+
+def bootstrap_intervals(returns, n_resamples=BOOTSTRAP_RESAMPLES, confidence=BOOTSTRAP_CONFIDENCE, seed=0):
+    """
+    Percentile bootstrap of the trade returns (exit / entry price).
+
+    Returns
+    -------
+    pd.DataFrame
+        BOOTSTRAP_ROWS x ["value", "low", "high"]: the statistic of the
+        actual trade sequence and its confidence interval
+    """
+    log_returns = np.log(np.asarray(returns, dtype=np.float64))
+    n_trades = len(log_returns)
+
+    if n_trades == 0:
+        return pd.DataFrame(0.0, index=BOOTSTRAP_ROWS, columns=["value", "low", "high"])
+
+    rng = np.random.default_rng(seed)
+
+    samples = [
+        _sequence_stats(log_returns[rng.integers(0, n_trades, size=(rows, n_trades))])
+        for rows in _batches(n_resamples, n_trades)
+    ]
+    samples = np.concatenate([np.vstack(batch) for batch in samples], axis=1)
+
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(samples, [alpha, 1 - alpha], axis=1)
+
+    return pd.DataFrame(
+        {
+            "value": np.concatenate(_sequence_stats(log_returns[None, :])),
+            "low": low,
+            "high": high,
+        },
+        index=BOOTSTRAP_ROWS,
+    )
+
+
+def random_entry_pvalue(price, entries, exits, n_resamples=BOOTSTRAP_RESAMPLES, seed=0):
+    """
+    Share of random-entry strategies at least as profitable as the actual one.
+
+    Each resample keeps the number of trades and their holding times (in
+    bars) but enters at uniformly random bars of price, so the p-value is
+    the chance that the total return came from the market's drift and
+    noise rather than from the entry rule.
+    """
+    price = np.asarray(price, dtype=np.float64)
+    n_bars = len(price)
+
+    if len(entries) == 0 or n_bars < 2:
+        return np.nan
+
+    log_price = np.log(price)
+    exits = np.where(exits < 0, n_bars - 1, exits)
+    holds = exits - entries
+
+    actual = (log_price[exits] - log_price[entries]).sum()
+
+    rng = np.random.default_rng(seed)
+    at_least = 0
+
+    for rows in _batches(n_resamples, len(entries)):
+        starts = rng.integers(0, n_bars - holds, size=(rows, len(entries)))
+        totals = (log_price[starts + holds] - log_price[starts]).sum(axis=1)
+        at_least += int(np.count_nonzero(totals >= actual - 1e-12))
+
+    return (at_least + 1) / (n_resamples + 1)
+
+
+def trade_bootstrap(df, n_resamples=BOOTSTRAP_RESAMPLES, confidence=BOOTSTRAP_CONFIDENCE, seed=0, costs=None):
+    """
+    Bootstrap intervals and random-entry p-value of the trades marked on df.
+
+    The intervals are of the net returns under costs; the random-entry
+    test compares gross close-to-close returns, as the random trades
+    would pay the same costs.
+
+    Returns
+    -------
+    dict
+        "intervals": bootstrap_intervals DataFrame, "p_value": float
+        (NaN without trades)
+    """
+    price = df["latest"].to_numpy(dtype=np.float64)
+    entries, exits = signal_trades(df)
+
+    entry_prices, exit_prices = fill_prices(df, entries, exits, costs)
+
+    return {
+        "intervals": bootstrap_intervals(exit_prices / entry_prices, n_resamples, confidence, seed),
+        "p_value": random_entry_pvalue(price, entries, exits, n_resamples, seed),
+    }
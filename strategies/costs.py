@@ -0,0 +1,133 @@
+"""
+Execution cost model: fill price, spread, slippage and fees
+
+Trades are given as entry / exit bar positions; every cost is applied to
+the whole position arrays at once, so a cost model adds a handful of
+array operations per evaluation whatever the number of trades.
+The prices returned are effective: what a unit cost on entry and what it
+returned on exit, fees included, so exit / entry is the net trade return.
+"""
+import numpy as np
+
+# Neutral model: fill at the signal bar's close, no costs
+DEFAULT_COSTS = {
+    "fill": "close",
+    "fee_bps": 0.0,
+    "fee_fixed": 0.0,
+    "spread": 0.0,
+    "slippage_model": "none",
+    "slippage": 0.0,
+    "atr_mult": 2.0,
+}
+
+
+def is_costless(costs):
+    """True when costs leave the signal-bar close fills untouched"""
+    if not costs:
+        return True
+
+    costs = {**DEFAULT_COSTS, **costs}
+
+    return (
+        costs["fill"] == "close"
+        and costs["fee_bps"] == 0
+        and costs["fee_fixed"] == 0
+        and costs["spread"] == 0
+        and (costs["slippage_model"] == "none" or costs["slippage"] == 0)
+    )
+
+
+def keltner_atr(df, atr_mult):
+    """ATR of the Keltner Channel, recovered from its band width"""
+    return (df["kc_upper"].to_numpy(dtype=np.float64) - df["kc_lower"].to_numpy(dtype=np.float64)) / (2 * atr_mult)
+
+
+def fill_prices(df, entries, exits, costs=None):
+    """
+    Effective entry / exit prices of trades.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Bars the positions refer to ("latest"; "open" for next-bar fills,
+        the Keltner bands for ATR slippage)
+    entries, exits : np.ndarray
+        Signal bar positions; exits[k] is -1 for a trade still open at the
+        last bar, which is valued at the last close (exit costs included)
+    costs : dict
+        fill: "close" (signal bar close) or "next_open" (next bar's open;
+            its close where the data has no open column). A signal on the
+            last bar has no next bar and fills at the last close.
+        fee_bps, fee_fixed: per side, in basis points of the fill and in
+            price units per unit traded
+        spread: full bid / ask spread in price units (half paid per side)
+        slippage_model: "none", "fixed" (slippage in price units) or
+            "atr" (slippage x the Keltner ATR at the signal bar)
+        atr_mult: Keltner ATR multiplier the bands were computed with
+
+    Returns
+    -------
+    (entry_prices, exit_prices) : np.ndarray
+    """
+    price = df["latest"].to_numpy(dtype=np.float64)
+    n_bars = len(price)
+
+    open_trades = exits < 0
+    exit_bars = np.where(open_trades, n_bars - 1, exits)
+
+    if len(entries) == 0:
+        return np.empty(0), np.empty(0)
+
+    if is_costless(costs):
+        return price[entries], np.where(open_trades, price[-1], price[exit_bars])
+
+    costs = {**DEFAULT_COSTS, **costs}
+
+    # -------------------------------------------------
+    # Fill price
+    # -------------------------------------------------
+    if costs["fill"] == "next_open":
+        fill = df["open"] if "open" in df.columns else df["latest"]
+        fill = fill.to_numpy(dtype=np.float64)
+
+        def filled_at(bars):
+            next_bars = bars + 1
+            return np.where(next_bars < n_bars, fill[np.minimum(next_bars, n_bars - 1)], price[bars])
+
+        entry_prices = filled_at(entries)
+        exit_prices = np.where(open_trades, price[-1], filled_at(exit_bars))
+    else:
+        entry_prices = price[entries]
+        exit_prices = price[exit_bars]
+
+    # -------------------------------------------------
+    # Spread and slippage (always against the trade)
+    # -------------------------------------------------
+    entry_slip = np.full(len(entries), costs["spread"] / 2)
+    exit_slip = np.full(len(entries), costs["spread"] / 2)
+
+    if costs["slippage_model"] == "fixed":
+        entry_slip += costs["slippage"]
+        exit_slip += costs["slippage"]
+    elif costs["slippage_model"] == "atr":
+        atr = keltner_atr(df, costs["atr_mult"])
+        entry_slip += costs["slippage"] * np.nan_to_num(atr[entries])
+        exit_slip += costs["slippage"] * np.nan_to_num(atr[exit_bars])
+
+    # -------------------------------------------------
+    # Fees
+    # -------------------------------------------------
+    fee_rate = costs["fee_bps"] / 10_000
+
+    entry_prices = (entry_prices + entry_slip) * (1 + fee_rate) + costs["fee_fixed"]
+    exit_prices = (exit_prices - exit_slip) * (1 - fee_rate) - costs["fee_fixed"]
+
+    return entry_prices, exit_prices
+
+
+def timeframe_costs(costs, params):
+    """costs for a timeframe whose indicators were computed with params"""
+    if not costs:
+        return costs
+
+    return {**costs, "atr_mult": params["kc_atr_mult"]}
@@ -3,8 +3,11 @@
 import pandas as pd
 import numpy as np
 
+from strategies.costs import fill_prices
+from strategies.signals import SignalFrame, signal_mask, pair_trades
 
-def ichimoku_tenkan_kijun_strategy(df: pd.DataFrame):
+
+def ichimoku_tenkan_kijun_strategy(df: pd.DataFrame, costs: dict = None):
 
     df = df.copy()
 
@@ -31,34 +34,27 @@ def ichimoku_tenkan_kijun_strategy(df: pd.DataFrame):
     entry_signal = []
     exit_signal = []
 
-    entry_prices = []
-    trade_returns = []
-
-    current_entry_price = None
+    entry_bars = []
+    exit_bars = []
 
     for i, (up, down) in enumerate(zip(cross_up, cross_down)):
 
-        price = df["latest"].iloc[i]
-
         if not in_trade and up:
             # ---- Entry
             entry_signal.append(True)
             exit_signal.append(False)
 
             in_trade = True
-            current_entry_price = price
-            entry_prices.append(price)
+            entry_bars.append(i)
 
         elif in_trade and down:
             # ---- Exit
             entry_signal.append(False)
             exit_signal.append(True)
 
-            trade_return = price / current_entry_price
-            trade_returns.append(trade_return)
+            exit_bars.append(i)
 
             in_trade = False
-            current_entry_price = None
 
         else:
             entry_signal.append(False)
@@ -67,10 +63,8 @@ def ichimoku_tenkan_kijun_strategy(df: pd.DataFrame):
     # -------------------------------------------------
     # Handle open trade at the end
     # -------------------------------------------------
-    if in_trade and current_entry_price is not None:
-        last_price = df["latest"].iloc[-1]
-        trade_return = last_price / current_entry_price
-        trade_returns.append(trade_return)
+    if in_trade:
+        exit_bars.append(-1)
 
     # -------------------------------------------------
     # Attach signals
@@ -79,46 +73,17 @@ def ichimoku_tenkan_kijun_strategy(df: pd.DataFrame):
     df["exit_signal"] = exit_signal
 
     # -------------------------------------------------
-    # Statistics
+    # Statistics (fill prices and costs as fill_prices)
     # -------------------------------------------------
-    num_trades = len(trade_returns)
-
-    if num_trades > 0:
-        wins = sum(r > 1 for r in trade_returns)
-        losses = num_trades - wins
-
-        win_rate = wins / num_trades * 100
-        loss_rate = losses / num_trades * 100
-
-        total_return = 1.0
-        for r in trade_returns:
-            total_return *= r
-    else:
-        win_rate = 0.0
-        loss_rate = 0.0
-        total_return = 1.0
-
-    stats_df = pd.DataFrame(
-        {
-            "value": [
-                num_trades,
-                win_rate,
-                loss_rate,
-                (total_return - 1)*100,
-            ]
-        },
-        index=[
-            "Number of trades",
-            "Win rate (%)",
-            "Loss rate (%)",
-            "Total return (%)",
-        ],
+    stats_df = trade_stats(
+        df, np.array(entry_bars, dtype=np.int64), np.array(exit_bars, dtype=np.int64), costs
     )
 
     return df, stats_df
 
 
-def execute_custom_strategy(df: pd.DataFrame, strategy_config: dict):
+def execute_custom_strategy(df: pd.DataFrame, strategy_config: dict, timeframe: str = None,
+                            frames: dict = None, costs: dict = None, frame_keys: dict = None):
     """
     Execute a custom strategy based on the saved strategy configuration.
 
@@ -128,6 +93,16 @@ def execute_custom_strategy(df: pd.DataFrame, strategy_config: dict):
         DataFrame with OHLC data and all calculated indicators
     strategy_config : dict
         The strategy configuration from saved_strategies
+    timeframe : str
+        Timeframe of df (e.g. "15m"); elements qualified with it read df
+    frames : dict
+        {timeframe: indicator DataFrame} of the other timeframes, for
+        timeframe-qualified elements (aligned onto df with an as-of join)
+    costs : dict
+        Execution cost model (see strategies.costs.fill_prices); None
+        fills at the signal bar's close without costs
+    frame_keys : dict
+        {timeframe: dataset registry key} of frames (see SignalFrame)
 
     Returns:
     --------
@@ -137,6 +112,14 @@ def execute_custom_strategy(df: pd.DataFrame, strategy_config: dict):
         Statistics DataFrame with win rate, loss rate, number of trades, total return
     """
 
+    entries, exits = strategy_trades(SignalFrame(df, timeframe, frames, frame_keys=frame_keys), strategy_config)
+
+    return with_trade_signals(df, entries, exits), trade_stats(df, entries, exits, costs)
+
+
+def with_trade_signals(df: pd.DataFrame, entries: np.ndarray, exits: np.ndarray):
+    """Copy of df with entry_signal / exit_signal columns marking the trades"""
+
     df = df.copy()
 
     # -------------------------------------------------
@@ -146,228 +129,62 @@ def execute_custom_strategy(df: pd.DataFrame, strategy_config: dict):
         if col in df.columns:
             df.drop(columns=col, inplace=True)
 
-    # -------------------------------------------------
-    # Map indicator names to DataFrame columns
-    # -------------------------------------------------
-    indicator_map = {
-        "Price": "latest",
-        "BB Upper Band": "bb_upper",
-        "BB Middle Band": "bb_mid",  # Changed from "bb_middle"
-        "BB Lower Band": "bb_lower",
-        "KC Upper Band": "kc_upper",
-        "KC Middle Band": "kc_mid",  # Changed from "kc_middle"
-        "KC Lower Band": "kc_lower",
-        "Tenkan": "tenkan",
-        "Kijun": "kijun",
-        "Senkou A": "senkou_a",
-        "Senkou B": "senkou_b",
-        "RSI": "rsi",
-        "RSI 13 SMA": "ci_13",  # Based on your columns, this maps to ci_13
-        "RSI 33 SMA": "ci_33",  # Based on your columns, this maps to ci_33
-        "CMB": "cmb",  # You'll need to add this column if you want to use CMB
-        "CMB 13 SMA": "cmb_13_sma",  # You'll need to add this column if you want to use CMB
-        "CMB 33 SMA": "cmb_33_sma",  # You'll need to add this column if you want to use CMB
-    }
-
-    # -------------------------------------------------
-    # Helper function to check if condition is met
-    # -------------------------------------------------
-    def check_condition(condition_config, current_idx):
-        """Check if a single condition is met at given index"""
-        element1_name = condition_config.get('element1')
-        operator = condition_config.get('operator')
-        compare_type = condition_config.get('compare_type', 'Indicator')
-        element2_name = condition_config.get('element2')
-        fixed_value = condition_config.get('value')
-
-        # Get the series for element1
-        col1 = indicator_map.get(element1_name)
-
-        if col1 is None or col1 not in df.columns:
-            return False
-
-        series1 = df[col1]
-        value1 = series1.iloc[current_idx]
-
-        # Determine what to compare against
-        if compare_type == "Fixed Value":
-            if fixed_value is None:
-                return False
-            value2 = fixed_value
-        else:
-            # Compare against another indicator
-            col2 = indicator_map.get(element2_name)
-
-            if col2 is None or col2 not in df.columns:
-                return False
-
-            series2 = df[col2]
-            value2 = series2.iloc[current_idx]
-
-        # Check the operator
-        if operator == "Above":
-            return value1 > value2
-        elif operator == "Below":
-            return value1 < value2
-
-        return False
+    entry_signal = np.zeros(len(df), dtype=bool)
+    exit_signal = np.zeros(len(df), dtype=bool)
 
-    def check_trigger(trigger_config, current_idx):
-        """Check if a trigger event occurred at given index"""
-        element1_name = trigger_config.get('element1')
-        event = trigger_config.get('event')
-        compare_type = trigger_config.get('compare_type', 'Indicator')
-        element2_name = trigger_config.get('element2')
-        fixed_value = trigger_config.get('value')
-
-        # Get the series for element1
-        col1 = indicator_map.get(element1_name)
-
-        if col1 is None or col1 not in df.columns:
-            return False
-
-        series1 = df[col1]
-        value1 = series1.iloc[current_idx]
-
-        # Determine what to compare against
-        if compare_type == "Fixed Value":
-            if fixed_value is None:
-                return False
-
-            value2 = fixed_value
-
-            if current_idx > 0:
-                value1_prev = series1.iloc[current_idx - 1]
-                value2_prev = fixed_value
-        else:
-            # Compare against another indicator
-            col2 = indicator_map.get(element2_name)
-
-            if col2 is None or col2 not in df.columns:
-                return False
-
-            series2 = df[col2]
-            value2 = series2.iloc[current_idx]
-
-            if current_idx > 0:
-                value1_prev = series1.iloc[current_idx - 1]
-                value2_prev = series2.iloc[current_idx - 1]
-
-        # Check the event type
-        if event == "Cross Above":
-            if current_idx == 0:
-                return False
-            return (value1 > value2) and (value1_prev <= value2_prev)
-
-        elif event == "Cross Below":
-            if current_idx == 0:
-                return False
-            return (value1 < value2) and (value1_prev >= value2_prev)
-
-        elif event == "Cross":
-            if current_idx == 0:
-                return False
-            cross_above = (value1 > value2) and (value1_prev <= value2_prev)
-            cross_below = (value1 < value2) and (value1_prev >= value2_prev)
-            return cross_above or cross_below
-
-        elif event == "At Level":
-            return abs(value1 - value2) < 0.01
-
-        return False
+    entry_signal[entries] = True
+    exit_signal[exits[exits >= 0]] = True
 
     # -------------------------------------------------
-    # Helper function to check trigger with conditions
+    # Attach signals
     # -------------------------------------------------
-    def check_trigger_and_conditions(trigger_config, conditions, current_idx):
-        """Check if trigger is activated AND all conditions are met"""
-
-        # First check the trigger
-        if not check_trigger(trigger_config, current_idx):
-            return False
+    df["entry_signal"] = entry_signal
+    df["exit_signal"] = exit_signal
 
-        # If trigger is activated, check all conditions
-        for condition in conditions:
-            if not check_condition(condition, current_idx):
-                return False  # If any condition fails, return False
+    return df
 
-        # All conditions met
-        return True
 
-    # -------------------------------------------------
-    # Extract entry and exit configurations
-    # -------------------------------------------------
+def strategy_masks(signal_frame, strategy_config: dict):
+    """Entry / exit signal masks of a custom strategy"""
     entry_config = strategy_config.get('entry', {})
     exit_config = strategy_config.get('exit', {})
 
-    entry_trigger = entry_config.get('trigger', {})
-    entry_conditions = entry_config.get('conditions', [])
-
-    exit_trigger = exit_config.get('trigger', {})
-    exit_conditions = exit_config.get('conditions', [])
-
-    # -------------------------------------------------
-    # Signal generation (entry first, exit after)
-    # -------------------------------------------------
-    in_trade = False
-    entry_signal = []
-    exit_signal = []
+    # Trigger AND the condition tree, for both sides
+    entry_mask = signal_mask(
+        signal_frame,
+        entry_config.get('trigger', {}),
+        entry_config.get('conditions', []),
+        entry_config.get('conditions_logic', "AND"),
+    )
+    exit_mask = signal_mask(
+        signal_frame,
+        exit_config.get('trigger', {}),
+        exit_config.get('conditions', []),
+        exit_config.get('conditions_logic', "AND"),
+    )
 
-    entry_prices = []
-    trade_returns = []
+    return entry_mask, exit_mask
 
-    current_entry_price = None
 
-    for i in range(len(df)):
-        price = df["latest"].iloc[i]
+def strategy_trades(signal_frame, strategy_config: dict):
+    """
+    Entry / exit bar positions of a custom strategy's trades.
 
-        # Check entry conditions (only if not in trade)
-        if not in_trade:
-            if check_trigger_and_conditions(entry_trigger, entry_conditions, i):
-                # ---- Entry
-                entry_signal.append(True)
-                exit_signal.append(False)
+    Returns (entries, exits) as pair_trades does; exits[k] is -1 for a
+    trade still open at the last bar.
+    """
+    return pair_trades(*strategy_masks(signal_frame, strategy_config))
 
-                in_trade = True
-                current_entry_price = price
-                entry_prices.append(price)
-            else:
-                entry_signal.append(False)
-                exit_signal.append(False)
 
-        # Check exit conditions (only if in trade)
-        else:  # in_trade
-            if check_trigger_and_conditions(exit_trigger, exit_conditions, i):
-                # ---- Exit
-                entry_signal.append(False)
-                exit_signal.append(True)
+def trade_stats(df: pd.DataFrame, entries: np.ndarray, exits: np.ndarray, costs: dict = None):
+    """Statistics DataFrame (trades, win / loss rate, total return) of trades"""
+    entry_prices, exit_prices = fill_prices(df, entries, exits, costs)
 
-                trade_return = price / current_entry_price
-                trade_returns.append(trade_return)
+    return returns_stats(list(exit_prices / entry_prices))
 
-                in_trade = False
-                current_entry_price = None
-            else:
-                entry_signal.append(False)
-                exit_signal.append(False)
 
-    # -------------------------------------------------
-    # Handle open trade at the end
-    # -------------------------------------------------
-    if in_trade and current_entry_price is not None:
-        last_price = df["latest"].iloc[-1]
-        trade_return = last_price / current_entry_price
-        trade_returns.append(trade_return)
-
-    # -------------------------------------------------
-    # Attach signals
-    # -------------------------------------------------
-    df["entry_signal"] = entry_signal
-    df["exit_signal"] = exit_signal
-
-    # -------------------------------------------------
-    # Statistics
-    # -------------------------------------------------
+def returns_stats(trade_returns: list):
+    """Statistics DataFrame of the trades' returns (exit / entry price)"""
     num_trades = len(trade_returns)
 
     if num_trades > 0:
@@ -385,7 +202,7 @@ def execute_custom_strategy(df: pd.DataFrame, strategy_config: dict):
         loss_rate = 0.0
         total_return = 1.0
 
-    stats_df = pd.DataFrame(
+    return pd.DataFrame(
         {
             "value": [
                 num_trades,
@@ -402,5 +219,16 @@ def execute_custom_strategy(df: pd.DataFrame, strategy_config: dict):
         ],
     )
 
-    return df, stats_df
 
+def trade_ledger(df: pd.DataFrame, entries: np.ndarray, exits: np.ndarray, costs: dict = None):
+    """One row per trade: entry / exit time, effective price (costs included) and the trade's return"""
+    open_trades = exits < 0
+    entry_prices, exit_prices = fill_prices(df, entries, exits, costs)
+
+    return pd.DataFrame({
+        "entry_time": df.index[entries],
+        "exit_time": df.index[np.where(open_trades, 0, exits)].where(~open_trades),
+        "entry_price": entry_prices,
+        "exit_price": exit_prices,
+        "return": exit_prices / entry_prices,
+    })
@@ -0,0 +1,160 @@
+"""
+Statistics of a custom strategy over all DRM periods of a setup at once
+
+The strategy is evaluated once over the full history of a timeframe;
+each trade is then assigned to the DRM periods its entry bar falls in
+(binary search over the entry-ordered ledger).
+Pooled, per-period and distribution statistics all come from that single
+evaluation instead of one slice run per period.
+"""
+import numpy as np
+import pandas as pd
+
+from strategies.first_strategy import strategy_trades, trade_ledger
+from strategies.signals import SignalFrame
+
+
+class TradeIndex:
+    """
+    A trade ledger prepared for period queries.
+
+    Trades are in entry order, so the trades entered in a period are one
+    contiguous range, found by binary search. Prefix sums of wins and of
+    log returns then give any period's counts and compounded return in
+    O(1), and a pooled union of periods in O(trades).
+    """
+
+    def __init__(self, ledger):
+        self.entry_ns = pd.DatetimeIndex(ledger["entry_time"]).as_unit("ns").asi8
+        self.returns = ledger["return"].to_numpy(dtype=np.float64)
+        self.wins = self.returns > 1
+
+        self._wins_sum = np.concatenate(([0], np.cumsum(self.wins)))
+        self._log_sum = np.concatenate(([0.0], np.cumsum(np.log(self.returns))))
+
+    def ranges(self, periods):
+        """(lo, hi): trades lo[j]:hi[j] entered within periods[j] (inclusive)"""
+        bounds = pd.DatetimeIndex([bound for period in periods for bound in period]).as_unit("ns").asi8
+
+        lo = np.searchsorted(self.entry_ns, bounds[0::2], side="left")
+        hi = np.searchsorted(self.entry_ns, bounds[1::2], side="right")
+
+        return lo, np.maximum(hi, lo)
+
+    def period_arrays(self, periods):
+        """Per period: trades, wins and compounded return (%)"""
+        lo, hi = self.ranges(periods)
+
+        counts = hi - lo
+        win_counts = self._wins_sum[hi] - self._wins_sum[lo]
+        period_return = np.expm1(self._log_sum[hi] - self._log_sum[lo]) * 100
+
+        return counts, win_counts, period_return
+
+    def pooled_mask(self, periods):
+        """Trades entered within any of the periods (each counted once)"""
+        lo, hi = self.ranges(periods)
+
+        cover = np.zeros(len(self.returns) + 1, dtype=np.int64)
+        np.add.at(cover, lo, 1)
+        np.add.at(cover, hi, -1)
+
+        return np.cumsum(cover[:-1]) > 0
+
+    def pooled(self, periods):
+        """Pooled stats values, in POOLED_ROWS order"""
+        mask = self.pooled_mask(periods)
+        returns = self.returns[mask]
+        num_trades = len(returns)
+
+        if num_trades == 0:
+            return [0, 0.0, 0.0, 0.0, 0.0]
+
+        win_rate = self.wins[mask].mean() * 100
+
+        return [
+            num_trades,
+            win_rate,
+            100 - win_rate,
+            np.expm1(np.log(returns).sum()) * 100,
+            (returns.mean() - 1) * 100,
+        ]
+
+
+POOLED_ROWS = [
+    "Number of trades",
+    "Win rate (%)",
+    "Loss rate (%)",
+    "Total return (%)",
+    "Mean trade return (%)",
+]
+
+
+def strategy_ledger(df, strategy, timeframe=None, frames=None, costs=None):
+    """Trade ledger of a strategy over the full history of df (net of costs)"""
+    entries, exits = strategy_trades(SignalFrame(df, timeframe, frames), strategy)
+    return trade_ledger(df, entries, exits, costs)
+
+
+def aggregate_period_stats(df, strategy, periods, timeframe=None, frames=None, costs=None):
+    """
+    Pooled and per-period statistics of a strategy over DRM periods.
+
+    Trades are paired over the full history of df, so a trade entered in
+    a period keeps its real exit even if that is after the period ends.
+    A trade belongs to every period its entry bar is in.
+
+    Returns
+    -------
+    dict
+        "pooled": stats of the trades in any period (one "value" column)
+        "periods": one row per period (trades, win rate, return)
+        "distribution": summary of the per-period returns
+    """
+    return ledger_period_stats(strategy_ledger(df, strategy, timeframe, frames, costs), periods)
+
+
+def ledger_period_stats(ledger, periods):
+    """aggregate_period_stats of an already evaluated trade ledger (or TradeIndex)"""
+    trades = ledger if isinstance(ledger, TradeIndex) else TradeIndex(ledger)
+
+    counts, win_counts, period_return = trades.period_arrays(periods)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        period_win_rate = np.where(counts > 0, win_counts / np.maximum(counts, 1) * 100, 0.0)
+
+    per_period = pd.DataFrame({
+        "Start": [start for start, _ in periods],
+        "End": [end for _, end in periods],
+        "Number of trades": counts,
+        "Win rate (%)": period_win_rate,
+        "Total return (%)": period_return,
+    })
+
+    # Pooled: every trade in at least one period, counted once
+    pooled = pd.DataFrame({"value": trades.pooled(periods)}, index=POOLED_ROWS)
+
+    traded = counts > 0
+
+    distribution = pd.DataFrame(
+        {
+            "value": [
+                len(periods),
+                int(traded.sum()),
+                (period_return[traded] > 0).mean() * 100 if traded.any() else 0.0,
+                np.median(period_return[traded]) if traded.any() else 0.0,
+                period_return[traded].min() if traded.any() else 0.0,
+                period_return[traded].max() if traded.any() else 0.0,
+            ]
+        },
+        index=[
+            "Periods",
+            "Periods with trades",
+            "Profitable periods (%)",
+            "Median period return (%)",
+            "Worst period return (%)",
+            "Best period return (%)",
+        ],
+    )
+
+    return {"pooled": pooled, "periods": per_period, "distribution": distribution}
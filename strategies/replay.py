@@ -0,0 +1,423 @@
+"""
+Bar replay: a simulated live feed through incremental indicators and a
+bar-by-bar strategy state machine
+
+Bars come from a loaded OHLC frame or from a growing local CSV file
+(tailed: only the bytes appended since the last poll are read). Each bar
+updates IncrementalIndicators and every node of the strategy's condition
+tree in O(1): event leaves remember the previous bar's operands, and
+lookbacks keep a last-true bar or run length instead of a window. The
+signals are the ones the vectorized engine gives on the same history.
+"""
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from config.constants import INDICATOR_MAP, REPLAY_HISTORY_BARS
+from indicators.incremental import INCREMENTAL_COLUMNS, IncrementalIndicators
+from strategies.first_strategy import returns_stats
+from strategies.signals import AT_LEVEL_TOLERANCE, bar_duration
+
+NAN = float("nan")
+
+PRICE_COLUMNS = ["open", "high", "low", "latest"]
+
+# Columns of BarReplay.frame()
+REPLAY_COLUMNS = PRICE_COLUMNS + INCREMENTAL_COLUMNS + ["entry_signal", "exit_signal"]
+
+
+# -------------------------------------------------
+# Other timeframes
+# -------------------------------------------------
+class AsofCursor:
+    """
+    Values of another timeframe's last closed bar, as SignalFrame's as-of
+    alignment; the feed only moves forward, so advancing is amortized O(1).
+    """
+
+    def __init__(self, df):
+        self._close = (df.index + bar_duration(df.index)).as_unit("ns").asi8
+        self._columns = {column: df[column].to_numpy(dtype=np.float64) for column in df.columns
+                         if column in INDICATOR_MAP.values()}
+        self._position = -1
+
+    def advance(self, close_ns):
+        close = self._close
+        position = self._position
+
+        while position + 1 < len(close) and close[position + 1] <= close_ns:
+            position += 1
+
+        self._position = position
+
+    def has(self, column):
+        return column in self._columns
+
+    def value(self, column):
+        return self._columns[column][self._position] if self._position >= 0 else NAN
+
+
+# -------------------------------------------------
+# Condition tree nodes
+# -------------------------------------------------
+class _Node:
+    """One condition tree node; step() is called once per bar, in order"""
+
+    def __init__(self, node):
+        lookback = node.get('lookback') or {}
+
+        self.mode = lookback.get('mode')
+        self.bars = int(lookback.get('bars', 1))
+        self.compare = lookback.get('compare', "At least")
+        self.negate = bool(node.get('negate'))
+
+        self._bar = -1
+        self._last_true = -1
+        self._run = 0
+
+    def step(self, row):
+        self._bar += 1
+        hit = self._evaluate(row)
+
+        # Lookback (as apply_lookback), then negation
+        if self.mode is not None:
+            if hit:
+                self._last_true = self._bar
+            self._run = self._run + 1 if hit else 0
+
+            if self.mode == "within":
+                hit = self._last_true >= 0 and self._bar - self._last_true < self.bars
+            elif self.mode == "consecutive":
+                hit = self._run >= self.bars
+            elif self.mode == "bars_since":
+                since = self._bar - self._last_true if self._last_true >= 0 else -1
+
+                if self.compare == "Exactly":
+                    hit = since == self.bars
+                elif self.compare == "At most":
+                    hit = 0 <= since <= self.bars
+                else:
+                    hit = since >= self.bars
+
+        return hit != self.negate
+
+    def _evaluate(self, row):
+        raise NotImplementedError
+
+
+class _Group(_Node):
+    def __init__(self, node, children):
+        super().__init__(node)
+        self.children = children
+        self.any = node.get('logic', "AND") == "OR"
+
+    def _evaluate(self, row):
+        # Every child steps every bar: each keeps its own state
+        hits = [child.step(row) for child in self.children]
+        return any(hits) if self.any else all(hits)
+
+
+class _Leaf(_Node):
+    """Event (trigger) or Above / Below comparison of two operands"""
+
+    def __init__(self, node, operand1, operand2):
+        super().__init__(node)
+        self.operand1 = operand1
+        self.operand2 = operand2
+        self.event = node.get('event')
+        self.operator = node.get('operator')
+        self._prev1 = NAN
+        self._prev2 = NAN
+
+    def _evaluate(self, row):
+        if self.operand1 is None or self.operand2 is None:
+            return False
+
+        v1 = self.operand1(row)
+        v2 = self.operand2(row)
+
+        if self.event is None:
+            if self.operator == "Above":
+                return v1 > v2
+            if self.operator == "Below":
+                return v1 < v2
+            return False
+
+        prev1, prev2 = self._prev1, self._prev2
+        self._prev1, self._prev2 = v1, v2
+
+        if self.event == "Cross Above":
+            return v1 > v2 and prev1 <= prev2
+        if self.event == "Cross Below":
+            return v1 < v2 and prev1 >= prev2
+        if self.event == "Cross":
+            return (v1 > v2 and prev1 <= prev2) or (v1 < v2 and prev1 >= prev2)
+        if self.event == "At Level":
+            return abs(v1 - v2) < AT_LEVEL_TOLERANCE
+
+        return False
+
+
+class StrategyMachine:
+    """
+    A custom strategy evaluated bar by bar.
+
+    Same signals and trade pairing as strategy_trades: entries only when
+    flat, exits only after the entry bar. cursors: {timeframe: AsofCursor}
+    of the other timeframes, advanced by the caller.
+    """
+
+    def __init__(self, strategy, timeframe=None, cursors=None):
+        self.timeframe = timeframe
+        self.cursors = cursors or {}
+
+        self.entry = self._side(strategy.get('entry', {}))
+        self.exit = self._side(strategy.get('exit', {}))
+        self.in_trade = False
+
+    def _side(self, config):
+        trigger = self._compile(config.get('trigger', {}))
+        conditions = [self._compile(node) for node in config.get('conditions', [])]
+        any_condition = config.get('conditions_logic', "AND") == "OR"
+
+        def step(row):
+            hit = trigger.step(row)
+
+            if conditions:
+                hits = [condition.step(row) for condition in conditions]
+                hit = hit and (any(hits) if any_condition else all(hits))
+
+            return hit
+
+        return step
+
+    def _compile(self, node):
+        if node.get('type') == "group":
+            return _Group(node, [self._compile(child) for child in node.get('conditions', [])])
+
+        operand1 = self._operand(node.get('element1'), node.get('timeframe1'))
+
+        if node.get('compare_type', 'Indicator') == "Fixed Value":
+            value = node.get('value')
+            operand2 = None if value is None else (lambda row, value=float(value): value)
+        else:
+            operand2 = self._operand(node.get('element2'), node.get('timeframe2'))
+
+        return _Leaf(node, operand1, operand2)
+
+    def _operand(self, element, timeframe):
+        """Reader of an element's current value, or None if unavailable"""
+        column = INDICATOR_MAP.get(element)
+
+        if column is None:
+            return None
+
+        if timeframe is None or timeframe == self.timeframe:
+            if column not in REPLAY_COLUMNS:
+                return None
+            return lambda row: row[column]
+
+        cursor = self.cursors.get(timeframe)
+
+        if cursor is None or not cursor.has(column):
+            return None
+
+        return lambda row: cursor.value(column)
+
+    def step(self, row):
+        """(entry, exit) of the bar"""
+        # Both sides step every bar to keep their state current
+        entry = self.entry(row)
+        exit_ = self.exit(row)
+
+        if self.in_trade:
+            if exit_:
+                self.in_trade = False
+                return False, True
+            return False, False
+
+        if entry:
+            self.in_trade = True
+            return True, False
+
+        return False, False
+
+
+# -------------------------------------------------
+# Replay engine
+# -------------------------------------------------
+class BarReplay:
+    """
+    Indicators, signals and trades of a bar feed, one bar at a time.
+
+    Parameters
+    ----------
+    params : dict
+        Indicator parameters (as calculate_indicators)
+    strategy : dict, optional
+        Custom strategy to run
+    timeframe : str, optional
+        Timeframe of the feed
+    frames : dict, optional
+        {timeframe: indicator frame} for timeframe-qualified elements
+    history : int
+        Bars kept for frame() (the chart window)
+    """
+
+    def __init__(self, params, strategy=None, timeframe=None, frames=None, history=REPLAY_HISTORY_BARS):
+        frames = frames or {}
+
+        self.indicators = IncrementalIndicators(**params)
+        self.cursors = {name: AsofCursor(df) for name, df in frames.items() if name != timeframe}
+        self.machine = StrategyMachine(strategy, timeframe, self.cursors) if strategy else None
+
+        base = frames.get(timeframe)
+        self.bar_length = bar_duration(base.index).value if base is not None else 0
+
+        self.times = deque(maxlen=history)
+        self.rows = deque(maxlen=history)
+        self.trades = []
+        self.bars = 0
+
+    def step(self, time, open_, high, low, close, signals=True):
+        """Feed one bar; returns its row (prices, indicators, signals)"""
+        row = self.indicators.update(high, low, close)
+        row["open"], row["high"], row["low"], row["latest"] = open_, high, low, close
+
+        entry = exit_ = False
+
+        if signals and self.machine is not None:
+            if self.cursors:
+                close_ns = pd.Timestamp(time).value + self.bar_length
+                for cursor in self.cursors.values():
+                    cursor.advance(close_ns)
+
+            entry, exit_ = self.machine.step(row)
+
+            if entry:
+                self.trades.append([time, close, None, None])
+            elif exit_:
+                self.trades[-1][2:] = [time, close]
+
+        row["entry_signal"], row["exit_signal"] = entry, exit_
+
+        self.times.append(time)
+        self.rows.append([row[column] for column in REPLAY_COLUMNS])
+        self.bars += 1
+
+        return row
+
+    def feed(self, bars, signals=True):
+        """Feed (time, open, high, low, close) bars; returns how many"""
+        count = 0
+        for bar in bars:
+            self.step(*bar, signals=signals)
+            count += 1
+        return count
+
+    def frame(self):
+        """The last `history` bars as a DataFrame (REPLAY_COLUMNS)"""
+        df = pd.DataFrame(list(self.rows), index=pd.DatetimeIndex(list(self.times)), columns=REPLAY_COLUMNS)
+        return df.astype({"entry_signal": bool, "exit_signal": bool})
+
+    def stats(self):
+        """Statistics of the trades so far (an open trade at the last close)"""
+        last_close = self.rows[-1][REPLAY_COLUMNS.index("latest")] if self.rows else NAN
+
+        return returns_stats([
+            (exit_price if exit_price is not None else last_close) / entry_price
+            for _, entry_price, _, exit_price in self.trades
+        ])
+
+
+# -------------------------------------------------
+# Bar sources
+# -------------------------------------------------
+class FrameSource:
+    """Bars of a loaded OHLC frame from start on (without open, the close is used)"""
+
+    def __init__(self, df, start=None):
+        self.times = df.index
+        self.columns = [
+            df[column if column in df.columns else "latest"].to_numpy(dtype=np.float64).tolist()
+            for column in PRICE_COLUMNS
+        ]
+        self.position = 0 if start is None else int(df.index.searchsorted(pd.Timestamp(start)))
+
+    def _bars(self, start, stop):
+        opens, highs, lows, closes = (values[start:stop] for values in self.columns)
+        return list(zip(self.times[start:stop], opens, highs, lows, closes))
+
+    def warmup(self, bars):
+        """The bars just before the start (to warm the indicators up)"""
+        return self._bars(max(self.position - bars, 0), self.position)
+
+    def poll(self, max_bars):
+        bars = self._bars(self.position, self.position + max_bars)
+        self.position += len(bars)
+        return bars
+
+    @property
+    def done(self):
+        return self.position >= len(self.times)
+
+
+class CsvTail:
+    """
+    New bars of a growing OHLC CSV (same columns as the uploads).
+
+    Each poll reads only what was appended since the previous one; a last
+    line still being written is kept until it is complete.
+    """
+
+    done = False
+
+    def __init__(self, path, from_start=True):
+        self.path = path
+        self._offset = 0
+        self._columns = None
+        self._partial = b""
+        self._pending = deque()
+
+        if not from_start:
+            self._read()
+            self._pending.clear()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as file:
+            file.seek(self._offset)
+            data = file.read()
+            self._offset += len(data)
+
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+
+        for line in lines:
+            fields = line.decode().strip().split(",")
+
+            if fields == [""]:
+                continue
+
+            if self._columns is None:
+                names = [field.lower().strip() for field in fields]
+                self._columns = [names.index(name) if name in names else names.index("latest")
+                                 for name in ["time"] + PRICE_COLUMNS]
+                continue
+
+            time, open_, high, low, close = (fields[i] for i in self._columns)
+
+            if not high:
+                continue
+
+            self._pending.append((pd.Timestamp(time), float(open_), float(high), float(low), float(close)))
+
+    def poll(self, max_bars):
+        if len(self._pending) < max_bars:
+            self._read()
+
+        return [self._pending.popleft() for _ in range(min(max_bars, len(self._pending)))]
@@ -0,0 +1,376 @@
+"""
+SQLite store of custom strategy backtest results, shared by all sessions
+
+A result is keyed by everything it depends on: the datasets and
+indicator parameters, the timeframe, the strategy's logic (content
+hash), the evaluated bars and the engine version. An identical
+evaluation is therefore served from the store, trade ledger included,
+instead of being recomputed. Each result is also tagged with the
+pattern / primary / secondary setups and DRM periods it was shown for,
+which is what the cross-period queries group on.
+
+The execution cost model is part of the key too. The cross-period
+ranking only pools results of the same datasets, indicator parameters
+and cost model.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from config.constants import RESULTS_DB_FILE, RESULTS_TAG_CACHE_MAX_ENTRIES
+from strategies.costs import DEFAULT_COSTS, is_costless
+from strategies.first_strategy import (
+    execute_custom_strategy,
+    returns_stats,
+    strategy_trades,
+    trade_ledger,
+    with_trade_signals,
+)
+from strategies.signals import SignalFrame
+from strategies.strategy_store import strategy_hash
+
+# Bump when a change to the engine changes results: old rows stop matching
+ENGINE_VERSION = 2
+
+# Sort keys of best_strategies
+RESULT_METRICS = {
+    "Total return (%)": "total_return",
+    "Win rate (%)": "win_rate",
+    "Number of trades": "n_trades",
+}
+
+
+def _hash(value):
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _ns(index):
+    return pd.DatetimeIndex(index).as_unit("ns").asi8
+
+
+def context_hashes(context):
+    """dataset_hash / params_hash of a results context (see backtest_key)"""
+    return {
+        "dataset_hash": _hash([repr(context["datasets"][name]) for name in sorted(context["datasets"])]),
+        "params_hash": _hash(context["params"]),
+    }
+
+
+def costs_hash(costs):
+    """Hash of a cost model, None for the neutral one"""
+    if is_costless(costs):
+        return None
+    return _hash({**DEFAULT_COSTS, **costs})
+
+
+def backtest_key(context, timeframe, strategy, df, costs=None):
+    """
+    Key of one evaluation of strategy on the bars of df.
+
+    context: {"datasets": {timeframe: dataset registry key},
+              "params": {timeframe: indicator params}}
+    Every loaded timeframe is part of the key, as elements may refer to
+    any of them.
+    """
+    first, last = (_ns(df.index[[0, -1]]) if len(df) else (0, 0))
+
+    key = {
+        **context_hashes(context),
+        "timeframe": timeframe,
+        "strategy_hash": strategy_hash(strategy),
+        "start_ns": int(first),
+        "end_ns": int(last),
+        "bars": len(df),
+        "engine": ENGINE_VERSION,
+        "costs_hash": costs_hash(costs),
+    }
+
+    key["key_hash"] = _hash(key)
+
+    return key
+
+
+class ResultsStore:
+    """
+    Backtest results in a SQLite database.
+
+    A new connection per call keeps the store usable from worker threads
+    and processes; WAL mode lets readers run while a result is written.
+    The most recent tags written by this process are remembered, so
+    re-rendering a period does not write to the database.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._ready = False
+        self._tagged = OrderedDict()
+        self._tagged_lock = threading.Lock()
+
+    # -------------------------------------------------
+    # Connection / schema
+    # -------------------------------------------------
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+
+        try:
+            if not self._ready:
+                self._init_schema(conn)
+                self._ready = True
+
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_schema(self, conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key_hash TEXT NOT NULL UNIQUE,
+                dataset_hash TEXT NOT NULL,
+                params_hash TEXT NOT NULL,
+                costs_hash TEXT,
+                timeframe TEXT,
+                strategy_hash TEXT NOT NULL,
+                strategy_name TEXT,
+                start_ns INTEGER,
+                end_ns INTEGER,
+                bars INTEGER,
+                engine INTEGER,
+                n_trades INTEGER,
+                win_rate REAL,
+                loss_rate REAL,
+                total_return REAL,
+                created_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS runs_strategy ON runs (strategy_hash);
+
+            CREATE TABLE IF NOT EXISTS trades (
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                seq INTEGER NOT NULL,
+                entry_ns INTEGER,
+                exit_ns INTEGER,
+                entry_price REAL,
+                exit_price REAL,
+                return REAL,
+                PRIMARY KEY (run_id, seq)
+            );
+
+            CREATE TABLE IF NOT EXISTS run_setups (
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                pattern TEXT,
+                primary_wave TEXT,
+                secondary_wave TEXT,
+                period_start TEXT,
+                period_end TEXT,
+                UNIQUE (run_id, pattern, primary_wave, secondary_wave, period_start, period_end)
+            );
+            CREATE INDEX IF NOT EXISTS run_setups_setup ON run_setups (pattern, primary_wave, secondary_wave);
+            """
+        )
+
+    # -------------------------------------------------
+    # Results
+    # -------------------------------------------------
+    def get(self, key):
+        """(run id, stats DataFrame, trade ledger) of a key, or None"""
+        with self._connect() as conn:
+            run = conn.execute("SELECT id FROM runs WHERE key_hash = ?", (key["key_hash"],)).fetchone()
+
+            if run is None:
+                return None
+
+            rows = conn.execute(
+                "SELECT entry_ns, exit_ns, entry_price, exit_price, return FROM trades"
+                " WHERE run_id = ? ORDER BY seq",
+                (run["id"],),
+            ).fetchall()
+
+        ledger = pd.DataFrame(
+            [tuple(row) for row in rows],
+            columns=["entry_time", "exit_time", "entry_price", "exit_price", "return"],
+        )
+        ledger["entry_time"] = pd.to_datetime(ledger["entry_time"].astype("Int64"), unit="ns")
+        ledger["exit_time"] = pd.to_datetime(ledger["exit_time"].astype("Int64"), unit="ns")
+
+        return run["id"], returns_stats(list(ledger["return"])), ledger
+
+    def put(self, key, strategy, stats_df, ledger):
+        """Store a result (a concurrent identical one wins); returns its run id"""
+        stats = stats_df["value"]
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR IGNORE INTO runs (key_hash, dataset_hash, params_hash, costs_hash, timeframe,"
+                    " strategy_hash, strategy_name, start_ns, end_ns, bars, engine,"
+                    " n_trades, win_rate, loss_rate, total_return, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key["key_hash"], key["dataset_hash"], key["params_hash"], key["costs_hash"],
+                        key["timeframe"],
+                        key["strategy_hash"], strategy.get("strategy_name"),
+                        key["start_ns"], key["end_ns"], key["bars"], key["engine"],
+                        int(stats["Number of trades"]), float(stats["Win rate (%)"]),
+                        float(stats["Loss rate (%)"]), float(stats["Total return (%)"]),
+                        pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    ),
+                )
+                run_id = conn.execute("SELECT id FROM runs WHERE key_hash = ?", (key["key_hash"],)).fetchone()[0]
+
+                conn.executemany(
+                    "INSERT OR IGNORE INTO trades (run_id, seq, entry_ns, exit_ns, entry_price, exit_price, return)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (run_id, seq, int(entry_ns), None if exit_ns < 0 else int(exit_ns),
+                         float(entry_price), float(exit_price), float(ret))
+                        for seq, (entry_ns, exit_ns, entry_price, exit_price, ret) in enumerate(zip(
+                            _ns(ledger["entry_time"]),
+                            np.where(ledger["exit_time"].isna(), -1, _ns(ledger["exit_time"].fillna(pd.Timestamp(0)))),
+                            ledger["entry_price"], ledger["exit_price"], ledger["return"],
+                        ))
+                    ],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        return run_id
+
+    def tag(self, run_id, setup, period):
+        """Record that a result was shown for a (pattern, primary, secondary) setup and DRM period"""
+        row = (run_id, *setup, *[str(pd.Timestamp(bound)) for bound in period])
+
+        with self._tagged_lock:
+            if row in self._tagged:
+                self._tagged.move_to_end(row)
+                return
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO run_setups (run_id, pattern, primary_wave, secondary_wave,"
+                " period_start, period_end) VALUES (?, ?, ?, ?, ?, ?)",
+                row,
+            )
+
+        with self._tagged_lock:
+            self._tagged[row] = None
+            while len(self._tagged) > RESULTS_TAG_CACHE_MAX_ENTRIES:
+                self._tagged.popitem(last=False)
+
+    # -------------------------------------------------
+    # Queries
+    # -------------------------------------------------
+    def best_strategies(self, pattern, primary_wave, secondary_wave, timeframe=None,
+                        metric="Total return (%)", limit=10, context=None, costs=None):
+        """
+        Strategies ranked by their mean result over all DRM periods of a
+        setup they were run on (one row per strategy and timeframe).
+        Results of different datasets, indicator parameters or cost models
+        are never pooled together.
+
+        context (see backtest_key) and costs ({timeframe: cost model})
+        restrict the ranking to those results.
+        """
+        column = RESULT_METRICS[metric]
+        where = ""
+        params = [pattern, primary_wave, secondary_wave, ENGINE_VERSION, timeframe, timeframe]
+
+        if context is not None:
+            hashes = context_hashes(context)
+            where += " AND r.dataset_hash = ? AND r.params_hash = ?"
+            params += [hashes["dataset_hash"], hashes["params_hash"]]
+
+        if costs is not None:
+            where += " AND (" + " OR ".join(["(r.timeframe = ? AND r.costs_hash IS ?)"] * len(costs)) + ")"
+            for name, model in costs.items():
+                params += [name, costs_hash(model)]
+
+        query = f"""
+            SELECT MAX(r.strategy_name) AS strategy, r.timeframe AS timeframe,
+                   COUNT(DISTINCT s.period_start || s.period_end) AS periods,
+                   SUM(r.n_trades) AS trades,
+                   AVG(r.win_rate) AS mean_win_rate,
+                   AVG(r.total_return) AS mean_return,
+                   MIN(r.total_return) AS worst_return,
+                   MAX(r.total_return) AS best_return,
+                   AVG(r.{column}) AS sort_value
+            FROM runs r JOIN run_setups s ON s.run_id = r.id
+            WHERE s.pattern = ? AND s.primary_wave = ? AND s.secondary_wave = ?
+              AND r.engine = ? AND (? IS NULL OR r.timeframe = ?){where}
+            GROUP BY r.strategy_hash, r.timeframe, r.dataset_hash, r.params_hash, r.costs_hash
+            ORDER BY sort_value DESC
+            LIMIT ?
+        """
+
+        with self._connect() as conn:
+            rows = conn.execute(query, (*params, limit)).fetchall()
+
+        columns = ["strategy", "timeframe", "periods", "trades", "mean_win_rate",
+                   "mean_return", "worst_return", "best_return"]
+
+        return pd.DataFrame([{col: row[col] for col in columns} for row in rows], columns=columns)
+
+    def runs(self, strategy=None):
+        """All stored results (of one strategy if given), newest first"""
+        query = "SELECT * FROM runs"
+        params = ()
+
+        if strategy is not None:
+            query += " WHERE strategy_hash = ?"
+            params = (strategy_hash(strategy),)
+
+        with self._connect() as conn:
+            return pd.read_sql_query(query + " ORDER BY id DESC", conn, params=params)
+
+
+results_store = ResultsStore(RESULTS_DB_FILE)
+
+
+def cached_custom_strategy(df, strategy, timeframe, frames, context, setup, period, costs=None,
+                           frame_keys=None):
+    """
+    execute_custom_strategy through the results store.
+
+    A stored identical evaluation is served without touching the signals;
+    otherwise the strategy runs and its result is stored. Either way the
+    result is tagged with the setup and DRM period.
+    """
+    if context is None or df.empty:
+        return execute_custom_strategy(df, strategy, timeframe=timeframe, frames=frames, costs=costs,
+                                       frame_keys=frame_keys)
+
+    key = backtest_key(context, timeframe, strategy, df, costs)
+    stored = results_store.get(key)
+
+    if stored is not None:
+        run_id, stats_df, ledger = stored
+
+        index = _ns(df.index)
+        entries = np.searchsorted(index, _ns(ledger["entry_time"]))
+        exits = np.where(
+            ledger["exit_time"].isna(), -1,
+            np.searchsorted(index, _ns(ledger["exit_time"].fillna(df.index[0]))),
+        )
+    else:
+        entries, exits = strategy_trades(SignalFrame(df, timeframe, frames, frame_keys=frame_keys), strategy)
+        ledger = trade_ledger(df, entries, exits, costs)
+
+        stats_df = returns_stats(list(ledger["return"]))
+        run_id = results_store.put(key, strategy, stats_df, ledger)
+
+    results_store.tag(run_id, setup, period)
+
+    return with_trade_signals(df, entries, exits), stats_df
@@ -0,0 +1,571 @@
+"""
+Vectorized evaluation of custom strategy triggers and conditions
+
+Every trigger / condition becomes a boolean mask over the bars of the
+frame the strategy runs on; trades are then paired from the entry and
+exit masks. Elements may be qualified with another timeframe (e.g. a 1H
+RSI condition on the 15m chart): its columns are aligned onto the chart
+bars with a look-ahead-safe as-of join.
+
+Cross events are read from a sparse per-pair index built once over the
+whole indicator frame, so a trigger costs O(events), not O(bars).
+"""
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config.constants import INDICATOR_MAP
+
+# "At Level" tolerance
+AT_LEVEL_TOLERANCE = 0.01
+
+# Cross event -> direction in the cross index (0 = either)
+CROSS_DIRECTIONS = {"Cross Above": 1, "Cross Below": -1, "Cross": 0}
+
+ASOF_CACHE_MAX_ENTRIES = 32
+MASK_CACHE_MAX_ENTRIES = 64
+CROSS_CACHE_MAX_ENTRIES = 16
+
+_asof_cache = OrderedDict()
+_asof_cache_lock = threading.Lock()
+
+
+# -------------------------------------------------
+# As-of alignment between timeframes
+# -------------------------------------------------
+def bar_duration(index):
+    """Most common spacing of a DatetimeIndex (the bar length)"""
+    if len(index) < 2:
+        return pd.Timedelta(0)
+
+    steps = np.diff(index.asi8)
+    steps = steps[steps > 0]
+
+    if len(steps) == 0:
+        return pd.Timedelta(0)
+
+    values, counts = np.unique(steps, return_counts=True)
+
+    return pd.Timedelta(int(values[np.argmax(counts)]), unit=index.unit)
+
+
+def _index_token(index):
+    return (len(index), index.unit, hashlib.blake2b(index.asi8.tobytes(), digest_size=16).hexdigest())
+
+
+def asof_positions(index, other_index):
+    """
+    For each bar of index, the position of the last bar of other_index
+    that had closed when the bar closed (-1 if none).
+
+    Bars are labelled by their open time; a bar closes one bar length
+    later. Cached per index pair.
+    """
+    key = (_index_token(index), _index_token(other_index))
+
+    with _asof_cache_lock:
+        positions = _asof_cache.get(key)
+
+        if positions is not None:
+            _asof_cache.move_to_end(key)
+            return positions
+
+    close = (index + bar_duration(index)).as_unit("ns").asi8
+    other_close = (other_index + bar_duration(other_index)).as_unit("ns").asi8
+
+    positions = np.searchsorted(other_close, close, side="right") - 1
+    positions.flags.writeable = False
+
+    with _asof_cache_lock:
+        _asof_cache[key] = positions
+        while len(_asof_cache) > ASOF_CACHE_MAX_ENTRIES:
+            _asof_cache.popitem(last=False)
+
+    return positions
+
+
+class SignalFrame:
+    """
+    Element values of the frame a strategy runs on.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Frame the strategy runs on
+    timeframe : str, optional
+        Timeframe of df (e.g. "15m")
+    frames : dict, optional
+        {timeframe: indicator frame} for timeframe-qualified elements
+    masks : MaskCache, optional
+        Masks of condition tree nodes kept across evaluations of the same df
+    frame_keys : dict, optional
+        {timeframe: dataset registry key} of frames; cached cross events
+        then outlive the DataFrame objects (e.g. across reruns)
+    """
+
+    def __init__(self, df, timeframe=None, frames=None, masks=None, frame_keys=None):
+        self.df = df
+        self.timeframe = timeframe
+        self.frames = frames or {}
+        self.masks = masks
+        self.frame_keys = frame_keys
+        self._aligned = {}
+        self._base_start = False
+
+    def values(self, element, timeframe=None):
+        """Float array of an element, or None if it is not available"""
+        column = INDICATOR_MAP.get(element)
+
+        if column is None:
+            return None
+
+        # Unqualified elements are read from the chart timeframe
+        if timeframe is None or timeframe == self.timeframe:
+            if column not in self.df.columns:
+                return None
+            return self.df[column].to_numpy(dtype=np.float64)
+
+        other = self.frames.get(timeframe)
+
+        if other is None or column not in other.columns:
+            return None
+
+        key = (timeframe, column)
+
+        if key not in self._aligned:
+            positions = asof_positions(self.df.index, other.index)
+            source = other[column].to_numpy(dtype=np.float64)
+
+            aligned = source[np.maximum(positions, 0)]
+            aligned[positions < 0] = np.nan
+            self._aligned[key] = aligned
+
+        return self._aligned[key]
+
+    def base_start(self):
+        """
+        Position of df in the full frame of its timeframe (frames[timeframe]),
+        or None if df is not a contiguous slice of it.
+        """
+        if self._base_start is False:
+            self._base_start = _slice_start(self.df.index, self.base_frame())
+
+        return self._base_start
+
+    def base_frame(self):
+        if self.timeframe is None:
+            return None
+        return self.frames.get(self.timeframe)
+
+    def next_cross(self, trigger, bar):
+        """Position of the first cross of a trigger after bar (-1 if none)"""
+        start = self.base_start()
+
+        if start is None or trigger.get('event') not in CROSS_DIRECTIONS:
+            after = np.flatnonzero(trigger_mask(self, trigger)[bar + 1:])
+            return int(after[0]) + bar + 1 if len(after) else -1
+
+        position = cross_index(self, trigger).next_cross(start + bar, CROSS_DIRECTIONS[trigger['event']])
+
+        if position < 0 or position >= start + len(self.df):
+            return -1
+
+        return position - start
+
+
+def _slice_start(index, base):
+    if base is None or len(index) == 0 or len(index) > len(base):
+        return None
+
+    start = base.index.searchsorted(index[0])
+    stop = start + len(index)
+
+    # Sorted unique indexes: same ends and length means same bars
+    if stop > len(base) or base.index[start] != index[0] or base.index[stop - 1] != index[-1]:
+        return None
+
+    return int(start)
+
+
+# -------------------------------------------------
+# Masks
+# -------------------------------------------------
+def _operands(signal_frame, config):
+    """(values1, values2) of a trigger / condition, or None if unavailable"""
+    values1 = signal_frame.values(config.get('element1'), config.get('timeframe1'))
+
+    if values1 is None:
+        return None
+
+    if config.get('compare_type', 'Indicator') == "Fixed Value":
+        if config.get('value') is None:
+            return None
+        return values1, np.full(len(values1), float(config['value']))
+
+    values2 = signal_frame.values(config.get('element2'), config.get('timeframe2'))
+
+    if values2 is None:
+        return None
+
+    return values1, values2
+
+
+def _shift(values):
+    shifted = np.empty_like(values)
+    shifted[:1] = np.nan
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def condition_mask(signal_frame, condition):
+    """Bars where an Above / Below condition holds (NaN never holds)"""
+    n = len(signal_frame.df)
+    operands = _operands(signal_frame, condition)
+
+    if operands is None:
+        return np.zeros(n, dtype=bool)
+
+    values1, values2 = operands
+    operator = condition.get('operator')
+
+    if operator == "Above":
+        return values1 > values2
+    if operator == "Below":
+        return values1 < values2
+
+    return np.zeros(n, dtype=bool)
+
+
+def trigger_mask(signal_frame, trigger):
+    """Bars where a trigger event occurs (crosses never on the first bar)"""
+    n = len(signal_frame.df)
+    start = signal_frame.base_start()
+
+    if start is not None and trigger.get('event') in CROSS_DIRECTIONS:
+        mask = np.zeros(n, dtype=bool)
+        events = cross_index(signal_frame, trigger).events(
+            start + 1, start + n, CROSS_DIRECTIONS[trigger['event']]
+        )
+        mask[events - start] = True
+        return mask
+
+    operands = _operands(signal_frame, trigger)
+
+    if operands is None:
+        return np.zeros(n, dtype=bool)
+
+    values1, values2 = operands
+    prev1, prev2 = _shift(values1), _shift(values2)
+
+    event = trigger.get('event')
+
+    if event == "Cross Above":
+        return (values1 > values2) & (prev1 <= prev2)
+    if event == "Cross Below":
+        return (values1 < values2) & (prev1 >= prev2)
+    if event == "Cross":
+        return ((values1 > values2) & (prev1 <= prev2)) | ((values1 < values2) & (prev1 >= prev2))
+    if event == "At Level":
+        return np.abs(values1 - values2) < AT_LEVEL_TOLERANCE
+
+    return np.zeros(n, dtype=bool)
+
+
+# -------------------------------------------------
+# Sparse cross events
+# -------------------------------------------------
+class CrossIndex:
+    """
+    Crossing events of one operand pair over a whole frame.
+
+    positions[d] holds the sorted bar positions of the crosses in
+    direction d (1 = above, -1 = below, 0 = either); a cross at bar i
+    compares bar i with bar i - 1, as trigger_mask does.
+    """
+
+    def __init__(self, values1, values2):
+        above = values1[1:] > values2[1:]
+        below = values1[1:] < values2[1:]
+
+        up = np.flatnonzero(above & (values1[:-1] <= values2[:-1])) + 1
+        down = np.flatnonzero(below & (values1[:-1] >= values2[:-1])) + 1
+
+        self.positions = {1: up, -1: down, 0: np.union1d(up, down)}
+
+    def events(self, start, stop, direction=0):
+        """Positions of the crosses in [start, stop)"""
+        positions = self.positions[direction]
+        lo, hi = np.searchsorted(positions, [start, stop])
+        return positions[lo:hi]
+
+    def next_cross(self, bar, direction=0):
+        """Position of the first cross after bar (-1 if none)"""
+        positions = self.positions[direction]
+        k = np.searchsorted(positions, bar, side="right")
+        return int(positions[k]) if k < len(positions) else -1
+
+
+# {frames key: {"lock": Lock, "indexes": {operand key: CrossIndex}}}, LRU.
+# Frames with registry keys are keyed by them; others by id(full frame),
+# dropped with the frame.
+_cross_cache = OrderedDict()
+_cross_cache_lock = threading.Lock()
+
+
+def _operand_key(config):
+    if config.get('compare_type', 'Indicator') == "Fixed Value":
+        second = ("value", config.get('value'))
+    else:
+        second = (config.get('element2'), config.get('timeframe2'))
+
+    return (config.get('element1'), config.get('timeframe1')) + second
+
+
+def _frame_cross_cache(signal_frame):
+    base = signal_frame.base_frame()
+    frame_keys = signal_frame.frame_keys
+
+    # Operands may come from any timeframe: every frame must be keyed
+    if frame_keys and all(name in frame_keys for name in signal_frame.frames):
+        key = ("dataset", signal_frame.timeframe, tuple(sorted(frame_keys.items())))
+    else:
+        key = ("id", id(base))
+
+    with _cross_cache_lock:
+        entry = _cross_cache.get(key)
+
+        if entry is None:
+            entry = {"lock": threading.Lock(), "indexes": {}}
+            _cross_cache[key] = entry
+
+            if key[0] == "id":
+                weakref.finalize(base, _cross_cache.pop, key, None)
+
+            while len(_cross_cache) > CROSS_CACHE_MAX_ENTRIES:
+                _cross_cache.popitem(last=False)
+        else:
+            _cross_cache.move_to_end(key)
+
+    return entry
+
+
+def cross_index(signal_frame, config):
+    """
+    Cached CrossIndex of a trigger / event condition's operands over the
+    full frame of the signal frame's timeframe.
+    """
+    entry = _frame_cross_cache(signal_frame)
+    key = _operand_key(config)
+
+    # One build per pair, even with many periods evaluated concurrently
+    with entry["lock"]:
+        index = entry["indexes"].get(key)
+
+        if index is None:
+            full = SignalFrame(signal_frame.base_frame(), signal_frame.timeframe, signal_frame.frames)
+            operands = _operands(full, config)
+
+            if operands is None:
+                empty = np.empty(0)
+                operands = (empty, empty)
+
+            index = CrossIndex(*operands)
+            entry["indexes"][key] = index
+
+    return index
+
+
+# -------------------------------------------------
+# Lookback windows over boolean masks
+# -------------------------------------------------
+def bars_since(mask):
+    """Bars since mask was last True (0 on a True bar, -1 before the first)"""
+    positions = np.arange(len(mask))
+    last_true = np.maximum.accumulate(np.where(mask, positions, -1))
+
+    return np.where(last_true >= 0, positions - last_true, -1)
+
+
+def within(mask, bars):
+    """True where mask was True on any of the last `bars` bars (incl. this one)"""
+    counts = np.concatenate(([0], np.cumsum(mask)))
+    start = np.maximum(np.arange(1, len(mask) + 1) - bars, 0)
+
+    return counts[1:] - counts[start] > 0
+
+
+def consecutive(mask, bars):
+    """True where mask has been True for at least `bars` bars in a row"""
+    positions = np.arange(len(mask))
+    last_false = np.maximum.accumulate(np.where(mask, -1, positions))
+
+    return positions - last_false >= bars
+
+
+def apply_lookback(mask, lookback):
+    """
+    Apply a node's lookback window.
+
+    lookback: None, or {"mode": "within" | "consecutive" | "bars_since",
+    "bars": N, "compare": "At least" | "Exactly" | "At most"} (compare is
+    used by bars_since only)
+    """
+    if not lookback:
+        return mask
+
+    bars = int(lookback.get('bars', 1))
+    mode = lookback.get('mode')
+
+    if mode == "within":
+        return within(mask, bars)
+    if mode == "consecutive":
+        return consecutive(mask, bars)
+    if mode == "bars_since":
+        since = bars_since(mask)
+        compare = lookback.get('compare', "At least")
+
+        if compare == "Exactly":
+            return since == bars
+        if compare == "At most":
+            return (since >= 0) & (since <= bars)
+        return since >= bars
+
+    return mask
+
+
+# -------------------------------------------------
+# Condition trees
+# -------------------------------------------------
+class MaskCache:
+    """
+    Masks of condition tree nodes, keyed by the node's content.
+
+    Lets a strategy being edited re-evaluate only the node that changed:
+    every unchanged trigger, condition and group is a lookup. Only valid
+    for one df; the masks are read-only.
+    """
+
+    def __init__(self, max_entries=MASK_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._masks = OrderedDict()
+
+    def get(self, node, compute):
+        key = json.dumps(node, sort_keys=True, default=str)
+        mask = self._masks.get(key)
+
+        if mask is None:
+            mask = compute()
+            mask.flags.writeable = False
+            self._masks[key] = mask
+
+            while len(self._masks) > self.max_entries:
+                self._masks.popitem(last=False)
+        else:
+            self._masks.move_to_end(key)
+
+        return mask
+
+
+def combine_masks(masks, logic, n):
+    """AND / OR of masks (an empty AND is all True, an empty OR all False)"""
+    if logic == "OR":
+        mask = np.zeros(n, dtype=bool)
+        for child in masks:
+            mask |= child
+    else:
+        mask = np.ones(n, dtype=bool)
+        for child in masks:
+            mask &= child
+
+    return mask
+
+
+def node_mask(signal_frame, node):
+    """
+    Mask of a condition tree node.
+
+    A node is a group ({"type": "group", "logic": "AND" | "OR",
+    "conditions": [...]}), an event leaf (has "event", as a trigger) or a
+    comparison leaf (has "operator"). Any node may carry "lookback" and
+    "negate"; the lookback applies first.
+    """
+    if signal_frame.masks is not None:
+        return signal_frame.masks.get(node, lambda: _node_mask(signal_frame, node))
+
+    return _node_mask(signal_frame, node)
+
+
+def _node_mask(signal_frame, node):
+    if node.get('type') == "group":
+        mask = combine_masks(
+            [node_mask(signal_frame, child) for child in node.get('conditions', [])],
+            node.get('logic', "AND"),
+            len(signal_frame.df),
+        )
+    elif 'event' in node:
+        mask = trigger_mask(signal_frame, node)
+    else:
+        mask = condition_mask(signal_frame, node)
+
+    mask = apply_lookback(mask, node.get('lookback'))
+
+    if node.get('negate'):
+        mask = ~mask
+
+    return mask
+
+
+def signal_mask(signal_frame, trigger, conditions, logic="AND"):
+    """Trigger AND the conditions (combined with logic; none = no filter)"""
+    # A trigger is an event leaf without lookback / negate
+    mask = node_mask(signal_frame, trigger)
+
+    if conditions:
+        mask = mask & combine_masks(
+            [node_mask(signal_frame, node) for node in conditions], logic, len(mask)
+        )
+
+    return mask
+
+
+# -------------------------------------------------
+# Trades
+# -------------------------------------------------
+def pair_trades(entry_mask, exit_mask):
+    """
+    Entry / exit bar positions of the trades: entries are taken only when
+    flat, exits only after the entry bar.
+
+    Returns
+    -------
+    (entries, exits) : np.ndarray
+        exits[k] is -1 for a trade still open at the last bar
+    """
+    entry_bars = np.flatnonzero(entry_mask)
+    exit_bars = np.flatnonzero(exit_mask)
+
+    entries, exits = [], []
+    position = 0
+
+    while True:
+        k = np.searchsorted(entry_bars, position)
+        if k == len(entry_bars):
+            break
+        entry = entry_bars[k]
+
+        k = np.searchsorted(exit_bars, entry, side="right")
+        entries.append(entry)
+
+        if k == len(exit_bars):
+            exits.append(-1)
+            break
+
+        exits.append(exit_bars[k])
+        position = exit_bars[k] + 1
+
+    return np.array(entries, dtype=np.int64), np.array(exits, dtype=np.int64)
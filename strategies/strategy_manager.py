@@ -2,33 +2,45 @@
 Strategy management utilities - save, load, delete
 """
 import streamlit as st
-import json
 import pandas as pd
-from config.constants import STRATEGIES_FILE
+from config.constants import EVENT_TYPES, CONDITION_LOOKBACKS
+from strategies.strategy_store import strategy_store
 
 
 def save_strategy_to_session(strategy_name):
-    """Collect and save strategy data from session state"""
+    """Collect and save strategy data from session state; returns its id"""
+    strategy_data = collect_strategy(strategy_name)
 
     # Use custom name if provided, otherwise generate default name
-    if strategy_name and strategy_name.strip():
-        final_strategy_name = strategy_name.strip()
-    else:
-        final_strategy_name = f"Strategy_{len(st.session_state['saved_strategies']) + 1}"
+    if not strategy_data["strategy_name"]:
+        strategy_data["strategy_name"] = default_strategy_name()
+
+    return strategy_store.add(strategy_data)
+
+
+def collect_strategy(strategy_name=""):
+    """
+    Strategy data of the builder widgets in session state.
+
+    The name is kept as given (stripped); only saving picks a default one.
+    """
 
     # Collect all strategy data
     strategy_data = {
-        "strategy_name": final_strategy_name,
+        "strategy_name": (strategy_name or "").strip(),
         "direction": st.session_state['strategy_direction'],
         "created_at": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
         "entry": {
             "trigger": {
                 "group": st.session_state.get('entry_trigger_group1'),
                 "element1": st.session_state.get('entry_trigger_element1'),
+                "timeframe1": element_timeframe(st.session_state.get('entry_trigger_timeframe1')),
                 "event": st.session_state.get('entry_trigger_event'),
                 "compare_type": st.session_state.get('entry_trigger_compare_type', 'Indicator'),
                 "element2": st.session_state.get('entry_trigger_element2') if st.session_state.get(
                     'entry_trigger_compare_type', 'Indicator') == "Indicator" else None,
+                "timeframe2": element_timeframe(st.session_state.get('entry_trigger_timeframe2')) if st.session_state.get(
+                    'entry_trigger_compare_type', 'Indicator') == "Indicator" else None,
                 "value": st.session_state.get('entry_trigger_value') if st.session_state.get(
                     'entry_trigger_compare_type', 'Indicator') == "Fixed Value" else None
             },
@@ -40,10 +52,13 @@ def save_strategy_to_session(strategy_name):
             "trigger": {
                 "group": st.session_state.get('exit_trigger_group1'),
                 "element1": st.session_state.get('exit_trigger_element1'),
+                "timeframe1": element_timeframe(st.session_state.get('exit_trigger_timeframe1')),
                 "event": st.session_state.get('exit_trigger_event'),
                 "compare_type": st.session_state.get('exit_trigger_compare_type', 'Indicator'),
                 "element2": st.session_state.get('exit_trigger_element2') if st.session_state.get(
                     'exit_trigger_compare_type', 'Indicator') == "Indicator" else None,
+                "timeframe2": element_timeframe(st.session_state.get('exit_trigger_timeframe2')) if st.session_state.get(
+                    'exit_trigger_compare_type', 'Indicator') == "Indicator" else None,
                 "value": st.session_state.get('exit_trigger_value') if st.session_state.get('exit_trigger_compare_type',
                                                                                             'Indicator') == "Fixed Value" else None
             },
@@ -53,61 +68,143 @@ def save_strategy_to_session(strategy_name):
         }
     }
 
-    # Collect entry conditions with compare type support
-    for i in range(st.session_state['entry_conditions_count']):
-        compare_type = st.session_state.get(f'entry_cond_{i}_compare_type', 'Indicator')
-
-        condition = {
-            "group": st.session_state.get(f'entry_cond_{i}_group1'),
-            "element1": st.session_state.get(f'entry_cond_{i}_element1'),
-            "operator": st.session_state.get(f'entry_cond_{i}_operator'),
-            "compare_type": compare_type,
-            "element2": st.session_state.get(f'entry_cond_{i}_element2') if compare_type == "Indicator" else None,
-            "value": st.session_state.get(f'entry_cond_{i}_value') if compare_type == "Fixed Value" else None
-        }
-        strategy_data["entry"]["conditions"].append(condition)
-
-    # Collect exit conditions with compare type support
-    for i in range(st.session_state['exit_conditions_count']):
-        compare_type = st.session_state.get(f'exit_cond_{i}_compare_type', 'Indicator')
-
-        condition = {
-            "group": st.session_state.get(f'exit_cond_{i}_group1'),
-            "element1": st.session_state.get(f'exit_cond_{i}_element1'),
-            "operator": st.session_state.get(f'exit_cond_{i}_operator'),
-            "compare_type": compare_type,
-            "element2": st.session_state.get(f'exit_cond_{i}_element2') if compare_type == "Indicator" else None,
-            "value": st.session_state.get(f'exit_cond_{i}_value') if compare_type == "Fixed Value" else None
+    # Collect entry / exit condition trees
+    for side in ("entry", "exit"):
+        strategy_data[side]["conditions_logic"] = st.session_state.get(f'{side}_conditions_logic', "AND")
+
+        for i in range(st.session_state[f'{side}_conditions_count']):
+            strategy_data[side]["conditions"].append(collect_condition_node(f'{side}_cond_{i}'))
+
+    return strategy_data
+
+
+def collect_condition_node(prefix):
+    """A top-level condition (single or group) from its builder widgets"""
+    if st.session_state.get(f'{prefix}_type', "Condition") != "Group":
+        return collect_condition(prefix)
+
+    return {
+        "type": "group",
+        "logic": st.session_state.get(f'{prefix}_logic', "AND"),
+        "negate": st.session_state.get(f'{prefix}_negate', False),
+        "conditions": [
+            collect_condition(f'{prefix}_{j}')
+            for j in range(int(st.session_state.get(f'{prefix}_size', 2)))
+        ]
+    }
+
+
+def collect_condition(prefix):
+    """One condition from its builder widgets"""
+    compare_type = st.session_state.get(f'{prefix}_compare_type', 'Indicator')
+    operator = st.session_state.get(f'{prefix}_operator')
+
+    condition = {
+        "group": st.session_state.get(f'{prefix}_group1'),
+        "element1": st.session_state.get(f'{prefix}_element1'),
+        "timeframe1": element_timeframe(st.session_state.get(f'{prefix}_timeframe1')),
+        "compare_type": compare_type,
+        "element2": st.session_state.get(f'{prefix}_element2') if compare_type == "Indicator" else None,
+        "timeframe2": element_timeframe(st.session_state.get(f'{prefix}_timeframe2')) if compare_type == "Indicator" else None,
+        "value": st.session_state.get(f'{prefix}_value') if compare_type == "Fixed Value" else None,
+        "negate": st.session_state.get(f'{prefix}_negate', False),
+        "lookback": None
+    }
+
+    # Events (Cross...) are stored as in triggers, comparisons as operators
+    if operator in EVENT_TYPES:
+        condition["event"] = operator
+    else:
+        condition["operator"] = operator
+
+    mode = CONDITION_LOOKBACKS.get(st.session_state.get(f'{prefix}_lookback', "Now"))
+
+    if mode is not None:
+        condition["lookback"] = {
+            "mode": mode,
+            "bars": int(st.session_state.get(f'{prefix}_lookback_bars', 3)),
+            "compare": st.session_state.get(f'{prefix}_lookback_compare', "At least") if mode == "bars_since" else None
         }
-        strategy_data["exit"]["conditions"].append(condition)
 
-    # Save to session state
-    st.session_state['saved_strategies'].append(strategy_data)
+    return condition
+
+
+def describe_condition(node):
+    """One-line description of a condition tree node"""
+    if node.get('type') == "group":
+        logic = f" {node.get('logic', 'AND')} "
+        text = "(" + logic.join(describe_condition(child) for child in node.get('conditions', [])) + ")"
+    else:
+        element1 = format_element(node.get('element1', 'N/A'), node.get('timeframe1'))
+
+        if node.get('compare_type', 'Indicator') == "Fixed Value":
+            element2 = node.get('value', 'N/A')
+        else:
+            element2 = format_element(node.get('element2', 'N/A'), node.get('timeframe2'))
+
+        text = f"{element1} **{node.get('event') or node.get('operator', 'N/A')}** {element2}"
+
+    lookback = node.get('lookback')
+
+    if lookback:
+        bars = lookback.get('bars')
+        if lookback.get('mode') == "within":
+            text += f" within the last {bars} bars"
+        elif lookback.get('mode') == "consecutive":
+            text += f" for {bars} consecutive bars"
+        elif lookback.get('mode') == "bars_since":
+            text = f"{lookback.get('compare', 'At least').lower()} {bars} bars since {text}"
+
+    if node.get('negate'):
+        text = f"NOT {text}"
+
+    return text
+
+
+def element_timeframe(selection):
+    """Stored timeframe of a strategy element (None = the chart timeframe)"""
+    if selection in (None, "Chart"):
+        return None
+    return selection
+
+
+def format_element(element, timeframe):
+    """Display name of a strategy element, e.g. 1H RSI"""
+    if timeframe:
+        return f"{timeframe} {element}"
+    return element
+
+
+def default_strategy_name():
+    """First free Strategy_<n> name"""
+    n = strategy_store.count() + 1
+
+    while strategy_store.find(f"Strategy_{n}"):
+        n += 1
+
+    return f"Strategy_{n}"
+
 
-    # Save to file for persistence
-    save_strategies_to_file()
+def load_selected_strategy():
+    """The strategy selected in the sidebar, or None (also if it was deleted)"""
+    strategy_id = st.session_state.get('selected_custom_strategy_id')
 
-    return len(st.session_state['saved_strategies'])
+    if strategy_id is None:
+        return None
 
-def save_strategies_to_file():
-    """Save all strategies to JSON file"""
-    with open(STRATEGIES_FILE, 'w') as f:
-        json.dump(st.session_state['saved_strategies'], f, indent=4)
+    return strategy_store.get(strategy_id)
 
 
-def delete_strategy(idx):
-    """Delete a strategy by index"""
-    st.session_state['saved_strategies'].pop(idx)
-    save_strategies_to_file()
+def delete_strategy(strategy_id):
+    """Delete a strategy by id"""
+    strategy_store.delete(strategy_id)
 
     # Reset selected strategy if it was deleted
-    if 'selected_custom_strategy_idx' in st.session_state:
-        if st.session_state['selected_custom_strategy_idx'] > len(st.session_state['saved_strategies']):
-            st.session_state['selected_custom_strategy_idx'] = 0
+    if st.session_state.get('selected_custom_strategy_id') == strategy_id:
+        st.session_state['selected_custom_strategy_id'] = None
 
 
 def delete_all_strategies():
     """Delete all strategies"""
-    st.session_state['saved_strategies'] = []
-    save_strategies_to_file()
-    st.session_state['selected_custom_strategy_idx'] = 0
\ No newline at end of file
+    strategy_store.clear()
+    st.session_state['selected_custom_strategy_id'] = None
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""
+SQLite store of saved strategies, shared by all sessions
+
+Every strategy gets a stable id when saved, so sessions refer to
+strategies by id rather than by list position. A save or delete is one
+small transaction: nothing is rewritten, and concurrent saves from
+several sessions (or server processes) all land. Sessions query the
+store when they need strategies instead of copying the whole set into
+their state.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+from config.constants import STRATEGIES_DB_FILE, STRATEGIES_FILE
+
+SCHEMA_VERSION = 1
+
+# Keys that identify a saved copy rather than the strategy's logic
+_IDENTITY_KEYS = ("strategy_id", "strategy_name", "created_at")
+
+
+def strategy_hash(strategy):
+    """Content hash of a strategy's logic (direction, entry, exit)"""
+    content = {key: value for key, value in strategy.items() if key not in _IDENTITY_KEYS}
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class StrategyStore:
+    """
+    Saved strategies in a SQLite database.
+
+    A new connection per call keeps the store usable from any thread;
+    WAL mode lets sessions read while another one writes. On first use a
+    legacy JSON strategies file, if present, is imported.
+    """
+
+    def __init__(self, path, legacy_json=None):
+        self.path = path
+        self.legacy_json = legacy_json
+        self._ready = False
+
+    # -------------------------------------------------
+    # Connection / schema
+    # -------------------------------------------------
+    @contextmanager
+    def _connect(self):
+        # Autocommit: every statement is its own transaction
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+
+        try:
+            if not self._ready:
+                self._init_schema(conn)
+                self._ready = True
+
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_schema(self, conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+
+        # IMMEDIATE: one process creates / migrates, the others wait
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS strategies (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    name TEXT NOT NULL,
+                    direction TEXT,
+                    created_at TEXT,
+                    content_hash TEXT NOT NULL,
+                    body TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS strategies_name ON strategies (name)")
+            conn.execute("CREATE INDEX IF NOT EXISTS strategies_hash ON strategies (content_hash)")
+
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._import_legacy(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _import_legacy(self, conn):
+        if self.legacy_json is None or not os.path.exists(self.legacy_json):
+            return
+
+        with open(self.legacy_json) as f:
+            for strategy in json.load(f):
+                self._insert(conn, strategy)
+
+    # -------------------------------------------------
+    # Writes
+    # -------------------------------------------------
+    def _insert(self, conn, strategy):
+        strategy = dict(strategy)
+        strategy["strategy_id"] = strategy.get("strategy_id") or uuid.uuid4().hex
+        strategy.setdefault("created_at", pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+        conn.execute(
+            "INSERT INTO strategies (id, name, direction, created_at, content_hash, body)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                strategy["strategy_id"],
+                strategy.get("strategy_name") or strategy["strategy_id"],
+                strategy.get("direction"),
+                strategy["created_at"],
+                strategy_hash(strategy),
+                json.dumps(strategy),
+            ),
+        )
+
+        return strategy["strategy_id"]
+
+    def add(self, strategy):
+        """Save a strategy; returns its id"""
+        with self._connect() as conn:
+            return self._insert(conn, strategy)
+
+    def delete(self, strategy_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM strategies WHERE id = ?", (strategy_id,))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM strategies")
+
+    # -------------------------------------------------
+    # Reads
+    # -------------------------------------------------
+    def get(self, strategy_id):
+        """Strategy dict of an id, or None if it does not exist (any more)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT body FROM strategies WHERE id = ?", (strategy_id,)).fetchone()
+
+        return None if row is None else json.loads(row["body"])
+
+    def find(self, name):
+        """Strategies saved under a name, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT body FROM strategies WHERE name = ? ORDER BY seq", (name,)).fetchall()
+
+        return [json.loads(row["body"]) for row in rows]
+
+    def summaries(self):
+        """[{id, name, direction, created_at, content_hash}] of all strategies, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, name, direction, created_at, content_hash FROM strategies ORDER BY seq"
+            ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def all(self):
+        """All strategy dicts, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT body FROM strategies ORDER BY seq").fetchall()
+
+        return [json.loads(row["body"]) for row in rows]
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM strategies").fetchone()[0]
+
+
+strategy_store = StrategyStore(STRATEGIES_DB_FILE, legacy_json=STRATEGIES_FILE)
@@ -0,0 +1,313 @@
+"""
+Walk-forward optimization of a custom strategy over DRM periods
+
+The periods (or equal blocks of the full history) are split
+chronologically into folds. Each fold optimizes indicator parameters and
+the strategy's fixed values on the periods before its test block, then
+scores the best candidate on the test block only, so every reported
+number is out-of-sample.
+
+Indicator frames are computed once per parameter set through the shared
+dataset registry and handed to the process pool as memory-mapped
+SharedFrames; every fold reuses them. Within a worker, trade ledgers are
+cached per (frames, strategy), so a worker running several folds
+evaluates each candidate once.
+"""
+import copy
+import itertools
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data.column_store import as_frame
+from strategies.costs import timeframe_costs
+from strategies.period_stats import POOLED_ROWS, TradeIndex, strategy_ledger
+from strategies.strategy_store import strategy_hash
+from utils.executor import run_parallel
+from utils.precompute import acquire_features
+
+# Objectives (POOLED_ROWS rows)
+WALK_FORWARD_OBJECTIVES = [
+    "Total return (%)",
+    "Win rate (%)",
+    "Mean trade return (%)",
+]
+
+LEDGER_CACHE_MAX_ENTRIES = 256
+
+_ledger_cache = OrderedDict()
+
+
+# -------------------------------------------------
+# Search space
+# -------------------------------------------------
+def fixed_value_paths(strategy):
+    """
+    Paths to every Fixed Value trigger / condition of a strategy, e.g.
+    ("entry", "trigger") or ("exit", "conditions", 1, "conditions", 0).
+    """
+    paths = []
+
+    def visit(node, path):
+        if node.get('type') == "group":
+            for j, child in enumerate(node.get('conditions', [])):
+                visit(child, path + ("conditions", j))
+        elif node.get('compare_type') == "Fixed Value":
+            paths.append(path)
+
+    for side in ("entry", "exit"):
+        config = strategy.get(side, {})
+        visit(config.get('trigger', {}), (side, "trigger"))
+
+        for i, node in enumerate(config.get('conditions', [])):
+            visit(node, (side, "conditions", i))
+
+    return paths
+
+
+def _node(strategy, path):
+    node = strategy
+    for step in path:
+        node = node[step]
+    return node
+
+
+def with_fixed_values(strategy, values):
+    """Copy of strategy with {path: value} applied"""
+    strategy = copy.deepcopy(strategy)
+
+    for path, value in values.items():
+        _node(strategy, path)['value'] = float(value)
+
+    return strategy
+
+
+def parameter_grid(grid):
+    """Every combination of {name: [candidates]} as dicts"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+# -------------------------------------------------
+# Folds
+# -------------------------------------------------
+def history_periods(index, n_blocks):
+    """The full history as n_blocks equal, consecutive (start, end) periods"""
+    bounds = np.linspace(0, len(index), n_blocks + 1).astype(np.int64)
+
+    return [(index[lo], index[hi - 1]) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+
+def walk_forward_folds(periods, n_folds, train_periods=None):
+    """
+    Chronological train / test splits of periods.
+
+    The periods, ordered by start, are cut into n_folds + 1 blocks; fold
+    k tests on block k + 1 and trains on the periods that ended before
+    that block starts (all of them, or the last train_periods). Returns
+    [(train, test)] lists of periods.
+    """
+    ordered = sorted(periods, key=lambda period: (period[0], period[1]))
+    blocks = [list(block) for block in np.array_split(np.arange(len(ordered)), n_folds + 1)]
+
+    folds = []
+
+    for k in range(1, len(blocks)):
+        if not blocks[k]:
+            continue
+
+        test = [ordered[i] for i in blocks[k]]
+        test_start = test[0][0]
+
+        # No train period may overlap the test block
+        train = [period for period in ordered[:blocks[k][0]] if period[1] < test_start]
+
+        if train_periods:
+            train = train[-train_periods:]
+
+        if train:
+            folds.append((train, test))
+
+    return folds
+
+
+# -------------------------------------------------
+# Evaluation (runs on the workers)
+# -------------------------------------------------
+def _cached_trades(frames_key, sources, timeframe, strategy, costs):
+    key = (frames_key, timeframe, strategy_hash(strategy), repr(sorted((costs or {}).items())))
+
+    trades = _ledger_cache.get(key)
+
+    if trades is None:
+        frames = {name: as_frame(source) for name, source in sources.items()}
+        trades = TradeIndex(strategy_ledger(frames[timeframe], strategy, timeframe, frames, costs))
+
+        _ledger_cache[key] = trades
+        while len(_ledger_cache) > LEDGER_CACHE_MAX_ENTRIES:
+            _ledger_cache.popitem(last=False)
+    else:
+        _ledger_cache.move_to_end(key)
+
+    return trades
+
+
+def run_fold(fold_number, train, test, candidates, strategy, timeframe, objective, min_train_trades):
+    """
+    Optimize on train, score on test.
+
+    candidates: [(params, frames_key, sources, values, costs)], sources
+    being {timeframe: indicator frame or SharedFrame} computed with params,
+    frames_key their registry keys and costs the execution cost model
+    """
+    best = None
+
+    for params, frames_key, sources, values, trade_costs in candidates:
+        trades = _cached_trades(frames_key, sources, timeframe, with_fixed_values(strategy, values), trade_costs)
+        pooled = dict(zip(POOLED_ROWS, trades.pooled(train)))
+
+        if pooled["Number of trades"] < min_train_trades:
+            continue
+
+        if best is None or pooled[objective] > best[0][objective]:
+            best = (pooled, params, frames_key, sources, values, trade_costs)
+
+    result = {
+        "Fold": fold_number,
+        "Train from": train[0][0],
+        "Train to": train[-1][1],
+        "Test from": test[0][0],
+        "Test to": test[-1][1],
+        "Train periods": len(train),
+        "Test periods": len(test),
+    }
+
+    if best is None:
+        return {**result, "Parameters": None, "Fixed values": None}
+
+    train_stats, params, frames_key, sources, values, trade_costs = best
+    test_trades = _cached_trades(frames_key, sources, timeframe, with_fixed_values(strategy, values), trade_costs)
+    test_stats = dict(zip(POOLED_ROWS, test_trades.pooled(test)))
+
+    return {
+        **result,
+        "Parameters": params,
+        "Fixed values": {"/".join(map(str, path)): value for path, value in values.items()},
+        f"Train {objective}": train_stats[objective],
+        "Test trades": test_stats["Number of trades"],
+        "Test win rate (%)": test_stats["Win rate (%)"],
+        "Test return (%)": test_stats["Total return (%)"],
+        "Test mean trade return (%)": test_stats["Mean trade return (%)"],
+    }
+
+
+# -------------------------------------------------
+# Driver
+# -------------------------------------------------
+def walk_forward(datasets, base_params, strategy, timeframe, periods, param_grid=None,
+                 value_grid=None, n_folds=4, train_periods=None, objective="Total return (%)",
+                 min_train_trades=5, costs=None, kind="process"):
+    """
+    Out-of-sample results of a strategy, one row per fold.
+
+    Parameters
+    ----------
+    datasets : dict
+        {timeframe: DatasetHandle} of the uploaded OHLC data
+    base_params : dict
+        {timeframe: indicator params}; param_grid overrides those of the
+        strategy's timeframe
+    strategy : dict
+        Saved strategy
+    timeframe : str
+        Timeframe the strategy runs on
+    periods : list
+        (start, end) periods to split into folds (e.g. DRM periods or
+        history_periods)
+    param_grid : dict
+        {indicator param: [candidates]}
+    value_grid : dict
+        {fixed value path (see fixed_value_paths): [candidates]}
+    costs : dict
+        Execution cost model (see strategies.costs); its ATR multiplier
+        follows each candidate's kc_atr_mult
+    kind : str
+        Executor for the folds ("process" or "thread")
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    folds = walk_forward_folds(periods, n_folds, train_periods)
+
+    if not folds:
+        return pd.DataFrame()
+
+    # Indicator frames per parameter set, computed once for all folds
+    # (and shared with other sessions through the registry)
+    handles = []
+    param_sets = []
+
+    for overrides in parameter_grid(param_grid or {}):
+        params = {**base_params[timeframe], **overrides}
+        acquired = {
+            name: acquire_features(source, params if name == timeframe else base_params[name])
+            for name, source in datasets.items()
+        }
+        handles.extend(acquired.values())
+
+        sources = {
+            name: handle.shared() if kind == "process" else handle.frame()
+            for name, handle in acquired.items()
+        }
+        frames_key = tuple(acquired[name].key for name in sorted(acquired))
+
+        param_sets.append((overrides, frames_key, sources, timeframe_costs(costs, params)))
+
+    value_sets = [
+        {path: value for path, value in zip(value_grid, values)}
+        for values in itertools.product(*(value_grid[path] for path in value_grid))
+    ] if value_grid else [{}]
+
+    candidates = [
+        (overrides, frames_key, sources, values, trade_costs)
+        for overrides, frames_key, sources, trade_costs in param_sets
+        for values in value_sets
+    ]
+
+    rows = run_parallel([
+        (run_fold, (k + 1, train, test, candidates, strategy, timeframe, objective, min_train_trades), {})
+        for k, (train, test) in enumerate(folds)
+    ], kind=kind)
+
+    # Keep the frames registered until every fold is done
+    del handles
+
+    return pd.DataFrame(rows)
+
+
+def out_of_sample_summary(report):
+    """Totals over the test blocks of all folds"""
+    scored = report.dropna(subset=["Test return (%)"]) if "Test return (%)" in report else report.iloc[:0]
+
+    growth = np.prod(1 + scored["Test return (%)"].to_numpy() / 100) if len(scored) else 1.0
+
+    return pd.DataFrame(
+        {
+            "value": [
+                len(report),
+                len(scored),
+                int(scored["Test trades"].sum()) if len(scored) else 0,
+                (scored["Test return (%)"] > 0).mean() * 100 if len(scored) else 0.0,
+                (growth - 1) * 100,
+            ]
+        },
+        index=[
+            "Folds",
+            "Folds with a candidate",
+            "Out-of-sample trades",
+            "Profitable test blocks (%)",
+            "Compounded test return (%)",
+        ],
+    )
@@ -0,0 +1,121 @@
+"""
+Elliott-wave matrix: strategy results for every pattern x primary x
+secondary combination
+
+Each strategy is evaluated once per timeframe over the full history (one
+trade ledger each); every combination is then just its DRM periods
+applied to those ledgers, so the whole matrix costs a few signal
+evaluations plus cheap interval assignments, run in parallel.
+"""
+import pandas as pd
+
+from data.helpers import PRIMARY_SECONDARY_MAP
+from strategies.period_stats import POOLED_ROWS, TradeIndex, strategy_ledger
+from utils.executor import run_parallel
+
+PATTERNS = ["Bullish", "Bearish"]
+
+# Matrix metrics (POOLED_ROWS rows)
+MATRIX_METRICS = [
+    "Total return (%)",
+    "Win rate (%)",
+    "Number of trades",
+]
+
+
+def wave_combinations(patterns=PATTERNS):
+    """(pattern, primary, secondary) of every PRIMARY_SECONDARY_MAP entry"""
+    return [
+        (pattern, primary, secondary)
+        for pattern in patterns
+        for primary, secondaries in PRIMARY_SECONDARY_MAP.items()
+        for secondary in secondaries
+    ]
+
+
+def _unique_names(strategies):
+    """Strategy names, suffixed where several strategies share one"""
+    names = []
+
+    for i, strategy in enumerate(strategies):
+        name = strategy.get('strategy_name') or f'Strategy_{i + 1}'
+        names.append(name if name not in names else f"{name} ({names.count(name) + 1})")
+
+    return names
+
+
+def _combination_rows(ledgers, combination, periods):
+    pattern, primary, secondary = combination
+    rows = []
+
+    for (strategy_name, timeframe), trades in ledgers.items():
+        pooled = dict(zip(POOLED_ROWS, trades.pooled(periods)))
+
+        rows.append({
+            "strategy": strategy_name,
+            "timeframe": timeframe,
+            "pattern": pattern,
+            "primary": primary,
+            "secondary": secondary,
+            "periods": len(periods),
+            **{metric: pooled[metric] for metric in MATRIX_METRICS},
+        })
+
+    return rows
+
+
+def wave_matrix(frames, strategies, drm, timeframes=("1H", "15m"), patterns=PATTERNS, costs=None):
+    """
+    Pooled results of strategies for every wave combination.
+
+    Parameters
+    ----------
+    frames : dict
+        {timeframe: full indicator DataFrame}
+    strategies : list
+        Strategy dicts
+    drm : DrmIndex
+        DRM periods of every combination
+    costs : dict
+        {timeframe: execution cost model} (see strategies.costs)
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per (strategy, timeframe, pattern, primary, secondary) with
+        periods and the MATRIX_METRICS columns
+    """
+    # One evaluation per strategy and timeframe (threads: the frames are shared)
+    costs = costs or {}
+    names = _unique_names(strategies)
+    keys = [(name, timeframe) for name in names for timeframe in timeframes]
+    evaluated = run_parallel([
+        (strategy_ledger, (frames[timeframe], strategy, timeframe, frames, costs.get(timeframe)), {})
+        for strategy in strategies
+        for timeframe in timeframes
+    ], kind="thread")
+    ledgers = {key: TradeIndex(ledger) for key, ledger in zip(keys, evaluated)}
+
+    # Every combination against those ledgers: binary searches and prefix sums
+    combinations = wave_combinations(patterns)
+    results = run_parallel([
+        (_combination_rows, (ledgers, combination, drm.periods(*combination)), {})
+        for combination in combinations
+    ], kind="thread")
+
+    return pd.DataFrame([row for rows in results for row in rows])
+
+
+def matrix_pivot(report, metric, strategy, timeframe, pattern):
+    """Heatmap-ready primary x secondary matrix of one metric (NaN = no combination)"""
+    rows = report[
+        (report["strategy"] == strategy)
+        & (report["timeframe"] == timeframe)
+        & (report["pattern"] == pattern)
+    ]
+
+    secondaries = list(dict.fromkeys(s for values in PRIMARY_SECONDARY_MAP.values() for s in values))
+
+    return rows.pivot(index="primary", columns="secondary", values=metric).reindex(
+        index=list(PRIMARY_SECONDARY_MAP), columns=secondaries
+    )
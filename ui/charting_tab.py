@@ -2,11 +2,36 @@
 Charting tab (Tab 1) UI and logic
 """
 import streamlit as st
-from data.loader import load_ohlc, load_drm, parse_drm_periods
-from indicators.calculate_indicators import calculate_indicators, slice_for_graph
-from graphs.graph import render_charts
-from strategies.first_strategy import ichimoku_tenkan_kijun_strategy, execute_custom_strategy
+from config.constants import (
+    BOOTSTRAP_CONFIDENCE, BOOTSTRAP_RESAMPLES, EXECUTOR_KIND, PRECOMPUTE_POLL_SECONDS, REPLAY_REFRESH_SECONDS,
+    REPLAY_WARMUP_BARS,
+)
+from data.cache import file_digest
+from data.column_store import as_frame
+from data.loader import load_ohlc_cached, load_drm_index
+from data.resample import derive_timeframe
+from indicators.calculate_indicators import slice_for_graph
+from graphs.graph import build_main_chart, render_charts, build_wave_heatmap, build_event_study_chart
+from indicators.event_study import EVENT_STUDY_COLUMNS, PRICE_COLUMNS, event_tensor, event_bands
+from strategies.bootstrap import BOOTSTRAP_ROWS, trade_bootstrap
+from strategies.first_strategy import ichimoku_tenkan_kijun_strategy
+from strategies.period_stats import aggregate_period_stats
+from strategies.replay import BarReplay, CsvTail, FrameSource
+from strategies.results_store import results_store, cached_custom_strategy
+from strategies.strategy_store import strategy_store
+from strategies.walk_forward import (
+    WALK_FORWARD_OBJECTIVES,
+    fixed_value_paths,
+    history_periods,
+    out_of_sample_summary,
+    walk_forward,
+)
+from strategies.wave_matrix import wave_matrix, matrix_pivot, MATRIX_METRICS, PATTERNS
+from strategies.strategy_manager import load_selected_strategy, describe_condition
+from utils.executor import run_parallel
+from utils.precompute import ensure_precompute_job
 import pandas as pd
+import time
 
 
 def render_charting_tab(sidebar_config):
@@ -19,33 +44,44 @@ def render_charting_tab(sidebar_config):
     if not check_data_loaded():
         return
 
+    # Start warming indicators as soon as data is in
+    precompute_job = ensure_precompute_job(sidebar_config)
+    render_precompute_progress(precompute_job)
+
+    # Batch report over every wave combination
+    render_wave_matrix_report(precompute_job, sidebar_config)
+
+    # Simulated live feed
+    render_bar_replay(precompute_job, sidebar_config)
+
     if sidebar_config['primary_choice'] is None or sidebar_config['secondary_choice'] is None:
         st.info("Please select Pattern, Primary setup, and Secondary setup to display charts.")
         return
 
-    # Calculate indicators
-    df_features_1h = calculate_indicators(
-        df=st.session_state["df_1h"],
-        **sidebar_config['params_1h']
-    )
+    # The charts need the indicators; the progress fragment reruns the
+    # app once they are ready instead of blocking this run
+    if not precompute_job.done:
+        return
 
-    df_features_15m = calculate_indicators(
-        df=st.session_state["df_15m"],
-        **sidebar_config['params_15m']
-    )
+    # Indicators (from the background job, waiting if still running).
+    # Process workers get SharedFrames: they map the data instead of
+    # receiving a pickled copy per task.
+    if EXECUTOR_KIND == "process":
+        df_features_1h, df_features_15m = precompute_job.shared_features()
+    else:
+        df_features_1h, df_features_15m = precompute_job.features()
 
-    # Determine if custom strategy is selected
-    show_custom_strategy = False
-    selected_custom_strategy = None
+    # Both timeframes go to every task: strategy elements may refer to
+    # the other timeframe
+    timeframes = {"1H": df_features_1h, "15m": df_features_15m}
+    frame_keys = precompute_job.feature_keys()
 
-    if st.session_state.get('selected_custom_strategy_idx', 0) > 0:
-        show_custom_strategy = True
-        strategy_idx = st.session_state['selected_custom_strategy_idx'] - 1
-        selected_custom_strategy = st.session_state['saved_strategies'][strategy_idx]
+    # Determine if custom strategy is selected
+    selected_custom_strategy = load_selected_strategy()
+    show_custom_strategy = selected_custom_strategy is not None
 
     # Parse DRM periods
-    drm_periods = parse_drm_periods(
-        st.session_state["drm"],
+    drm_periods = st.session_state["drm"].periods(
         sidebar_config['pattern'],
         sidebar_config['primary_choice'],
         sidebar_config['secondary_choice']
@@ -55,30 +91,74 @@ def render_charting_tab(sidebar_config):
         st.warning("No valid date ranges found in DRM.")
         return
 
+    # Indicators around the period boundaries, over all periods
+    render_event_study(timeframes, drm_periods)
+
+    # Out-of-sample check of a strategy's tuned parameters
+    render_walk_forward(sidebar_config, drm_periods)
+
+    # Summary over all periods (one evaluation per timeframe)
+    if show_custom_strategy:
+        render_aggregate_stats(timeframes, selected_custom_strategy, drm_periods, sidebar_config['costs'])
+
+    # What custom strategy results depend on, besides the strategy and bars
+    results_context = {
+        "datasets": {"1H": st.session_state["df_1h"].key, "15m": st.session_state["df_15m"].key},
+        "params": {"1H": sidebar_config['params_1h'], "15m": sidebar_config['params_15m']},
+    }
+
+    # Compute every period / timeframe pipeline concurrently
+    tasks = []
+    for start_dt, end_dt in drm_periods:
+        for timeframe in ("1H", "15m"):
+            tasks.append((
+                compute_timeframe_view,
+                (timeframes, timeframe, start_dt, end_dt, sidebar_config,
+                 show_custom_strategy, selected_custom_strategy),
+                {"results_context": results_context, "frame_keys": frame_keys},
+            ))
+
+    results = run_parallel(tasks)
+
     # Render each period
     for i, (start_dt, end_dt) in enumerate(drm_periods, start=1):
+        view_1h, view_15m = results[2 * (i - 1)], results[2 * (i - 1) + 1]
         render_period(
             i, start_dt, end_dt,
-            df_features_1h, df_features_15m,
+            view_1h, view_15m,
             sidebar_config,
             show_custom_strategy,
             selected_custom_strategy
         )
 
+    if show_custom_strategy:
+        render_best_strategies(sidebar_config, results_context)
+
 
 def render_file_uploaders():
     """Render file upload section"""
+    derive_1h = st.checkbox(
+        "Build 1H from the 15m file", key="derive_1h",
+        help="Resample the 15m upload instead of uploading a separate 1H file",
+    )
+
     col_u1, col_u2, col_u3 = st.columns([1, 1, 1], gap="small")
 
     with col_u1:
+        # Drop 1H bars derived while the option was on
+        if not derive_1h and st.session_state.pop("df_1h_derived", False):
+            st.session_state.pop("df_1h", None)
+            st.session_state.pop("df_1h_file_id", None)
+
+        # Rendered (disabled) even while deriving: Streamlit keeps the
+        # state of rendered widgets only, so an uploaded 1H file survives
         uploaded_file_1h = st.file_uploader(
-            "1H OHLC", type=["csv"], key="1h", label_visibility="collapsed"
+            "1H OHLC", type=["csv"], key="1h", label_visibility="collapsed", disabled=derive_1h
         )
-        st.caption("1H OHLC (.csv)")
+        st.caption("1H OHLC (resampled from 15m)" if derive_1h else "1H OHLC (.csv)")
 
-        if uploaded_file_1h is not None:
-            df_1h = load_ohlc(uploaded_file_1h)
-            st.session_state["df_1h"] = df_1h
+        if uploaded_file_1h is not None and not derive_1h:
+            store_upload("df_1h", uploaded_file_1h, load_ohlc_cached)
             st.success("1H data loaded")
 
     with col_u2:
@@ -88,8 +168,7 @@ def render_file_uploaders():
         st.caption("15m OHLC (.csv)")
 
         if uploaded_file_15m is not None:
-            df_15m = load_ohlc(uploaded_file_15m)
-            st.session_state["df_15m"] = df_15m
+            store_upload("df_15m", uploaded_file_15m, load_ohlc_cached)
             st.success("15m data loaded")
 
     with col_u3:
@@ -99,13 +178,49 @@ def render_file_uploaders():
         st.caption("DRM (.xlsx)")
 
         if uploaded_drm is not None:
-
-            # Just get the pattern from session state or use a default
-            # Since sidebar is already rendered, we need to get pattern differently
-            drm = load_drm(uploaded_drm, st.session_state.get('pattern', 'Bullish'))
-            st.session_state['drm'] = drm
+            # All pattern sheets, parsed once per file content
+            store_upload("drm", uploaded_drm, load_drm_index)
             st.success("Date Range Manager loaded")
 
+    if derive_1h and "df_15m" in st.session_state:
+        # Cached per 15m file hash; nothing is re-read
+        st.session_state["df_1h"] = derive_timeframe(st.session_state["df_15m"], "1H")
+        st.session_state["df_1h_derived"] = True
+
+
+def store_upload(name, uploaded_file, loader):
+    """
+    Put a parsed upload into session state, parsing only on new content.
+
+    The upload widget hands back the same file on every rerun; the file id
+    short-circuits that case, and the content hash lets identical files
+    (from this or any other session) share one parsed copy.
+    """
+    if name in st.session_state and st.session_state.get(f"{name}_file_id") == uploaded_file.file_id:
+        return
+
+    digest = file_digest(uploaded_file)
+
+    st.session_state[name] = loader(uploaded_file, digest)
+    st.session_state[f"{name}_file_id"] = uploaded_file.file_id
+
+
+def render_precompute_progress(precompute_job):
+    """Show the background precomputation progress while it is running"""
+    if precompute_job is None or precompute_job.wait(PRECOMPUTE_POLL_SECONDS):
+        return
+
+    st.fragment(render_precompute_status, run_every=PRECOMPUTE_POLL_SECONDS)(precompute_job)
+
+
+def render_precompute_status(precompute_job):
+    """Progress bar polled by a fragment; reruns the app when the job is done"""
+    if precompute_job.done:
+        st.rerun(scope="app")
+
+    st.progress(precompute_job.progress, text=f"Precomputing: {precompute_job.message}")
+
+
 def check_data_loaded():
     """Check if all required data is loaded"""
     if ("df_1h" not in st.session_state or
@@ -116,76 +231,108 @@ def check_data_loaded():
     return True
 
 
-def render_period(period_num, start_dt, end_dt, df_features_1h, df_features_15m,
-                  sidebar_config, show_custom_strategy, selected_custom_strategy):
-    """Render a single period with charts and stats"""
-
-    st.markdown(f"### Period {period_num}: {start_dt} → {end_dt}")
-
-    # Slice data
-    df_slice_1h, period_start_1h, period_end_1h = slice_for_graph(
-        df=df_features_1h, start_date=start_dt, end_date=end_dt,
+def compute_timeframe_view(timeframes, timeframe, start_dt, end_dt, sidebar_config,
+                           show_custom_strategy, selected_custom_strategy, results_context=None,
+                           frame_keys=None):
+    """
+    Slice, run strategies and build the chart for one timeframe of one period.
+
+    Pure computation (no Streamlit calls), so it can run on a worker.
+    timeframes maps each timeframe to its indicator frame: a DataFrame or,
+    for process workers, a SharedFrame, and frame_keys their registry keys.
+    With a results_context, custom strategy results go through the
+    results store.
+    """
+    frames = {name: as_frame(source) for name, source in timeframes.items()}
+    df_features = frames[timeframe]
+    costs = sidebar_config['costs'][timeframe]
+
+    df_slice, period_start, period_end = slice_for_graph(
+        df=df_features, start_date=start_dt, end_date=end_dt,
         show_ichimoku=sidebar_config['show_ichimoku'],
         show_bb=sidebar_config['show_bb'],
         show_kc=sidebar_config['show_kc']
     )
 
-    df_slice_15m, period_start_15m, period_end_15m = slice_for_graph(
-        df=df_features_15m, start_date=start_dt, end_date=end_dt,
+    view = {
+        'empty': df_slice.empty,
+        'stats': None,
+        'custom_stats': None,
+        'bootstrap': None,
+        'fig': None,
+    }
+
+    if df_slice.empty:
+        return view
+
+    # Execute strategies (the stats shown are the Tenkan Kijun ones when both run)
+    df_shown = None
+
+    if sidebar_config['show_tenkan_kijun']:
+        df_slice, view['stats'] = ichimoku_tenkan_kijun_strategy(df_slice, costs)
+        df_shown = df_slice
+
+    if show_custom_strategy and selected_custom_strategy is not None:
+        setup = (sidebar_config['pattern'], sidebar_config['primary_choice'], sidebar_config['secondary_choice'])
+
+        df_slice, view['custom_stats'] = cached_custom_strategy(
+            df_slice, selected_custom_strategy, timeframe, frames,
+            results_context, setup, (start_dt, end_dt), costs, frame_keys
+        )
+        df_shown = df_shown if df_shown is not None else df_slice
+
+    # Uncertainty of the shown stats
+    if sidebar_config.get('show_bootstrap') and df_shown is not None:
+        view['bootstrap'] = trade_bootstrap(df_shown, costs=costs)
+
+    view['fig'] = build_main_chart(
+        df_slice=df_slice,
+        period_start=period_start,
+        period_end=period_end,
         show_ichimoku=sidebar_config['show_ichimoku'],
         show_bb=sidebar_config['show_bb'],
-        show_kc=sidebar_config['show_kc']
+        show_kc=sidebar_config['show_kc'],
+        show_strategy=sidebar_config['show_tenkan_kijun'] or show_custom_strategy,
     )
 
-    if df_slice_1h.empty or df_slice_15m.empty:
+    return view
+
+
+def render_period(period_num, start_dt, end_dt, view_1h, view_15m,
+                  sidebar_config, show_custom_strategy, selected_custom_strategy):
+    """Render a single period with charts and stats"""
+
+    st.markdown(f"### Period {period_num}: {start_dt} → {end_dt}")
+
+    if view_1h['empty'] or view_15m['empty']:
         st.info("No data for this period.")
         return
 
-    # Execute strategies
+    # Pick the statistics to display
     stats_1h, stats_15m = None, None
     strategy_label = None
 
     if sidebar_config['show_tenkan_kijun']:
-        df_slice_1h, stats_1h = ichimoku_tenkan_kijun_strategy(df_slice_1h)
-        df_slice_15m, stats_15m = ichimoku_tenkan_kijun_strategy(df_slice_15m)
+        stats_1h, stats_15m = view_1h['stats'], view_15m['stats']
         strategy_label = "Tenkan Kijun Strategy"
-
-    if show_custom_strategy and selected_custom_strategy is not None:
-        df_slice_1h, custom_stats_1h = execute_custom_strategy(df_slice_1h, selected_custom_strategy)
-        df_slice_15m, custom_stats_15m = execute_custom_strategy(df_slice_15m, selected_custom_strategy)
-
-        if not sidebar_config['show_tenkan_kijun']:
-            stats_1h = custom_stats_1h
-            stats_15m = custom_stats_15m
-            strategy_label = selected_custom_strategy.get('strategy_name', 'Custom Strategy')
+    elif show_custom_strategy and selected_custom_strategy is not None:
+        stats_1h, stats_15m = view_1h['custom_stats'], view_15m['custom_stats']
+        strategy_label = selected_custom_strategy.get('strategy_name', 'Custom Strategy')
 
     # Render charts
     if sidebar_config['show_tenkan_kijun'] or show_custom_strategy:
         col_charts, col_stats = st.columns([3, 1], gap="medium")
 
         with col_charts:
-            render_charts(
-                df_slice_1h, df_slice_15m,
-                period_start_1h, period_end_1h,
-                period_start_15m, period_end_15m,
-                sidebar_config['show_ichimoku'],
-                sidebar_config['show_bb'],
-                sidebar_config['show_kc'],
-                True
-            )
+            render_charts(view_1h['fig'], view_15m['fig'])
 
         with col_stats:
             render_strategy_stats(stats_1h, stats_15m, strategy_label)
+
+            if view_1h['bootstrap'] is not None:
+                render_bootstrap_stats(view_1h['bootstrap'], view_15m['bootstrap'])
     else:
-        render_charts(
-            df_slice_1h, df_slice_15m,
-            period_start_1h, period_end_1h,
-            period_start_15m, period_end_15m,
-            sidebar_config['show_ichimoku'],
-            sidebar_config['show_bb'],
-            sidebar_config['show_kc'],
-            False
-        )
+        render_charts(view_1h['fig'], view_15m['fig'])
 
     st.divider()
 
@@ -214,4 +361,439 @@ def render_strategy_stats(stats_1h, stats_15m, strategy_label):
         },
         index=["Number of trades", "Win rate (%)", "Loss rate (%)", "Total return (%)"],
     )
-    st.table(stats_table)
\ No newline at end of file
+    st.table(stats_table)
+
+
+def render_bootstrap_stats(bootstrap_1h, bootstrap_15m):
+    """Bootstrap confidence intervals and random-entry p-value per timeframe"""
+    confidence = round(BOOTSTRAP_CONFIDENCE * 100)
+    st.caption(f"{confidence}% bootstrap intervals ({BOOTSTRAP_RESAMPLES:,} resamples)")
+
+    def column(bootstrap):
+        intervals = bootstrap["intervals"]
+        return [
+            f"{row.low:.2f} … {row.high:.2f}" for row in intervals.itertuples()
+        ] + ["-" if pd.isna(bootstrap["p_value"]) else f"{bootstrap['p_value']:.3f}"]
+
+    st.table(pd.DataFrame(
+        {"1H": column(bootstrap_1h), "15m": column(bootstrap_15m)},
+        index=BOOTSTRAP_ROWS + ["p-value vs random entries"],
+    ))
+
+
+def render_event_study(timeframes, drm_periods):
+    """Mean / quantile bands of an indicator around the start or end of every period"""
+    with st.expander(f"📈 Event study over all {len(drm_periods)} periods", expanded=False):
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            series = st.selectbox("Series", list(EVENT_STUDY_COLUMNS), key="event_study_series")
+        with col2:
+            anchor = st.radio("Align on", ["start", "end"], horizontal=True,
+                              format_func=lambda x: f"Period {x}", key="event_study_anchor")
+        with col3:
+            before = st.number_input("Bars before", min_value=0, max_value=2000, value=50, step=10,
+                                     key="event_study_before")
+        with col4:
+            after = st.number_input("Bars after", min_value=0, max_value=2000, value=100, step=10,
+                                    key="event_study_after")
+
+        column = EVENT_STUDY_COLUMNS[series]
+        y_title = f"{series} (% from anchor price)" if column in PRICE_COLUMNS else series
+
+        col_1h, col_15m = st.columns(2, gap="small")
+
+        for col, timeframe in ((col_1h, "1H"), (col_15m, "15m")):
+            tensor, offsets = event_tensor(
+                as_frame(timeframes[timeframe]), drm_periods, [column],
+                before=int(before), after=int(after), anchor=anchor,
+            )
+            bands = event_bands(tensor[:, :, :1])
+
+            with col:
+                st.plotly_chart(
+                    build_event_study_chart(
+                        offsets,
+                        {"mean": bands["mean"][:, 0],
+                         "quantiles": {q: values[:, 0] for q, values in bands["quantiles"].items()}},
+                        f"{timeframe}: {series} around period {anchor}",
+                        y_title,
+                    ),
+                    use_container_width=True,
+                )
+
+
+def parse_candidates(text, cast):
+    """Comma separated candidates ("10, 14, 20") as a list of cast values"""
+    return [cast(part) for part in text.replace(";", ",").split(",") if part.strip()]
+
+
+def render_walk_forward(sidebar_config, drm_periods):
+    """Walk-forward optimization of a saved strategy: tune on past periods, score on the next ones"""
+    with st.expander("🔁 Walk-forward optimization", expanded=False):
+        summaries = strategy_store.summaries()
+
+        if not summaries:
+            st.caption("Save a strategy in the Strategy Builder to run a walk-forward test.")
+            return
+
+        names = {summary['id']: summary['name'] for summary in summaries}
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            strategy_id = st.selectbox("Strategy", list(names), format_func=names.get, key="walk_forward_strategy")
+        with col2:
+            timeframe = st.radio("Timeframe", ["1H", "15m"], horizontal=True, key="walk_forward_timeframe")
+        with col3:
+            split = st.radio("Split", ["DRM periods", "Full history"], horizontal=True, key="walk_forward_split")
+        with col4:
+            objective = st.selectbox("Optimize", WALK_FORWARD_OBJECTIVES, key="walk_forward_objective")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            n_folds = st.number_input("Folds", min_value=1, max_value=50, value=4, key="walk_forward_folds")
+        with col2:
+            train_periods = st.number_input("Train periods (0 = all before the test)", min_value=0,
+                                            max_value=1000, value=0, key="walk_forward_train_periods")
+        with col3:
+            min_train_trades = st.number_input("Min. train trades", min_value=0, max_value=1000, value=5,
+                                               key="walk_forward_min_trades")
+
+        strategy = strategy_store.get(strategy_id)
+        base_params = {"1H": sidebar_config['params_1h'], "15m": sidebar_config['params_15m']}
+
+        st.caption(f"Indicator parameter candidates ({timeframe}, comma separated)")
+        param_grid = {}
+        param_cols = st.columns(3)
+        for i, (name, value) in enumerate(base_params[timeframe].items()):
+            with param_cols[i % 3]:
+                text = st.text_input(name, value=str(value), key=f"walk_forward_param_{timeframe}_{name}")
+            param_grid[name] = parse_candidates(text, type(value))
+
+        value_grid = {}
+        paths = fixed_value_paths(strategy)
+        if paths:
+            st.caption("Fixed value candidates (comma separated)")
+            for path in paths:
+                node = strategy
+                for step in path:
+                    node = node[step]
+                text = st.text_input(
+                    f"{path[0].capitalize()}: {describe_condition(node)}",
+                    value=str(node.get('value', 0.0)),
+                    key=f"walk_forward_value_{strategy_id}_{'_'.join(map(str, path))}",
+                )
+                value_grid[path] = parse_candidates(text, float)
+
+        if st.button("Run walk-forward", key="walk_forward_run"):
+            datasets = {"1H": st.session_state["df_1h"], "15m": st.session_state["df_15m"]}
+
+            periods = drm_periods
+            if split == "Full history":
+                periods = history_periods(datasets[timeframe].frame().index, int(n_folds) + 1)
+
+            with st.spinner("Optimizing folds..."):
+                st.session_state['walk_forward_report'] = walk_forward(
+                    datasets,
+                    base_params,
+                    strategy,
+                    timeframe,
+                    periods,
+                    param_grid=param_grid,
+                    value_grid=value_grid,
+                    n_folds=int(n_folds),
+                    train_periods=int(train_periods) or None,
+                    objective=objective,
+                    min_train_trades=int(min_train_trades),
+                    costs=sidebar_config['costs'][timeframe],
+                )
+
+        report = st.session_state.get('walk_forward_report')
+
+        if report is None:
+            return
+
+        if report.empty:
+            st.warning("Not enough periods for the requested folds.")
+            return
+
+        st.table(out_of_sample_summary(report)["value"].map(format_stat).to_frame())
+        st.dataframe(
+            report.astype({"Parameters": str, "Fixed values": str})
+            .round({column: 2 for column in report.select_dtypes("number").columns}),
+            hide_index=True,
+        )
+
+
+def render_aggregate_stats(timeframes, strategy, drm_periods, costs=None):
+    """Pooled / per-period stats of the custom strategy over all DRM periods"""
+    frames = {name: as_frame(source) for name, source in timeframes.items()}
+
+    results = {
+        timeframe: aggregate_period_stats(frames[timeframe], strategy, drm_periods, timeframe, frames,
+                                          (costs or {}).get(timeframe))
+        for timeframe in ("1H", "15m")
+    }
+
+    st.markdown(f"### All {len(drm_periods)} periods: {strategy.get('strategy_name', 'Custom Strategy')}")
+
+    col_pooled, col_distribution = st.columns(2, gap="medium")
+
+    with col_pooled:
+        st.caption("Pooled trades")
+        st.table(pd.DataFrame({
+            timeframe: result["pooled"]["value"].map(format_stat).to_list()
+            for timeframe, result in results.items()
+        }, index=results["1H"]["pooled"].index))
+
+    with col_distribution:
+        st.caption("Per-period returns")
+        st.table(pd.DataFrame({
+            timeframe: result["distribution"]["value"].map(format_stat).to_list()
+            for timeframe, result in results.items()
+        }, index=results["1H"]["distribution"].index))
+
+    with st.expander("Per-period breakdown", expanded=False):
+        for timeframe, result in results.items():
+            st.caption(timeframe)
+            st.dataframe(result["periods"].round({"Win rate (%)": 2, "Total return (%)": 2}), hide_index=True)
+
+    st.divider()
+
+
+def format_stat(value):
+    """Counts as integers, everything else with two decimals"""
+    if float(value).is_integer() and abs(value) >= 1:
+        return f"{int(value)}"
+    return f"{value:.2f}"
+
+
+def render_wave_matrix_report(precompute_job, sidebar_config):
+    """Strategy results for every pattern x primary x secondary combination"""
+    with st.expander("📋 Elliott-wave matrix report", expanded=False):
+        summaries = strategy_store.summaries()
+
+        if not summaries:
+            st.caption("Save a strategy in the Strategy Builder to run the report.")
+            return
+
+        names = {summary['id']: summary['name'] for summary in summaries}
+        choice = st.selectbox(
+            "Strategy",
+            options=[None] + list(names),
+            format_func=lambda x: "All saved strategies" if x is None else names[x],
+            key="wave_matrix_strategy",
+        )
+
+        if st.button("Run report", key="wave_matrix_run"):
+            strategies = strategy_store.all() if choice is None else [strategy_store.get(choice)]
+            df_features_1h, df_features_15m = precompute_job.features()
+
+            st.session_state['wave_matrix_report'] = wave_matrix(
+                {"1H": df_features_1h, "15m": df_features_15m},
+                [strategy for strategy in strategies if strategy is not None],
+                st.session_state["drm"],
+                costs=sidebar_config['costs'],
+            )
+
+        report = st.session_state.get('wave_matrix_report')
+
+        if report is None or report.empty:
+            return
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            strategy_name = st.selectbox("Show strategy", list(dict.fromkeys(report["strategy"])), key="wave_matrix_show")
+        with col2:
+            metric = st.selectbox("Metric", MATRIX_METRICS, key="wave_matrix_metric")
+        with col3:
+            timeframe = st.radio("Timeframe", ["1H", "15m"], horizontal=True, key="wave_matrix_timeframe")
+        with col4:
+            pattern = st.radio("Pattern", PATTERNS, horizontal=True, key="wave_matrix_pattern")
+
+        matrix = matrix_pivot(report, metric, strategy_name, timeframe, pattern)
+        st.plotly_chart(
+            build_wave_heatmap(matrix, f"{strategy_name}: {pattern} {timeframe}", metric),
+            use_container_width=True,
+        )
+
+        st.download_button(
+            "Download report (.csv)",
+            report.to_csv(index=False),
+            file_name="wave_matrix_report.csv",
+            key="wave_matrix_download",
+        )
+
+
+def render_bar_replay(precompute_job, sidebar_config):
+    """Feed bars one at a time through incremental indicators and a strategy, as if live"""
+    with st.expander("⏯ Bar replay", expanded=False):
+        names = {summary['id']: summary['name'] for summary in strategy_store.summaries()}
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            source_kind = st.radio("Bars", ["Loaded data", "Local CSV (tail)"], horizontal=True, key="replay_source")
+        with col2:
+            timeframe = st.radio("Timeframe", ["1H", "15m"], horizontal=True, key="replay_timeframe")
+        with col3:
+            strategy_id = st.selectbox(
+                "Strategy",
+                options=[None] + list(names),
+                format_func=lambda x: "None" if x is None else names[x],
+                key="replay_strategy",
+            )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if source_kind == "Loaded data":
+                dataset = st.session_state["df_1h" if timeframe == "1H" else "df_15m"]
+                index = dataset.frame().index
+                start = st.date_input(
+                    "Start",
+                    value=index[min(REPLAY_WARMUP_BARS, len(index) - 1)].date(),
+                    min_value=index[0].date(),
+                    max_value=index[-1].date(),
+                    key=f"replay_start_{timeframe}",
+                )
+            else:
+                csv_path = st.text_input("CSV file (Time, Open, High, Low, Latest)", key="replay_csv_path")
+        with col2:
+            st.number_input("Speed (bars / second)", min_value=1, max_value=100_000, value=20, key="replay_speed")
+
+        replay = st.session_state.get('replay')
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            start_clicked = st.button("Start", key="replay_start")
+        with col2:
+            if replay is not None and st.button("Pause" if replay['running'] else "Resume", key="replay_pause"):
+                replay['running'] = not replay['running']
+        with col3:
+            if replay is not None and st.button("Reset", key="replay_reset"):
+                st.session_state['replay'] = replay = None
+
+        if start_clicked:
+            if source_kind == "Local CSV (tail)" and not csv_path:
+                st.warning("Enter the path of the CSV file to follow.")
+                return
+
+            params = sidebar_config['params_1h' if timeframe == "1H" else 'params_15m']
+            strategy = strategy_store.get(strategy_id) if strategy_id is not None else None
+
+            # Timeframe-qualified elements read the precomputed indicators as-of
+            frames = None
+            if strategy is not None:
+                df_features_1h, df_features_15m = precompute_job.features()
+                frames = {"1H": df_features_1h, "15m": df_features_15m}
+
+            engine = BarReplay(params, strategy, timeframe, frames)
+
+            if source_kind == "Loaded data":
+                source = FrameSource(dataset.frame(), pd.Timestamp(start))
+                engine.feed(source.warmup(REPLAY_WARMUP_BARS), signals=False)
+            else:
+                source = CsvTail(csv_path)
+
+            st.session_state['replay'] = replay = {"engine": engine, "source": source, "running": True}
+
+        if replay is None:
+            st.caption("Pick the bars and press Start.")
+            return
+
+        st.fragment(render_replay_frame, run_every=REPLAY_REFRESH_SECONDS if replay['running'] else None)(
+            sidebar_config
+        )
+
+
+def render_replay_frame(sidebar_config):
+    """Advance the replay by one refresh worth of bars and redraw it"""
+    replay = st.session_state.get('replay')
+
+    if replay is None:
+        return
+
+    engine, source = replay['engine'], replay['source']
+
+    if replay['running']:
+        bars = source.poll(max(1, int(st.session_state['replay_speed'] * REPLAY_REFRESH_SECONDS)))
+
+        started = time.perf_counter()
+        engine.feed(bars)
+
+        if bars:
+            replay['throughput'] = len(bars) / max(time.perf_counter() - started, 1e-9)
+
+        # A loaded frame ends; a tailed file keeps being polled
+        if source.done:
+            replay['running'] = False
+            st.rerun(scope="app")
+
+    df = engine.frame()
+
+    if df.empty:
+        st.caption("Waiting for bars...")
+        return
+
+    df["x"] = df.index.strftime("%Y-%m-%d %H:%M")
+    df["date_only"] = df.index.strftime("%Y-%m-%d")
+
+    status = "running" if replay['running'] else "paused"
+    st.caption(
+        f"{df.index[-1]:%Y-%m-%d %H:%M} · {engine.bars:,} bars fed · {status}"
+        + (f" · {replay['throughput']:,.0f} bars/s" if 'throughput' in replay else "")
+    )
+
+    st.plotly_chart(
+        build_main_chart(
+            df_slice=df,
+            period_start=None,
+            period_end=None,
+            show_ichimoku=sidebar_config['show_ichimoku'],
+            show_bb=sidebar_config['show_bb'],
+            show_kc=sidebar_config['show_kc'],
+            show_strategy=engine.machine is not None,
+        ),
+        use_container_width=True,
+        key="replay_chart",
+    )
+
+    if engine.machine is not None:
+        stats = engine.stats()
+        st.caption("Trades since the replay start (signal bar close fills, no costs)")
+        st.table(pd.DataFrame(
+            {"Replay": [format_stat(value) for value in stats["value"]]},
+            index=stats.index,
+        ))
+
+
+def render_best_strategies(sidebar_config, results_context):
+    """
+    Stored results of every strategy run on the selected setup with the
+    loaded data, indicator parameters and costs, best first
+    """
+    with st.expander("Best strategies for this setup (all stored periods)", expanded=False):
+        best = results_store.best_strategies(
+            sidebar_config['pattern'],
+            sidebar_config['primary_choice'],
+            sidebar_config['secondary_choice'],
+            context=results_context,
+            costs=sidebar_config['costs'],
+        )
+
+        if best.empty:
+            st.caption("No stored results yet.")
+            return
+
+        st.dataframe(
+            best.rename(columns={
+                "strategy": "Strategy",
+                "timeframe": "Timeframe",
+                "periods": "Periods",
+                "trades": "Trades",
+                "mean_win_rate": "Mean win rate (%)",
+                "mean_return": "Mean return (%)",
+                "worst_return": "Worst return (%)",
+                "best_return": "Best return (%)",
+            }).round(2),
+            hide_index=True,
+        )
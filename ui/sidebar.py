@@ -2,7 +2,10 @@
 Sidebar UI components
 """
 import streamlit as st
+from config.constants import FILL_MODELS, SLIPPAGE_MODELS
 from data.helpers import on_primary_change, PRIMARY_SECONDARY_MAP
+from strategies.costs import timeframe_costs
+from strategies.strategy_store import strategy_store
 
 
 def render_sidebar():
@@ -41,37 +44,43 @@ def render_sidebar():
     # Strategy Overlays
     st.sidebar.header("Strategy Overlays")
     show_tenkan_kijun = st.sidebar.checkbox("Show Tenkan Kijun Strategy", value=False)
+    show_bootstrap = st.sidebar.checkbox("Bootstrap confidence intervals", value=False)
 
     # Custom Strategies (single selection)
-    if st.session_state['saved_strategies']:
+    strategy_names = {summary['id']: summary['name'] for summary in strategy_store.summaries()}
+
+    if strategy_names:
         st.sidebar.markdown("**Custom Strategies:**")
 
-        strategy_options = ["None"] + [
-            strategy.get('strategy_name', f'Strategy_{idx + 1}')
-            for idx, strategy in enumerate(st.session_state['saved_strategies'])
-        ]
+        strategy_options = [None] + list(strategy_names)
 
-        if 'selected_custom_strategy_idx' not in st.session_state:
-            st.session_state['selected_custom_strategy_idx'] = 0
+        # The selected strategy may have been deleted by another session
+        selected_id = st.session_state.get('selected_custom_strategy_id')
+        if selected_id not in strategy_names:
+            selected_id = None
+            st.session_state['selected_custom_strategy_id'] = None
 
         # Radio button for single selection
         selected_option = st.sidebar.radio(
             "Select one strategy:",
-            options=range(len(strategy_options)),
-            format_func=lambda x: strategy_options[x],
-            index=st.session_state['selected_custom_strategy_idx'],
+            options=strategy_options,
+            format_func=lambda x: "None" if x is None else strategy_names[x],
+            index=strategy_options.index(selected_id),
             key="custom_strategy_radio"
         )
 
         # Check if selection changed and update
-        if selected_option != st.session_state['selected_custom_strategy_idx']:
-            st.session_state['selected_custom_strategy_idx'] = selected_option
+        if selected_option != selected_id:
+            st.session_state['selected_custom_strategy_id'] = selected_option
             st.rerun()
 
     # Indicator Parameters
     params_1h = render_timeframe_parameters("1H")
     params_15m = render_timeframe_parameters("15m")
 
+    # Execution costs (the ATR multiple follows each timeframe's KC multiplier)
+    costs = render_cost_parameters()
+
     return {
         'pattern': pattern,
         'primary_choice': primary_choice,
@@ -80,8 +89,10 @@ def render_sidebar():
         'show_bb': show_bb,
         'show_kc': show_kc,
         'show_tenkan_kijun': show_tenkan_kijun,
+        'show_bootstrap': show_bootstrap,
         'params_1h': params_1h,
-        'params_15m': params_15m
+        'params_15m': params_15m,
+        'costs': {"1H": timeframe_costs(costs, params_1h), "15m": timeframe_costs(costs, params_15m)},
     }
 
 
@@ -118,4 +129,41 @@ def render_timeframe_parameters(timeframe):
         ),
     }
 
-    return params
\ No newline at end of file
+    return params
+
+
+def render_cost_parameters():
+    """Render the execution cost model (fill, fees, spread, slippage)"""
+    st.sidebar.header("Execution Costs")
+
+    fill = st.sidebar.radio(
+        "Fill price", list(FILL_MODELS), format_func=FILL_MODELS.get, key="cost_fill"
+    )
+    fee_bps = st.sidebar.number_input(
+        "Fee per side (bps)", 0.0, 500.0, 0.0, step=0.5, key="cost_fee_bps"
+    )
+    fee_fixed = st.sidebar.number_input(
+        "Fixed fee per side (price units)", 0.0, 1000.0, 0.0, step=0.1, key="cost_fee_fixed"
+    )
+    spread = st.sidebar.number_input(
+        "Spread (price units)", 0.0, 1000.0, 0.0, step=0.1, key="cost_spread"
+    )
+    slippage_model = st.sidebar.selectbox(
+        "Slippage", list(SLIPPAGE_MODELS), format_func=SLIPPAGE_MODELS.get, key="cost_slippage_model"
+    )
+
+    slippage = 0.0
+    if slippage_model != "none":
+        slippage = st.sidebar.number_input(
+            "Slippage per side" + (" (x ATR)" if slippage_model == "atr" else " (price units)"),
+            0.0, 1000.0, 0.0, step=0.05, key=f"cost_slippage_{slippage_model}"
+        )
+
+    return {
+        'fill': fill,
+        'fee_bps': fee_bps,
+        'fee_fixed': fee_fixed,
+        'spread': spread,
+        'slippage_model': slippage_model,
+        'slippage': slippage,
+    }
@@ -1,6 +1,10 @@
 """
 Strategy Builder tab (Tab 2) UI and logic
 """
+import time
+
+import numpy as np
+import pandas as pd
 import streamlit as st
 from config.constants import (
     PRICE_AND_INDICATORS,
@@ -8,9 +12,24 @@ from config.constants import (
     CMB_GROUP,
     EVENT_TYPES,
     CONDITION_OPERATORS,
-    CONDITION_COMPARE_TYPES
+    CONDITION_COMPARE_TYPES,
+    CONDITION_NODE_TYPES,
+    CONDITION_LOGIC,
+    CONDITION_LOOKBACKS,
+    BARS_SINCE_COMPARES,
+    STRATEGY_TIMEFRAMES
+)
+from strategies.first_strategy import strategy_masks, trade_stats
+from strategies.signals import SignalFrame, MaskCache, pair_trades
+from strategies.strategy_store import strategy_store
+from strategies.strategy_manager import (
+    save_strategy_to_session,
+    collect_strategy,
+    delete_strategy,
+    delete_all_strategies,
+    format_element,
+    describe_condition
 )
-from strategies.strategy_manager import save_strategy_to_session, delete_strategy, delete_all_strategies
 
 
 def render_strategy_builder_tab():
@@ -80,6 +99,10 @@ def render_strategy_form():
     render_exit_box()
     st.divider()
 
+    # Signals of the strategy as it stands, on the loaded data
+    render_strategy_preview()
+    st.divider()
+
     # Save button
     render_save_button(strategy_name_input)
 
@@ -115,6 +138,7 @@ def render_entry_box():
                 available_elements1,
                 key="entry_trigger_element1"
             )
+            render_timeframe_select("entry_trigger_timeframe1")
 
         with col2:
             entry_trigger_event = st.selectbox(
@@ -141,6 +165,7 @@ def render_entry_box():
                     [e for e in compatible_elements if e != entry_trigger_element1],
                     key="entry_trigger_element2"
                 )
+                render_timeframe_select("entry_trigger_timeframe2")
                 st.caption(f"Example: {entry_trigger_element1} {entry_trigger_event} {entry_trigger_element2}")
             else:  # Fixed Value
                 entry_trigger_value = st.number_input(
@@ -170,7 +195,8 @@ def render_entry_box():
         # CONDITIONS (Optional, 0-10)
         st.markdown("#### Conditions")
         st.caption(
-            "All conditions must be met for the trigger to activate. If any condition fails, entry will not occur.")
+            "Conditions filter the trigger: combine them with AND / OR, group and negate them, "
+            "and look back over the last N bars. If they do not hold, entry will not occur.")
 
         # Add/Remove condition buttons
         col1, col2, col3 = st.columns([1, 1, 3])
@@ -189,64 +215,11 @@ def render_entry_box():
         if st.session_state['entry_conditions_count'] > 0:
             st.markdown(f"**Active Conditions: {st.session_state['entry_conditions_count']}**")
 
+            render_conditions_logic("entry")
+
             for i in range(st.session_state['entry_conditions_count']):
                 with st.expander(f"Condition {i + 1}", expanded=True):
-                    col1, col2, col3 = st.columns([2, 1, 2])
-
-                    with col1:
-                        # Group selection for condition element 1
-                        cond_group1 = st.selectbox(
-                            "Select Group",
-                            ["Price & Indicators", "RSI Group", "CMB Group"],
-                            key=f"entry_cond_{i}_group1"
-                        )
-
-                        if cond_group1 == "Price & Indicators":
-                            cond_available_elements1 = PRICE_AND_INDICATORS
-                        elif cond_group1 == "RSI Group":
-                            cond_available_elements1 = RSI_GROUP
-                        else:
-                            cond_available_elements1 = CMB_GROUP
-
-                        cond_element1 = st.selectbox(
-                            "Element 1",
-                            cond_available_elements1,
-                            key=f"entry_cond_{i}_element1"
-                        )
-
-                    with col2:
-                        cond_operator = st.selectbox(
-                            "Operator",
-                            CONDITION_OPERATORS,
-                            key=f"entry_cond_{i}_operator"
-                        )
-
-                    with col3:
-                        # Choose between indicator or fixed value
-                        cond_compare_type = st.radio(
-                            "Compare to",
-                            CONDITION_COMPARE_TYPES,
-                            key=f"entry_cond_{i}_compare_type",
-                            horizontal=True
-                        )
-
-                        if cond_compare_type == "Indicator":
-                            # Element 2 must be from same group as Element 1
-                            cond_compatible_elements = get_compatible_elements(cond_element1)
-
-                            cond_element2 = st.selectbox(
-                                "Element 2",
-                                [e for e in cond_compatible_elements if e != cond_element1],
-                                key=f"entry_cond_{i}_element2"
-                            )
-                            st.caption(f"{cond_element1} {cond_operator} {cond_element2}")
-                        else:  # Fixed Value
-                            cond_value = st.number_input(
-                                "Value",
-                                value=50.0,
-                                key=f"entry_cond_{i}_value"
-                            )
-                            st.caption(f"{cond_element1} {cond_operator} {cond_value}")
+                    render_condition_node(f"entry_cond_{i}")
         else:
             st.info("No conditions added. Trigger will activate without additional requirements.")
 
@@ -282,6 +255,7 @@ def render_exit_box():
                 available_elements1,
                 key="exit_trigger_element1"
             )
+            render_timeframe_select("exit_trigger_timeframe1")
 
         with col2:
             exit_trigger_event = st.selectbox(
@@ -308,6 +282,7 @@ def render_exit_box():
                     [e for e in compatible_elements if e != exit_trigger_element1],
                     key="exit_trigger_element2"
                 )
+                render_timeframe_select("exit_trigger_timeframe2")
                 st.caption(f"Example: {exit_trigger_element1} {exit_trigger_event} {exit_trigger_element2}")
             else:  # Fixed Value
                 exit_trigger_value = st.number_input(
@@ -337,7 +312,8 @@ def render_exit_box():
         # CONDITIONS (Optional, 0-10)
         st.markdown("#### Conditions")
         st.caption(
-            "All conditions must be met for the trigger to activate. If any condition fails, exit will not occur.")
+            "Conditions filter the trigger: combine them with AND / OR, group and negate them, "
+            "and look back over the last N bars. If they do not hold, exit will not occur.")
 
         # Add/Remove condition buttons
         col1, col2, col3 = st.columns([1, 1, 3])
@@ -356,74 +332,209 @@ def render_exit_box():
         if st.session_state['exit_conditions_count'] > 0:
             st.markdown(f"**Active Conditions: {st.session_state['exit_conditions_count']}**")
 
+            render_conditions_logic("exit")
+
             for i in range(st.session_state['exit_conditions_count']):
                 with st.expander(f"Condition {i + 1}", expanded=True):
-                    col1, col2, col3 = st.columns([2, 1, 2])
-
-                    with col1:
-                        # Group selection for condition element 1
-                        cond_group1 = st.selectbox(
-                            "Select Group",
-                            ["Price & Indicators", "RSI Group", "CMB Group"],
-                            key=f"exit_cond_{i}_group1"
-                        )
-
-                        if cond_group1 == "Price & Indicators":
-                            cond_available_elements1 = PRICE_AND_INDICATORS
-                        elif cond_group1 == "RSI Group":
-                            cond_available_elements1 = RSI_GROUP
-                        else:
-                            cond_available_elements1 = CMB_GROUP
-
-                        cond_element1 = st.selectbox(
-                            "Element 1",
-                            cond_available_elements1,
-                            key=f"exit_cond_{i}_element1"
-                        )
-
-                    with col2:
-                        cond_operator = st.selectbox(
-                            "Operator",
-                            CONDITION_OPERATORS,
-                            key=f"exit_cond_{i}_operator"
-                        )
-
-                    with col3:
-                        # Choose between indicator or fixed value
-                        cond_compare_type = st.radio(
-                            "Compare to",
-                            CONDITION_COMPARE_TYPES,
-                            key=f"exit_cond_{i}_compare_type",
-                            horizontal=True
-                        )
-
-                        if cond_compare_type == "Indicator":
-                            # Element 2 must be from same group as Element 1
-                            cond_compatible_elements = get_compatible_elements(cond_element1)
-
-                            cond_element2 = st.selectbox(
-                                "Element 2",
-                                [e for e in cond_compatible_elements if e != cond_element1],
-                                key=f"exit_cond_{i}_element2"
-                            )
-                            st.caption(f"{cond_element1} {cond_operator} {cond_element2}")
-                        else:  # Fixed Value
-                            cond_value = st.number_input(
-                                "Value",
-                                value=50.0,
-                                key=f"exit_cond_{i}_value"
-                            )
-                            st.caption(f"{cond_element1} {cond_operator} {cond_value}")
+                    render_condition_node(f"exit_cond_{i}")
         else:
             st.info("No conditions added. Trigger will activate without additional requirements.")
 
 
+def render_conditions_logic(side):
+    """How the top-level conditions combine"""
+    st.radio(
+        "Combine conditions with",
+        CONDITION_LOGIC,
+        key=f"{side}_conditions_logic",
+        horizontal=True,
+        help="AND: every condition must hold. OR: at least one must hold."
+    )
+
+
+def render_condition_node(prefix):
+    """One top-level condition: a single condition or a group of them"""
+    node_type = st.radio(
+        "Type",
+        CONDITION_NODE_TYPES,
+        key=f"{prefix}_type",
+        horizontal=True
+    )
+
+    if node_type == "Condition":
+        render_condition_fields(prefix)
+        return
+
+    col1, col2, col3 = st.columns([1, 1, 1])
+
+    with col1:
+        st.selectbox("Group logic", CONDITION_LOGIC, key=f"{prefix}_logic")
+    with col2:
+        group_size = st.number_input(
+            "Conditions in group", min_value=1, max_value=5, value=2, key=f"{prefix}_size"
+        )
+    with col3:
+        st.checkbox("NOT (negate group)", key=f"{prefix}_negate")
+
+    for j in range(group_size):
+        with st.container(border=True):
+            st.caption(f"Group condition {j + 1}")
+            render_condition_fields(f"{prefix}_{j}")
+
+
+def render_condition_fields(prefix):
+    """Fields of one condition: comparison or event, plus NOT / lookback"""
+    col1, col2, col3 = st.columns([2, 1, 2])
+
+    with col1:
+        # Group selection for condition element 1
+        cond_group1 = st.selectbox(
+            "Select Group",
+            ["Price & Indicators", "RSI Group", "CMB Group"],
+            key=f"{prefix}_group1"
+        )
+
+        if cond_group1 == "Price & Indicators":
+            cond_available_elements1 = PRICE_AND_INDICATORS
+        elif cond_group1 == "RSI Group":
+            cond_available_elements1 = RSI_GROUP
+        else:
+            cond_available_elements1 = CMB_GROUP
+
+        cond_element1 = st.selectbox(
+            "Element 1",
+            cond_available_elements1,
+            key=f"{prefix}_element1"
+        )
+        render_timeframe_select(f"{prefix}_timeframe1")
+
+    with col2:
+        # Above / Below, or an event (e.g. Cross Above) for lookbacks
+        cond_operator = st.selectbox(
+            "Operator",
+            CONDITION_OPERATORS + EVENT_TYPES,
+            key=f"{prefix}_operator"
+        )
+
+    with col3:
+        # Choose between indicator or fixed value
+        cond_compare_type = st.radio(
+            "Compare to",
+            CONDITION_COMPARE_TYPES,
+            key=f"{prefix}_compare_type",
+            horizontal=True
+        )
+
+        if cond_compare_type == "Indicator":
+            # Element 2 must be from same group as Element 1
+            cond_compatible_elements = get_compatible_elements(cond_element1)
+
+            cond_element2 = st.selectbox(
+                "Element 2",
+                [e for e in cond_compatible_elements if e != cond_element1],
+                key=f"{prefix}_element2"
+            )
+            render_timeframe_select(f"{prefix}_timeframe2")
+            st.caption(f"{cond_element1} {cond_operator} {cond_element2}")
+        else:  # Fixed Value
+            cond_value = st.number_input(
+                "Value",
+                value=50.0,
+                key=f"{prefix}_value"
+            )
+            st.caption(f"{cond_element1} {cond_operator} {cond_value}")
+
+    col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+
+    with col1:
+        st.checkbox("NOT", key=f"{prefix}_negate")
+
+    with col2:
+        lookback = st.selectbox(
+            "When",
+            list(CONDITION_LOOKBACKS),
+            key=f"{prefix}_lookback"
+        )
+
+    if CONDITION_LOOKBACKS[lookback] is not None:
+        with col3:
+            st.number_input("N bars", min_value=1, value=3, step=1, key=f"{prefix}_lookback_bars")
+
+        if CONDITION_LOOKBACKS[lookback] == "bars_since":
+            with col4:
+                st.selectbox("Compare", BARS_SINCE_COMPARES, key=f"{prefix}_lookback_compare")
+
+
+def render_strategy_preview():
+    """
+    Live entry / exit signal counts and stats of the strategy being built,
+    on the full 1H and 15m indicator frames.
+
+    Node masks are cached per session, so an edit re-evaluates only the
+    trigger / condition that changed.
+    """
+    st.subheader("Preview")
+
+    job = st.session_state.get('precompute_job')
+
+    if job is None:
+        st.caption("Upload the 1H, 15m and DRM files to preview the signals.")
+        return
+
+    if not job.done:
+        st.caption("Indicators are still being calculated...")
+        return
+
+    if job.error is not None:
+        st.caption("Indicators could not be calculated; no preview.")
+        return
+
+    df_1h, df_15m = job.features()
+    frames = {"1H": df_1h, "15m": df_15m}
+    frame_keys = job.feature_keys()
+
+    # Masks are only valid for the frames they were computed on
+    cache_key, mask_caches = st.session_state.get('preview_masks', (None, None))
+
+    if cache_key != job.key:
+        mask_caches = {timeframe: MaskCache() for timeframe in frames}
+        st.session_state['preview_masks'] = (job.key, mask_caches)
+
+    strategy = collect_strategy()
+
+    start = time.perf_counter()
+    columns = {}
+
+    for timeframe, df in frames.items():
+        signal_frame = SignalFrame(df, timeframe, frames, masks=mask_caches[timeframe], frame_keys=frame_keys)
+        entry_mask, exit_mask = strategy_masks(signal_frame, strategy)
+
+        entries, exits = pair_trades(entry_mask, exit_mask)
+        stats = trade_stats(df, entries, exits)
+
+        columns[timeframe] = [
+            f"{np.count_nonzero(entry_mask)}",
+            f"{np.count_nonzero(exit_mask)}",
+            f"{int(stats.loc['Number of trades', 'value'])}",
+            f"{round(stats.loc['Win rate (%)', 'value']):.0f}%",
+            f"{stats.loc['Total return (%)', 'value']:.2f}%",
+        ]
+
+    elapsed = time.perf_counter() - start
+
+    st.table(pd.DataFrame(
+        columns,
+        index=["Entry signals", "Exit signals", "Number of trades", "Win rate (%)", "Total return (%)"],
+    ))
+    st.caption(f"All loaded bars ({len(df_1h)} 1H, {len(df_15m)} 15m), evaluated in {elapsed * 1e3:.0f} ms")
+
+
 def render_save_button(strategy_name_input):
     """Render save strategy button"""
     col1, col2 = st.columns([3, 1])
     with col2:
         if st.button("💾 Save Strategy", type="primary", use_container_width=True):
-            count = save_strategy_to_session(strategy_name_input)
+            save_strategy_to_session(strategy_name_input)
 
             # Reset the strategy builder to show "Create New Strategy" button again
             st.session_state['strategy_started'] = False
@@ -432,7 +543,7 @@ def render_save_button(strategy_name_input):
             st.session_state['exit_conditions_count'] = 0
             st.session_state['strategy_name_input'] = ""
 
-            st.success(f"✅ Strategy saved! Total: {count}")
+            st.success(f"✅ Strategy saved! Total: {strategy_store.count()}")
             st.rerun()
 
 
@@ -440,11 +551,13 @@ def render_strategy_management():
     """Render strategy management section"""
     st.subheader("Strategy Management")
 
-    if st.session_state['saved_strategies']:
-        st.caption(f"Total strategies saved: {len(st.session_state['saved_strategies'])}")
+    saved_strategies = strategy_store.all()
+
+    if saved_strategies:
+        st.caption(f"Total strategies saved: {len(saved_strategies)}")
 
         # Create a table view of strategies
-        for idx, strategy in enumerate(st.session_state['saved_strategies']):
+        for idx, strategy in enumerate(saved_strategies):
             with st.container(border=True):
                 col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
 
@@ -459,8 +572,8 @@ def render_strategy_management():
                     st.caption(f"Created: {strategy.get('created_at', 'N/A')}")
 
                 with col4:
-                    if st.button("🗑️", key=f"delete_strategy_{idx}", help="Delete this strategy"):
-                        delete_strategy(idx)
+                    if st.button("🗑️", key=f"delete_strategy_{strategy['strategy_id']}", help="Delete this strategy"):
+                        delete_strategy(strategy['strategy_id'])
                         st.success(f"Strategy deleted!")
                         st.rerun()
 
@@ -476,7 +589,7 @@ def render_strategy_management():
 
                         # Trigger
                         st.markdown("#### Trigger")
-                        trigger_element1 = trigger.get('element1', 'N/A')
+                        trigger_element1 = format_element(trigger.get('element1', 'N/A'), trigger.get('timeframe1'))
                         trigger_event = trigger.get('event', 'N/A')
                         trigger_compare_type = trigger.get('compare_type', 'Indicator')
 
@@ -484,7 +597,7 @@ def render_strategy_management():
                             trigger_value = trigger.get('value', 'N/A')
                             st.info(f"**{trigger_element1}** {trigger_event} **{trigger_value}**")
                         else:
-                            trigger_element2 = trigger.get('element2', 'N/A')
+                            trigger_element2 = format_element(trigger.get('element2', 'N/A'), trigger.get('timeframe2'))
                             st.info(f"**{trigger_element1}** {trigger_event} **{trigger_element2}**")
 
                         # Position Size
@@ -497,18 +610,12 @@ def render_strategy_management():
                         conditions_count = entry.get('conditions_count', 0)
 
                         if conditions_count > 0:
-                            st.markdown(f"**{conditions_count} condition(s) must be met:**")
+                            if entry.get('conditions_logic', "AND") == "OR":
+                                st.markdown(f"**At least one of {conditions_count} condition(s) must be met:**")
+                            else:
+                                st.markdown(f"**{conditions_count} condition(s) must be met:**")
                             for i, cond in enumerate(entry.get('conditions', []), 1):
-                                cond_element1 = cond.get('element1', 'N/A')
-                                cond_operator = cond.get('operator', 'N/A')
-                                cond_compare_type = cond.get('compare_type', 'Indicator')
-
-                                if cond_compare_type == "Fixed Value":
-                                    cond_value = cond.get('value', 'N/A')
-                                    st.markdown(f"{i}. {cond_element1} **{cond_operator}** {cond_value}")
-                                else:
-                                    cond_element2 = cond.get('element2', 'N/A')
-                                    st.markdown(f"{i}. {cond_element1} **{cond_operator}** {cond_element2}")
+                                st.markdown(f"{i}. {describe_condition(cond)}")
                         else:
                             st.markdown("*No conditions - trigger activates immediately*")
 
@@ -523,7 +630,7 @@ def render_strategy_management():
 
                         # Trigger
                         st.markdown("#### Trigger")
-                        exit_trigger_element1 = exit_trigger.get('element1', 'N/A')
+                        exit_trigger_element1 = format_element(exit_trigger.get('element1', 'N/A'), exit_trigger.get('timeframe1'))
                         exit_trigger_event = exit_trigger.get('event', 'N/A')
                         exit_trigger_compare_type = exit_trigger.get('compare_type', 'Indicator')
 
@@ -531,7 +638,7 @@ def render_strategy_management():
                             exit_trigger_value = exit_trigger.get('value', 'N/A')
                             st.info(f"**{exit_trigger_element1}** {exit_trigger_event} **{exit_trigger_value}**")
                         else:
-                            exit_trigger_element2 = exit_trigger.get('element2', 'N/A')
+                            exit_trigger_element2 = format_element(exit_trigger.get('element2', 'N/A'), exit_trigger.get('timeframe2'))
                             st.info(f"**{exit_trigger_element1}** {exit_trigger_event} **{exit_trigger_element2}**")
 
                         # Position Size
@@ -544,18 +651,12 @@ def render_strategy_management():
                         exit_conditions_count = exit_cfg.get('conditions_count', 0)
 
                         if exit_conditions_count > 0:
-                            st.markdown(f"**{exit_conditions_count} condition(s) must be met:**")
+                            if exit_cfg.get('conditions_logic', "AND") == "OR":
+                                st.markdown(f"**At least one of {exit_conditions_count} condition(s) must be met:**")
+                            else:
+                                st.markdown(f"**{exit_conditions_count} condition(s) must be met:**")
                             for i, cond in enumerate(exit_cfg.get('conditions', []), 1):
-                                cond_element1 = cond.get('element1', 'N/A')
-                                cond_operator = cond.get('operator', 'N/A')
-                                cond_compare_type = cond.get('compare_type', 'Indicator')
-
-                                if cond_compare_type == "Fixed Value":
-                                    cond_value = cond.get('value', 'N/A')
-                                    st.markdown(f"{i}. {cond_element1} **{cond_operator}** {cond_value}")
-                                else:
-                                    cond_element2 = cond.get('element2', 'N/A')
-                                    st.markdown(f"{i}. {cond_element1} **{cond_operator}** {cond_element2}")
+                                st.markdown(f"{i}. {describe_condition(cond)}")
                         else:
                             st.markdown("*No conditions - trigger activates immediately*")
 
@@ -591,6 +692,16 @@ def reset_strategy_builder():
     st.rerun()
 
 
+def render_timeframe_select(key):
+    """Timeframe of a strategy element ("Chart" = the timeframe it runs on)"""
+    return st.selectbox(
+        "Timeframe",
+        STRATEGY_TIMEFRAMES,
+        key=key,
+        help="Read this element from another timeframe, e.g. 1H RSI on the 15m chart"
+    )
+
+
 def get_compatible_elements(selected_element):
     """Get compatible elements based on selection"""
     if selected_element in RSI_GROUP:
@@ -0,0 +1,84 @@
+"""
+Shared executors for running independent pipelines concurrently
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from config.constants import EXECUTOR_KIND, EXECUTOR_MAX_WORKERS
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(kind=None, max_workers=None):
+    """
+    Return the process-wide executor of the given kind.
+
+    Executors are created lazily and shared between all Streamlit sessions,
+    so reruns do not pay the pool start-up cost again.
+
+    Parameters
+    ----------
+    kind : str
+        "thread" or "process" (default EXECUTOR_KIND)
+    max_workers : int
+        Pool size (default EXECUTOR_MAX_WORKERS, or one per CPU core)
+    """
+    kind = kind or EXECUTOR_KIND
+    max_workers = max_workers or EXECUTOR_MAX_WORKERS or os.cpu_count() or 1
+
+    if kind not in ("thread", "process"):
+        raise ValueError(f"Unknown executor kind: {kind}")
+
+    key = (kind, max_workers)
+
+    with _executors_lock:
+        executor = _executors.get(key)
+
+        if executor is None:
+            if kind == "thread":
+                executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix="pipeline",
+                )
+            else:
+                # The Streamlit server is multi-threaded, so never fork it
+                executor = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            _executors[key] = executor
+
+    return executor
+
+
+def run_parallel(tasks, kind=None, max_workers=None):
+    """
+    Run independent tasks concurrently and gather their results.
+
+    Parameters
+    ----------
+    tasks : list
+        (fn, args, kwargs) tuples. With a process executor, fn and its
+        arguments must be picklable (module-level functions).
+
+    Returns
+    -------
+    list
+        Results in the same order as tasks. The first exception raised
+        by a task is re-raised here.
+    """
+    if not tasks:
+        return []
+
+    # Nothing to overlap - skip the pool round-trip
+    if len(tasks) == 1:
+        fn, args, kwargs = tasks[0]
+        return [fn(*args, **kwargs)]
+
+    executor = get_executor(kind, max_workers)
+    futures = [executor.submit(fn, *args, **kwargs) for fn, args, kwargs in tasks]
+
+    return [future.result() for future in futures]
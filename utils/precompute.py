@@ -0,0 +1,214 @@
+"""
+Background precomputation of indicators
+"""
+import threading
+from concurrent.futures import CancelledError, as_completed
+
+import streamlit as st
+
+from data.registry import registry
+from indicators.calculate_indicators import calculate_indicators
+from utils.executor import get_executor
+
+
+def acquire_features(source, params):
+    """
+    Indicator frame of a registered dataset, shared through the registry.
+
+    Sessions with the same data and parameters share one computed copy.
+    """
+    key = ("features", source.key, tuple(sorted(params.items())))
+
+    return registry.acquire(key, lambda: calculate_indicators(source.frame(), **params))
+
+
+def _release_handle(future):
+    """Done callback: release the DatasetHandle a finished step returned"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().release()
+
+
+class PrecomputeJob:
+    """
+    Computes indicators for both timeframes on a background thread.
+
+    DRM periods of every pattern/primary/secondary combination are already
+    indexed at upload time (see load_drm_index), so only indicators remain.
+
+    The job never touches st.session_state; the script thread reads its
+    results (blocking only if they are not ready yet) and its progress.
+    """
+
+    def __init__(self, key, df_1h, df_15m, params_1h, params_15m):
+        self.key = key
+
+        # DatasetHandles of the uploaded data
+        self._df_1h = df_1h
+        self._df_15m = df_15m
+        self._params_1h = dict(params_1h)
+        self._params_15m = dict(params_15m)
+
+        # One step per timeframe
+        self.total_steps = 2
+        self.completed_steps = 0
+        self.message = "Queued"
+        self.error = None
+
+        self._feature_handles = None
+        self._futures = []
+
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._features_ready = threading.Event()
+        self._done = threading.Event()
+
+        self._thread = threading.Thread(
+            target=self._run, name="precompute", daemon=True
+        )
+
+    # -------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def progress(self):
+        return self.completed_steps / self.total_steps
+
+    def cancel(self):
+        """
+        Stop a superseded job: steps not started yet never run, and the
+        job ends (as "Cancelled") at the next step boundary.
+        """
+        with self._lock:
+            self._cancelled.set()
+
+            for future in self._futures:
+                future.cancel()
+
+    def wait(self, timeout=None):
+        """Wait up to timeout seconds for the job; True once it is done"""
+        return self._done.wait(timeout)
+
+    def _run(self):
+        try:
+            self.message = "Calculating indicators"
+
+            # Threads whatever EXECUTOR_KIND is: the registry (and the
+            # handles it gives out) lives in this process
+            executor = get_executor("thread")
+
+            with self._lock:
+                if self._cancelled.is_set():
+                    raise CancelledError()
+
+                futures = {
+                    executor.submit(acquire_features, source, params): timeframe
+                    for timeframe, source, params in (
+                        ("1H", self._df_1h, self._params_1h),
+                        ("15m", self._df_15m, self._params_15m),
+                    )
+                }
+                self._futures = list(futures)
+
+            for future in as_completed(futures):
+                if self._cancelled.is_set():
+                    raise CancelledError()
+
+                future.result()
+                self.completed_steps += 1
+                self.message = f"{futures[future]} indicators ready"
+
+            self._feature_handles = tuple(future.result() for future in futures)
+
+            self.message = "Done"
+        except CancelledError as e:
+            # Without the traceback, whose frames would keep the handles alive
+            self.error = e.with_traceback(None)
+            self.message = "Cancelled"
+
+            # Let the registry evict what superseded steps computed
+            for future in self._futures:
+                future.add_done_callback(_release_handle)
+        except Exception as e:
+            self.error = e.with_traceback(None)
+            self.message = "Failed"
+        finally:
+            # Unblock any waiter, including on failure
+            self._features_ready.set()
+            self._done.set()
+
+    # -------------------------------------------------
+    # Results
+    # -------------------------------------------------
+    def features(self):
+        """Return (df_features_1h, df_features_15m), waiting if needed"""
+        self._features_ready.wait()
+
+        if self.error is not None:
+            raise self.error
+
+        return tuple(handle.frame() for handle in self._feature_handles)
+
+    def shared_features(self):
+        """(df_features_1h, df_features_15m) as SharedFrames for process workers"""
+        self._features_ready.wait()
+
+        if self.error is not None:
+            raise self.error
+
+        return tuple(handle.shared() for handle in self._feature_handles)
+
+    def feature_keys(self):
+        """{timeframe: registry key} of the indicator frames"""
+        self._features_ready.wait()
+
+        if self.error is not None:
+            raise self.error
+
+        return {timeframe: handle.key for timeframe, handle in zip(("1H", "15m"), self._feature_handles)}
+
+
+def ensure_precompute_job(sidebar_config):
+    """
+    Start (or reuse) the background job for the loaded data and the current
+    parameters. Returns None until df_1h, df_15m and drm are all loaded.
+    """
+    if not all(name in st.session_state for name in ("df_1h", "df_15m", "drm")):
+        return None
+
+    key = (
+        st.session_state["df_1h"].key,
+        st.session_state["df_15m"].key,
+        tuple(sorted(sidebar_config['params_1h'].items())),
+        tuple(sorted(sidebar_config['params_15m'].items())),
+    )
+
+    job = st.session_state.get('precompute_job')
+
+    if job is not None and job.key == key:
+        return job
+
+    # Inputs changed - stop the superseded job so it does not compete
+    # with the new one for the pool
+    if job is not None:
+        job.cancel()
+
+    job = PrecomputeJob(
+        key,
+        st.session_state["df_1h"],
+        st.session_state["df_15m"],
+        sidebar_config['params_1h'],
+        sidebar_config['params_15m'],
+    ).start()
+
+    st.session_state['precompute_job'] = job
+
+    return job
+